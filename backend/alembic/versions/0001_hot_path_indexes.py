@@ -0,0 +1,46 @@
+"""Add indexes for the hot endpoint filters
+
+Revision ID: 0001_hot_path_indexes
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+Tables themselves are still created by Base.metadata.create_all() in
+app/main.py, so this revision only adds indexes to existing databases.
+if_not_exists keeps it safe on databases create_all already built with them.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_hot_path_indexes"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_transactions_account_date", "transactions", ["account_id", "txn_date"]),
+    ("ix_transactions_account_type_date", "transactions", ["account_id", "txn_type", "txn_date"]),
+    ("ix_bills_user_status_due", "bills", ["user_id", "status", "due_date"]),
+    ("ix_budgets_user_year_month", "budgets", ["user_id", "year", "month"]),
+    ("ix_accounts_user_id", "accounts", ["user_id"]),
+    ("ix_rewards_user_id", "rewards", ["user_id"]),
+    ("ix_alerts_user_id", "alerts", ["user_id"]),
+    ("ix_savings_goals_user_id", "savings_goals", ["user_id"]),
+    ("ix_redeemed_rewards_user_id", "redeemed_rewards", ["user_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,27 @@
+"""Index bills by status and due date for the overdue sweeper
+
+Revision ID: 0003_bills_status_due_index
+Revises: 0002_email_outbox
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_bills_status_due_index"
+down_revision: Union[str, Sequence[str], None] = "0002_email_outbox"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_bills_status_due", "bills", ["status", "due_date"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_bills_status_due", table_name="bills", if_exists=True)
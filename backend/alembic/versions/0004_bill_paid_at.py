@@ -0,0 +1,37 @@
+"""Add bills.paid_at
+
+Revision ID: 0004_bill_paid_at
+Revises: 0003_bills_status_due_index
+Create Date: 2026-10-17 00:00:00
+
+Bills paid before this revision keep paid_at NULL, so they do not count
+towards "paid this month".
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_bill_paid_at"
+down_revision: Union[str, Sequence[str], None] = "0003_bills_status_due_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_column("bills", "paid_at"):
+        op.add_column("bills", sa.Column("paid_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if _has_column("bills", "paid_at"):
+        op.drop_column("bills", "paid_at")
@@ -0,0 +1,57 @@
+"""Persisted alerts: presentation fields, dedupe key and read state
+
+Revision ID: 0005_persisted_alerts
+Revises: 0004_bill_paid_at
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_persisted_alerts"
+down_revision: Union[str, Sequence[str], None] = "0004_bill_paid_at"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    sa.Column("severity", sa.String(), nullable=True),
+    sa.Column("category", sa.String(), nullable=True),
+    sa.Column("title", sa.String(), nullable=True),
+    sa.Column("link", sa.String(), nullable=True),
+    sa.Column("dedupe_key", sa.String(), nullable=True),
+    sa.Column("is_read", sa.Boolean(), nullable=False, server_default=sa.false()),
+]
+
+INDEXES = [
+    ("uq_alerts_user_dedupe_key", ["user_id", "dedupe_key"], True),
+    ("ix_alerts_user_id_id", ["user_id", "id"], False),
+    ("ix_alerts_user_read", ["user_id", "is_read"], False),
+]
+
+
+def _existing_columns() -> set:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("alerts")}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = _existing_columns()
+    for column in COLUMNS:
+        if column.name not in existing:
+            op.add_column("alerts", column.copy())
+    for name, columns, unique in INDEXES:
+        op.create_index(name, "alerts", columns, unique=unique, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="alerts", if_exists=True)
+    existing = _existing_columns()
+    for column in reversed(COLUMNS):
+        if column.name in existing:
+            op.drop_column("alerts", column.name)
@@ -0,0 +1,54 @@
+"""Add the idempotency_keys table
+
+Revision ID: 0006_idempotency_keys
+Revises: 0005_persisted_alerts
+Create Date: 2026-10-17 00:00:00
+
+Skipped when create_all() in app/main.py has already built the table.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_idempotency_keys"
+down_revision: Union[str, Sequence[str], None] = "0005_persisted_alerts"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+idempotency_status = sa.Enum("in_progress", "completed", name="idempotencystatus")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("idempotency_keys"):
+        return
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("scope", sa.String(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("status", idempotency_status, nullable=False),
+        sa.Column("response_status", sa.Integer(), nullable=True),
+        sa.Column("response_body", sa.TEXT(), nullable=True),
+        sa.Column("content_type", sa.String(), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_idempotency_keys_id", "idempotency_keys", ["id"])
+    op.create_index("uq_idempotency_keys_scope_key", "idempotency_keys", ["scope", "key"], unique=True)
+    op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_idempotency_keys_expires_at", table_name="idempotency_keys", if_exists=True)
+    op.drop_index("uq_idempotency_keys_scope_key", table_name="idempotency_keys", if_exists=True)
+    op.drop_index("ix_idempotency_keys_id", table_name="idempotency_keys", if_exists=True)
+    op.drop_table("idempotency_keys", if_exists=True)
+    idempotency_status.drop(op.get_bind(), checkfirst=True)
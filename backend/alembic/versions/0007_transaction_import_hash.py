@@ -0,0 +1,39 @@
+"""Add transactions.import_hash for statement import dedupe
+
+Revision ID: 0007_transaction_import_hash
+Revises: 0006_idempotency_keys
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_transaction_import_hash"
+down_revision: Union[str, Sequence[str], None] = "0006_idempotency_keys"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_column("transactions", "import_hash"):
+        op.add_column("transactions", sa.Column("import_hash", sa.String(length=64), nullable=True))
+    op.create_index(
+        "uq_transactions_account_import_hash", "transactions", ["account_id", "import_hash"],
+        unique=True, if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_transactions_account_import_hash", table_name="transactions", if_exists=True)
+    if _has_column("transactions", "import_hash"):
+        op.drop_column("transactions", "import_hash")
@@ -0,0 +1,69 @@
+"""Add ledger_monthly_rollups.outflow_amount (negative amounts only)
+
+Revision ID: 0008_rollup_outflow_amount
+Revises: 0007_transaction_import_hash
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_rollup_outflow_amount"
+down_revision: Union[str, Sequence[str], None] = "0007_transaction_import_hash"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # When the table is missing, 0010_ledger_monthly_rollups creates it with this column
+    if not sa.inspect(op.get_bind()).has_table("ledger_monthly_rollups"):
+        return
+    if _has_column("ledger_monthly_rollups", "outflow_amount"):
+        return
+    op.add_column(
+        "ledger_monthly_rollups",
+        sa.Column("outflow_amount", sa.Numeric(precision=14, scale=2), nullable=False, server_default="0"),
+    )
+
+    # Backfill from the ledger, matching rows the way app.core.ledger keys them
+    rollups = sa.table(
+        "ledger_monthly_rollups",
+        sa.column("account_id"), sa.column("year"), sa.column("month"), sa.column("category"),
+        sa.column("merchant"), sa.column("txn_type"), sa.column("outflow_amount"),
+    )
+    txns = sa.table(
+        "transactions",
+        sa.column("account_id"), sa.column("txn_date"), sa.column("category"), sa.column("merchant"),
+        sa.column("description"), sa.column("txn_type"), sa.column("amount"),
+    )
+    outflow = (
+        sa.select(sa.func.coalesce(sa.func.sum(txns.c.amount), 0))
+        .where(
+            txns.c.account_id == rollups.c.account_id,
+            sa.cast(sa.extract("year", txns.c.txn_date), sa.Integer) == rollups.c.year,
+            sa.cast(sa.extract("month", txns.c.txn_date), sa.Integer) == rollups.c.month,
+            sa.func.coalesce(sa.func.nullif(txns.c.category, ""), "Uncategorized") == rollups.c.category,
+            sa.func.coalesce(
+                sa.func.nullif(txns.c.merchant, ""), sa.func.nullif(txns.c.description, ""), "Unknown"
+            ) == rollups.c.merchant,
+            txns.c.txn_type == rollups.c.txn_type,
+            txns.c.amount < 0,
+        )
+        .scalar_subquery()
+    )
+    op.execute(rollups.update().values(outflow_amount=outflow))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("ledger_monthly_rollups") and _has_column("ledger_monthly_rollups", "outflow_amount"):
+        op.drop_column("ledger_monthly_rollups", "outflow_amount")
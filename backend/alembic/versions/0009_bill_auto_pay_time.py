@@ -0,0 +1,39 @@
+"""Store bills.auto_pay_time as zero-padded HH:MM
+
+Revision ID: 0009_bill_auto_pay_time
+Revises: 0008_rollup_outflow_amount
+Create Date: 2026-10-17 00:00:00
+
+The auto-pay job compares auto_pay_time as text, which only works for
+"HH:MM". The API now normalises it on save; this rewrites stored "9:05" and
+"09:05:00" style values the same way. Anything else is left alone and, as
+before, never auto-paid.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_bill_auto_pay_time"
+down_revision: Union[str, Sequence[str], None] = "0008_rollup_outflow_amount"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bills = sa.table("bills", sa.column("auto_pay_time", sa.String))
+    time = bills.c.auto_pay_time
+    # "9:05:00" -> "9:05", "09:05:00" -> "09:05"
+    op.execute(bills.update().where(time.like("%:__:__")).values(auto_pay_time=sa.func.substr(time, 1, sa.func.length(time) - 3)))
+    # "9:05" -> "09:05"
+    op.execute(bills.update().where(time.like("_:__")).values(auto_pay_time=sa.literal("0") + time))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Zero-padded times are still valid
+    pass
@@ -0,0 +1,94 @@
+"""Create and backfill ledger_monthly_rollups
+
+Revision ID: 0010_ledger_monthly_rollups
+Revises: 0009_bill_auto_pay_time
+Create Date: 2026-10-17 00:00:00
+
+Databases upgraded with alembic alone never got the rollup table, which was
+only built by create_all() in app/main.py. Creates it when missing and fills
+an empty table from the transactions ledger, the way rebuild_rollups.py does,
+so the insights endpoints do not start from zero.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_ledger_monthly_rollups"
+down_revision: Union[str, Sequence[str], None] = "0009_bill_auto_pay_time"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The txntype enum already exists for transactions.txn_type
+txn_type = sa.Enum("debit", "credit", name="txntype").with_variant(
+    postgresql.ENUM("debit", "credit", name="txntype", create_type=False), "postgresql"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("ledger_monthly_rollups"):
+        op.create_table(
+            "ledger_monthly_rollups",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("account_id", sa.Integer(), sa.ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("year", sa.Integer(), nullable=False),
+            sa.Column("month", sa.Integer(), nullable=False),
+            sa.Column("category", sa.String(), nullable=False),
+            sa.Column("merchant", sa.String(), nullable=False),
+            sa.Column("txn_type", txn_type, nullable=False),
+            sa.Column("total_amount", sa.Numeric(precision=14, scale=2), nullable=False),
+            sa.Column("outflow_amount", sa.Numeric(precision=14, scale=2), nullable=False, server_default="0"),
+            sa.Column("txn_count", sa.Integer(), nullable=False),
+            sa.UniqueConstraint(
+                "account_id", "year", "month", "category", "merchant", "txn_type", name="uq_ledger_rollup_key"
+            ),
+        )
+        op.create_index("ix_ledger_monthly_rollups_id", "ledger_monthly_rollups", ["id"])
+
+    rollups = sa.table(
+        "ledger_monthly_rollups",
+        sa.column("id"), sa.column("account_id"), sa.column("year"), sa.column("month"), sa.column("category"),
+        sa.column("merchant"), sa.column("txn_type"), sa.column("total_amount"), sa.column("outflow_amount"),
+        sa.column("txn_count"),
+    )
+    # A non-empty table is already maintained by the app; leave it to rebuild_rollups.py
+    if op.get_bind().execute(sa.select(rollups.c.id).limit(1)).first() is not None:
+        return
+
+    # Backfill from the ledger, keyed the way app.core.ledger keys rows
+    txns = sa.table(
+        "transactions",
+        sa.column("id"), sa.column("account_id"), sa.column("txn_date"), sa.column("category"),
+        sa.column("merchant"), sa.column("description"), sa.column("txn_type"), sa.column("amount"),
+    )
+    year = sa.cast(sa.extract("year", txns.c.txn_date), sa.Integer)
+    month = sa.cast(sa.extract("month", txns.c.txn_date), sa.Integer)
+    category = sa.func.coalesce(sa.func.nullif(txns.c.category, ""), "Uncategorized")
+    merchant = sa.func.coalesce(
+        sa.func.nullif(txns.c.merchant, ""), sa.func.nullif(txns.c.description, ""), "Unknown"
+    )
+    source = sa.select(
+        txns.c.account_id, year, month, category, merchant, txns.c.txn_type,
+        sa.func.coalesce(sa.func.sum(txns.c.amount), 0),
+        sa.func.coalesce(sa.func.sum(sa.case((txns.c.amount < 0, txns.c.amount), else_=0)), 0),
+        sa.func.count(txns.c.id),
+    ).where(
+        txns.c.account_id.isnot(None),
+        txns.c.txn_date.isnot(None),
+        txns.c.txn_type.isnot(None),
+    ).group_by(txns.c.account_id, year, month, category, merchant, txns.c.txn_type)
+    op.execute(rollups.insert().from_select(
+        ["account_id", "year", "month", "category", "merchant", "txn_type", "total_amount", "outflow_amount", "txn_count"],
+        source,
+    ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_ledger_monthly_rollups_id", table_name="ledger_monthly_rollups", if_exists=True)
+    op.drop_table("ledger_monthly_rollups", if_exists=True)
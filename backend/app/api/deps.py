@@ -1,43 +1,132 @@
 # backend/app/api/deps.py
 
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+import secrets
+from typing import AsyncGenerator, Optional
+from fastapi import Depends, Header, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.query_guard import statement_scope
+from app.db.session import AsyncSessionLocal
 from app.models.banking import User
+from app.schemas.user import Principal
 
 # This matches the path to your login endpoint
 # It tells Swagger UI where to get the token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+# EventSource cannot set headers, so streams also accept ?access_token=
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
-def get_db() -> Generator:
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
+# token subject -> Principal. Per process, so entries also expire after a short TTL
+# to bound staleness when another worker changes the user.
+principal_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL_SECONDS)
 
-async def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-) -> User:
-    credentials_exception = HTTPException(
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # One scope per request for app.db.query_guard's repeated-statement check
+    with statement_scope():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def invalidate_principal(user_id: Optional[int] = None, email: Optional[str] = None) -> None:
+    """
+    Drop cached principals after a user changes (profile, password, activation).
+    """
+    if user_id is not None:
+        principal_cache.pop(("id", user_id))
+    if email is not None:
+        principal_cache.pop(("email", email))
+
+def _token_subject(token: str) -> tuple:
+    """
+    ("id", user id) or ("email", email), also the principal cache key.
+    Tokens carry the user id ("uid"); older tokens only have the email in "sub".
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
+        raise _credentials_exception()
+
+    if payload.get("uid") is not None:
+        return ("id", payload["uid"])
+    if payload.get("sub") is not None:
+        return ("email", payload["sub"])
+    raise _credentials_exception()
+
+async def _load_user(db: AsyncSession, subject: tuple) -> User:
+    kind, value = subject
+    if kind == "id":
+        user = await db.get(User, value)
+    else:
+        user = await db.scalar(select(User).where(User.email == value))
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        principal_cache.pop(subject)
+        raise _credentials_exception()
+    return user
+
+def _cache_principal(subject: tuple, user: User) -> Principal:
+    principal = Principal.model_validate(user)
+    principal_cache.set(subject, principal)
+    return principal
+
+async def principal_from_token(db: AsyncSession, token: str) -> Principal:
+    """
+    Authenticated user without a database round trip when the cache is warm.
+    """
+    subject = _token_subject(token)
+    principal = principal_cache.get(subject)
+    if principal is None:
+        principal = _cache_principal(subject, await _load_user(db, subject))
+    return principal
+
+async def get_current_principal(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme)
+) -> Principal:
+    return await principal_from_token(db, token)
+
+async def get_stream_principal(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    access_token: Optional[str] = Query(None),
+) -> Principal:
+    """
+    Principal for long-lived streams. Uses its own short session instead of
+    get_async_db, so an open stream does not keep a pooled connection.
+    """
+    token = token or access_token
+    if not token:
+        raise _credentials_exception()
+    async with AsyncSessionLocal() as db:
+        return await principal_from_token(db, token)
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    """
+    ORM User for endpoints that modify the user row, in one query whether or
+    not the principal is cached. Most endpoints only need get_current_principal.
+    """
+    subject = _token_subject(token)
+    user = await _load_user(db, subject)
+    # The row is loaded anyway, so the cached principal is refreshed for free
+    _cache_principal(subject, user)
+    return user
+
+async def require_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    """
+    Guard for /internal/* endpoints, which expose operational detail no
+    customer should see. Answers 404 so the routes are not advertised.
+    """
+    expected = settings.INTERNAL_API_TOKEN
+    if not expected or not x_internal_token or not secrets.compare_digest(x_internal_token, expected):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
@@ -17,4 +17,13 @@ from app.api.v1.endpoints import insights
 api_router.include_router(insights.router, prefix="/insights", tags=["insights"])
 
 from app.api.v1.endpoints import rewards
-api_router.include_router(rewards.router, prefix="/rewards", tags=["rewards"])
\ No newline at end of file
+api_router.include_router(rewards.router, prefix="/rewards", tags=["rewards"])
+
+from app.api.v1.endpoints import internal
+api_router.include_router(internal.router, prefix="/internal", tags=["internal"])
+
+from app.api.v1.endpoints import events
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+
+from app.api.v1.endpoints import dashboard
+api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
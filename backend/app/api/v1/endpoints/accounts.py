@@ -1,32 +1,42 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import time
+from dataclasses import asdict
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.models.banking import Account, User, AccountType
+from app.core import imports
+from app.core.events import queue_event
+from app.db.query_guard import statement_scope
+from app.schemas.user import Principal
+from app.models.banking import Account, AccountType, LedgerRollup, Transaction, User
 from app.schemas import account as account_schema
 
 router = APIRouter()
 
 @router.get("/", response_model=List[account_schema.Account])
-def read_accounts(
-    db: Session = Depends(deps.get_db),
+async def read_accounts(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Retrieve accounts for the current user.
     """
-    accounts = db.query(Account).filter(Account.user_id == current_user.id).offset(skip).limit(limit).all()
-    return accounts
+    accounts = await db.scalars(
+        select(Account).where(Account.user_id == current_user.id).offset(skip).limit(limit)
+    )
+    return accounts.all()
 
 @router.post("/", response_model=account_schema.Account)
-def create_account(
+async def create_account(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     account_in: account_schema.AccountCreate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Create (Link) a new account.
@@ -36,22 +46,22 @@ def create_account(
         user_id=current_user.id
     )
     db.add(account)
-    db.commit()
-    db.refresh(account)
+    await db.commit()
+    await db.refresh(account)
     return account
 
 @router.post("/{account_id}/verify-pin", response_model=bool)
-def verify_pin(
+async def verify_pin(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     account_id: int,
     pin: str,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Verify the PIN for a specific account.
     """
-    account = db.query(Account).filter(Account.id == account_id, Account.user_id == current_user.id).first()
+    account = await db.scalar(select(Account).where(Account.id == account_id, Account.user_id == current_user.id))
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
@@ -60,55 +70,97 @@ def verify_pin(
         return True
     return False
 
+@router.post("/{account_id}/import", response_model=account_schema.StatementImport)
+async def import_statement(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    request: Request,
+    account_id: int,
+    format: Optional[str] = None,
+    date_format: Optional[str] = None,
+    current_user: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Import a CSV or OFX bank statement sent as the raw request body.
+
+    The body is parsed as it streams in and written in batches, each committed
+    on its own with an "import" progress event. Rows already imported into this
+    account are skipped, so a failed upload can simply be sent again.
+    """
+    account = await db.scalar(select(Account).where(Account.id == account_id, Account.user_id == current_user.id))
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    fmt = (format or imports.detect_format(request.headers.get("content-type")) or "").lower()
+    if fmt not in imports.FORMATS:
+        raise HTTPException(status_code=415, detail="Send a CSV or OFX statement, or pass ?format=csv|ofx")
+    currency = account.currency
+
+    report = imports.ImportReport(format=fmt)
+    started = time.perf_counter()
+    try:
+        async for batch in imports.iter_import_batches(
+            request.stream(), fmt, account_id, currency, report, date_format=date_format
+        ):
+            # Each batch is its own unit of work, so its statements are counted on their own
+            with statement_scope():
+                inserted = await db.run_sync(imports.insert_batch, batch)
+                report.batches += 1
+                report.inserted += inserted
+                report.duplicates += len(batch) - inserted
+                queue_event(db, current_user.id, "import", {
+                    "account_id": account_id,
+                    "rows": report.rows,
+                    "inserted": report.inserted,
+                    "duplicates": report.duplicates,
+                    "errors": report.errors,
+                })
+                await db.commit()
+    except imports.ImportFormatError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    report.seconds = round(time.perf_counter() - started, 3)
+    return asdict(report)
+
 @router.get("/summary", response_model=dict)
-def read_account_summary(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def read_account_summary(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get generic summary stats (for now, simple sums).
     """
-    accounts = db.query(Account).filter(Account.user_id == current_user.id).all()
-    
-    net_worth = sum([acc.balance for acc in accounts if acc.account_type != AccountType.credit_card and acc.account_type != AccountType.loan])
-    # Subtract liabilities
-    liabilities = sum([abs(acc.balance) for acc in accounts if acc.account_type == AccountType.credit_card or acc.account_type == AccountType.loan])
-    # Adjust net worth (Assets - Liabilities). Note: Credit cards usually have negative balance in DB if they are debt? 
-    # Or positive balance representing debt? 
-    # Let's assume positive balance in DB = user HAS money. 
-    # If it's a credit card, usually negative balance = debt, positive = credit. 
-    # But usually APIs return absolute debt. Let's assume standard accounting:
-    # Asset > 0. Liability (Loan/CC) < 0.
-    
-    # Actually, let's keep it simple: 
-    # Sum all balances = Net Worth.
-    # Sum positive = Assets.
-    # Sum negative = Liabilities.
-    
-    net_worth = sum([acc.balance for acc in accounts])
-    assets = sum([acc.balance for acc in accounts if acc.balance > 0])
-    liabilities = sum([acc.balance for acc in accounts if acc.balance < 0])
+    accounts = (await db.scalars(select(Account).where(Account.user_id == current_user.id))).all()
+    return summarize_accounts(acc.balance for acc in accounts)
 
+def summarize_accounts(balances: Iterable[Decimal]) -> dict:
+    """
+    Net worth is the sum of all balances; assets are the positive balances and
+    liabilities (credit cards, loans) the negative ones. Also used by /dashboard/snapshot.
+    """
+    balances = list(balances)
     return {
-        "net_worth": net_worth,
-        "assets": assets,
-        "liabilities": liabilities
+        "net_worth": sum(balances),
+        "assets": sum(b for b in balances if b > 0),
+        "liabilities": sum(b for b in balances if b < 0),
     }
 
 @router.delete("/{account_id}", response_model=account_schema.Account)
-def delete_account(
+async def delete_account(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     account_id: int,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Delete an account.
     """
-    account = db.query(Account).filter(Account.id == account_id, Account.user_id == current_user.id).first()
+    account = await db.scalar(select(Account).where(Account.id == account_id, Account.user_id == current_user.id))
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
-    db.delete(account)
-    db.commit()
+    # The ledger goes in one statement per table, without loading it into the session
+    await db.execute(delete(Transaction).where(Transaction.account_id == account.id))
+    await db.execute(delete(LedgerRollup).where(LedgerRollup.account_id == account.id))
+    await db.delete(account)
+    await db.commit()
     return account
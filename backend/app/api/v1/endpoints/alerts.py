@@ -1,89 +1,102 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from datetime import date, timedelta
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 from app.api import deps
-from app.models.banking import User, Bill, Budget
-from app.schemas.bill import BillStatus
+from app.schemas.user import Principal
+from app.core.alerts import alert_payload
+from app.models.banking import Alert as AlertModel
 from pydantic import BaseModel
 
 router = APIRouter()
 
 class Alert(BaseModel):
-    id: str
+    id: int
     type: str # 'critical', 'warning', 'info', 'success'
-    category: str # 'Bill', 'Budget', 'Account'
+    category: str # 'Bill Due', 'Budget Alert', 'Account', 'Rewards'
     title: str
     message: str
-    link: str = None # Deep link to resource
-    created_at: str
+    link: Optional[str] = None # Deep link to resource
+    is_read: bool
+    created_at: datetime
+
+def _to_schema(alert: AlertModel) -> Alert:
+    return Alert(**alert_payload(alert))
+
+async def _get_alert(db: AsyncSession, alert_id: int, user_id: int) -> AlertModel:
+    alert = await db.scalar(select(AlertModel).where(AlertModel.id == alert_id, AlertModel.user_id == user_id))
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
 
 @router.get("/list", response_model=List[Alert])
-def read_alerts(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def read_alerts(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor value from the previous page"),
+    unread_only: bool = False,
 ) -> Any:
     """
-    Get aggregated alerts for bills and budgets.
+    Newest alerts first, written by the alert generator (app/core/alerts.py).
+    When more rows exist, the X-Next-Cursor response header holds the cursor for the next page.
     """
-    alerts = []
-    
-    # 1. BILL ALERTS
-    bills = db.query(Bill).filter(Bill.user_id == current_user.id, Bill.status != BillStatus.paid).all()
-    today = date.today()
-    three_days_from_now = today + timedelta(days=3)
+    stmt = select(AlertModel).where(AlertModel.user_id == current_user.id)
+    if unread_only:
+        stmt = stmt.where(AlertModel.is_read == False)
+    if cursor is not None:
+        stmt = stmt.where(AlertModel.id < cursor)
+    alerts = (await db.scalars(stmt.order_by(AlertModel.id.desc()).limit(limit + 1))).all()
+
+    if len(alerts) > limit:
+        alerts = alerts[:limit]
+        response.headers["X-Next-Cursor"] = str(alerts[-1].id)
+    return [_to_schema(alert) for alert in alerts]
+
+@router.get("/unread-count", response_model=dict)
+async def read_unread_count(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    count = await db.scalar(
+        select(func.count()).select_from(AlertModel)
+        .where(AlertModel.user_id == current_user.id, AlertModel.is_read == False)
+    )
+    return {"unread": count}
 
-    for bill in bills:
-        # Overdue
-        if bill.due_date < today:
-            days_overdue = (today - bill.due_date).days
-            alerts.append(Alert(
-                id=f"bill_overdue_{bill.id}",
-                type="critical",
-                category="Bill Due",
-                title=f"Bill Overdue: {bill.biller_name}",
-                message=f"{bill.biller_name} bill of ${bill.amount_due} is overdue by {days_overdue} days.",
-                link=f"/dashboard/bills?highlight={bill.id}",
-                created_at=str(bill.due_date)
-            ))
-        # Upcoming (Due within 3 days)
-        elif bill.due_date <= three_days_from_now:
-            days_left = (bill.due_date - today).days
-            day_str = "today" if days_left == 0 else f"in {days_left} days"
-            alerts.append(Alert(
-                id=f"bill_upcoming_{bill.id}",
-                type="warning",
-                category="Bill Due",
-                title=f"Bill Due Soon: {bill.biller_name}",
-                message=f"{bill.biller_name} bill of ${bill.amount_due} is due {day_str}.",
-                link=f"/dashboard/bills?highlight={bill.id}",
-                created_at=str(bill.due_date)
-            ))
+@router.post("/read-all", response_model=dict)
+async def mark_all_read(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    result = await db.execute(
+        update(AlertModel)
+        .where(AlertModel.user_id == current_user.id, AlertModel.is_read == False)
+        .values(is_read=True)
+    )
+    await db.commit()
+    return {"updated": result.rowcount}
 
-    # 2. BUDGET ALERTS
-    budgets = db.query(Budget).filter(Budget.user_id == current_user.id).all()
-    for budget in budgets:
-        if budget.limit_amount > 0:
-            spent_pct = (budget.spent_amount / budget.limit_amount) * 100
-            if spent_pct >= 100:
-                 alerts.append(Alert(
-                    id=f"budget_critical_{budget.id}",
-                    type="critical",
-                    category="Budget Alert",
-                    title=f"Budget Exceeded: {budget.category}",
-                    message=f"You have exceeded your {budget.category} budget of ${budget.limit_amount}.",
-                    link=f"/dashboard/budgets?highlight={budget.id}",
-                    created_at=str(today)
-                ))
-            elif spent_pct >= 80:
-                alerts.append(Alert(
-                    id=f"budget_warning_{budget.id}",
-                    type="warning",
-                    category="Budget Alert",
-                    title=f"Nearing Limit: {budget.category}",
-                    message=f"You have used {int(spent_pct)}% of your {budget.category} budget.",
-                    link=f"/dashboard/budgets?highlight={budget.id}",
-                    created_at=str(today)
-                ))
+@router.post("/{alert_id}/read", response_model=Alert)
+async def mark_read(
+    alert_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    alert = await _get_alert(db, alert_id, current_user.id)
+    alert.is_read = True
+    await db.commit()
+    return _to_schema(alert)
 
-    return alerts
+@router.post("/{alert_id}/unread", response_model=Alert)
+async def mark_unread(
+    alert_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
+) -> Any:
+    alert = await _get_alert(db, alert_id, current_user.id)
+    alert.is_read = False
+    await db.commit()
+    return _to_schema(alert)
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 # ADDED: Account and AccountType for auto-creation
 from app.models.banking import User, Account, AccountType
-from app.schemas.user import UserCreate, UserVerify, UserLogin, UserResponse, UserForgotPassword, UserResetPassword, UserUpdate
-from app.core.security import get_password_hash, verify_password, create_access_token
-from app.core.email import send_otp_email
+from app.schemas.user import UserCreate, UserVerify, UserLogin, UserResponse, UserForgotPassword, UserResetPassword, UserUpdate, Principal
+from app.core.security import hash_password, verify_and_update_password, create_access_token
+from app.core.email import queue_otp_email
 import random
 import string
 # ADDED: Decimal for balance handling
@@ -16,7 +16,7 @@ from app.api import deps
 router = APIRouter()
 
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user: User = Depends(deps.get_current_user)):
+async def read_users_me(current_user: Principal = Depends(deps.get_current_principal)):
     """
     Get current user.
     """
@@ -25,9 +25,9 @@ def read_users_me(current_user: User = Depends(deps.get_current_user)):
 
 
 @router.put("/me", response_model=UserResponse)
-def update_user_me(
+async def update_user_me(
     user_in: UserUpdate,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """
@@ -38,13 +38,15 @@ def update_user_me(
     if user_in.email is not None:
         # Check if email is taken (if changed)
         if user_in.email != current_user.email:
-            existing_user = db.query(User).filter(User.email == user_in.email).first()
+            existing_user = await db.scalar(select(User).where(User.email == user_in.email))
             if existing_user:
                 raise HTTPException(status_code=400, detail="Email already registered")
+            deps.invalidate_principal(email=current_user.email)
             current_user.email = user_in.email
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    deps.invalidate_principal(current_user.id, current_user.email)
+    # Nothing server-generated to reload (expire_on_commit=False)
     return current_user
 
 def generate_otp():
@@ -52,13 +54,14 @@ def generate_otp():
 
 # --- 1. REGISTER ---
 @router.post("/register", response_model=UserResponse)
-async def register(user_in: UserCreate, db: Session = Depends(deps.get_db)):
-    user = db.query(User).filter(User.email == user_in.email).first()
+async def register(user_in: UserCreate, db: AsyncSession = Depends(deps.get_async_db)):
+    user = await db.scalar(select(User).where(User.email == user_in.email))
     if user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     otp = generate_otp()
-    hashed_password = get_password_hash(user_in.password)
+    # bcrypt is CPU-bound; runs in the bounded hashing pool
+    hashed_password = await hash_password(user_in.password)
     
     new_user = User(
         name=user_in.name,
@@ -68,8 +71,8 @@ async def register(user_in: UserCreate, db: Session = Depends(deps.get_db)):
         is_active=False 
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # --- NEW: AUTO-CREATE BANK ACCOUNT FOR USER ---
     # Create a default "Checking" account with $1,000 bonus
@@ -82,16 +85,16 @@ async def register(user_in: UserCreate, db: Session = Depends(deps.get_db)):
         currency="USD"
     )
     db.add(new_account)
-    db.commit()
+    queue_otp_email(db, new_user.email, otp)
+    await db.commit()
     # ----------------------------------------------
     
-    await send_otp_email(new_user.email, otp)
     return new_user
 
 # --- 2. VERIFY OTP ---
 @router.post("/verify-otp")
-def verify_otp(data: UserVerify, db: Session = Depends(deps.get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
+async def verify_otp(data: UserVerify, db: AsyncSession = Depends(deps.get_async_db)):
+    user = await db.scalar(select(User).where(User.email == data.email))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
@@ -101,65 +104,75 @@ def verify_otp(data: UserVerify, db: Session = Depends(deps.get_db)):
     user.is_active = True
     # user.otp_code = None  <--- Kept commented out as per your previous logic
     
-    db.commit()
+    await db.commit()
+    deps.invalidate_principal(user.id, user.email)
     return {"message": "Account verified successfully"}
 
 # --- 3. LOGIN ---
 @router.post("/login")
-def login(user_in: UserLogin, db: Session = Depends(deps.get_db)):
-    user = db.query(User).filter(User.email == user_in.email).first()
+async def login(user_in: UserLogin, db: AsyncSession = Depends(deps.get_async_db)):
+    user = await db.scalar(select(User).where(User.email == user_in.email))
     
-    if not user or not verify_password(user_in.password, user.password):
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    valid, new_hash = await verify_and_update_password(user_in.password, user.password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
+    if new_hash:
+        # Stored hash uses an outdated cost factor
+        user.password = new_hash
+        await db.commit()
         
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Account not verified. Please verify OTP.")
         
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data={"sub": user.email, "uid": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 # --- 4. FORGOT PASSWORD ---
 @router.post("/forgot-password")
-async def forgot_password(data: UserForgotPassword, db: Session = Depends(deps.get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
+async def forgot_password(data: UserForgotPassword, db: AsyncSession = Depends(deps.get_async_db)):
+    user = await db.scalar(select(User).where(User.email == data.email))
     if not user:
         return {"message": "If this email exists, a code has been sent."}
     
     otp = generate_otp()
     user.otp_code = otp
-    db.commit()
+    queue_otp_email(db, user.email, otp)
+    await db.commit()
     
-    await send_otp_email(user.email, otp)
     return {"message": "OTP sent"}
 
 # --- 5. RESET PASSWORD ---
 @router.post("/reset-password")
-def reset_password(data: UserResetPassword, db: Session = Depends(deps.get_db)):
-    user = db.query(User).filter(User.email == data.email).first()
+async def reset_password(data: UserResetPassword, db: AsyncSession = Depends(deps.get_async_db)):
+    user = await db.scalar(select(User).where(User.email == data.email))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
     if user.otp_code != data.otp:
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
         
-    user.password = get_password_hash(data.new_password)
+    user.password = await hash_password(data.new_password)
     user.otp_code = None 
-    db.commit()
+    await db.commit()
+    deps.invalidate_principal(user.id, user.email)
     return {"message": "Password updated successfully"}
 
 # --- 6. REFRESH TOKEN ---
 @router.post("/refresh", response_model=UserResponse)
-def refresh_token(token: str, db: Session = Depends(deps.get_db)):
+async def refresh_token(token: str, db: AsyncSession = Depends(deps.get_async_db)):
     # Placeholder for refresh logic
     pass
 
 # --- 7. KYC VERIFICATION ---
 @router.post("/verify-kyc")
-async def verify_kyc(user_id: int, db: Session = Depends(deps.get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def verify_kyc(user_id: int, db: AsyncSession = Depends(deps.get_async_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     user.kyc_status = 'verified'
-    db.commit()
+    await db.commit()
+    deps.invalidate_principal(user.id, user.email)
     return {"message": "Identity verified successfully"}
\ No newline at end of file
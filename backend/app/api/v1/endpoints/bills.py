@@ -1,44 +1,47 @@
+import logging
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date, datetime
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 
 from app.api import deps
+from app.schemas.user import Principal
 from app.models.banking import Bill, User, BillStatus, Account, Transaction, TxnType, Reward
 from app.schemas import bill as bill_schema
+from app.core.alerts import alerts_for_accounts, alerts_for_bills, bill_alert_keys, resolve_alerts
+from app.core.balances import apply_balance_changes
+from app.core.bills import get_bills_summary, invalidate_bills_summary
+from app.core.categorizer import bill_category
+from app.core.events import queue_balance, queue_event, queue_points
+from app.core.idempotency import IdempotentRoute
+from app.core.ledger import record_transactions
+from app.jobs.autopay import run_autopay
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Mutating requests honour the Idempotency-Key header
+router = APIRouter(route_class=IdempotentRoute)
 
 @router.get("/all", response_model=List[bill_schema.Bill])
-def read_bills(
-    db: Session = Depends(deps.get_db),
+async def read_bills(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Retrieve all bills for current user.
+    Overdue statuses are maintained by the overdue_bills job.
     """
-    bills = db.query(Bill).filter(Bill.user_id == current_user.id).offset(skip).limit(limit).all()
-    
-    # Simple logic to auto-update overdue bills
-    updated = False
-    for bill in bills:
-        if bill.status == BillStatus.upcoming and bill.due_date < date.today():
-            bill.status = BillStatus.overdue
-            updated = True
-    if updated:
-        db.commit()
-        
-    return bills
+    return (await db.scalars(select(Bill).where(Bill.user_id == current_user.id).offset(skip).limit(limit))).all()
 
 @router.post("/", response_model=bill_schema.Bill)
-def create_bill(
+async def create_bill(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     bill_in: bill_schema.BillCreate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Create a new bill.
@@ -47,67 +50,59 @@ def create_bill(
         **bill_in.dict(),
         user_id=current_user.id
     )
+    if bill.status == BillStatus.paid:
+        bill.paid_at = datetime.utcnow()
     db.add(bill)
-    db.commit()
-    db.refresh(bill)
+    await db.flush()
+    await db.run_sync(alerts_for_bills, [bill])
+    await db.commit()
+    invalidate_bills_summary([current_user.id])
+    await db.refresh(bill)
     return bill
 
 @router.put("/{bill_id}/pay", response_model=bill_schema.Bill)
-def pay_bill(
+async def pay_bill(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     bill_id: int,
     account_id: int = None, # Make it optional but preferred
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Mark a bill as paid.
     """
-    bill = db.query(Bill).filter(Bill.id == bill_id, Bill.user_id == current_user.id).first()
+    # Conditional UPDATE: of two overlapping payments (or this and auto-pay),
+    # only the one that changes the status goes on to debit the account
+    bill = await db.scalar(
+        update(Bill)
+        .where(Bill.id == bill_id, Bill.user_id == current_user.id, Bill.status != BillStatus.paid)
+        .values(status=BillStatus.paid, paid_at=datetime.utcnow())
+        .returning(Bill)
+    )
     if not bill:
-        raise HTTPException(status_code=404, detail="Bill not found")
-    
-    # Check if already paid
-    if bill.status == BillStatus.paid:
-         return bill
-
-    bill.status = BillStatus.paid
+        bill = await db.scalar(select(Bill).where(Bill.id == bill_id, Bill.user_id == current_user.id))
+        if not bill:
+            raise HTTPException(status_code=404, detail="Bill not found")
+        # Already paid
+        return bill
     
     # Create a Transaction record for this payment
-    # Moved imports to top-level to ensure availability
-    if account_id:
-        print(f"DEBUG: paying bill with account_id={account_id}")
-
     # If account_id provided, use it. Else default.
     account = None
     if account_id:
-        account = db.query(Account).filter(Account.id == account_id, Account.user_id == current_user.id).first()
+        account = await db.scalar(select(Account).where(Account.id == account_id, Account.user_id == current_user.id))
     
     if not account:
         # Fallback to first available account
-        account = db.query(Account).filter(Account.user_id == current_user.id).first()
-        print(f"DEBUG: Fallback account found: {account.id if account else 'None'}")
+        account = await db.scalar(select(Account).where(Account.user_id == current_user.id))
+        logger.debug("Bill %s: paying from fallback account %s", bill.id, account.id if account else None)
     
     if account:
-        # Deduct balance
-        account.balance -= bill.amount_due
+        # Deduct balance in SQL; bills may overdraw, as before
+        balances = await db.run_sync(apply_balance_changes, {account.id: -bill.amount_due}, False)
         
         # Determine Category based on Biller Name
-        biller_lower = bill.biller_name.lower()
-        category = "Bills & Utilities" # Default
-        
-        if any(x in biller_lower for x in ["netflix", "prime", "spotify", "hotstar", "disney", "hbo", "movie", "cinema"]):
-            category = "Entertainment"
-        elif any(x in biller_lower for x in ["food", "zomato", "swiggy", "burger", "pizza", "restaurant"]):
-            category = "Food"
-        elif any(x in biller_lower for x in ["health", "doctor", "pharmacy", "clinic", "hospital", "gym", "fitness"]):
-            category = "Health"
-        elif any(x in biller_lower for x in ["uber", "ola", "fuel", "petrol", "transport", "bus", "train", "flight"]):
-            category = "Transport"
-        elif any(x in biller_lower for x in ["shop", "amazon", "flipkart", "myntra", "store"]):
-            category = "Shopping"
-            
-        print(f"DEBUG: Creating transaction for bill {bill.biller_name} with category {category}")
+        category = bill_category(bill.biller_name)
 
         # Create Transaction
         txn = Transaction(
@@ -121,140 +116,114 @@ def pay_bill(
             txn_date=datetime.utcnow()
         )
         db.add(txn)
+        await db.run_sync(record_transactions, [txn])
+        await db.run_sync(alerts_for_accounts, [account.id])
+        queue_balance(db, current_user.id, account.id, balances[account.id])
         
         # --- REWARDS: Award Points ---
-        try:
-            # 1 Point for every 10 Currency Units
-            points_earned = int(bill.amount_due // 10)
-            if points_earned > 0:
-                reward_entry = db.query(Reward).filter(Reward.user_id == current_user.id).first()
-                if not reward_entry:
-                    reward_entry = Reward(user_id=current_user.id, program_name="Gold Rewards", points_balance=0)
-                    db.add(reward_entry)
-                
-                reward_entry.points_balance += points_earned
-                print(f"DEBUG: Awarded {points_earned} points to user {current_user.id}")
-        except Exception as e:
-            print(f"ERROR: Failed to award points: {e}")
+        # 1 Point for every 10 Currency Units, credited in SQL so an overlapping
+        # redemption or auto-pay run is not overwritten by a stale balance
+        points_earned = int(bill.amount_due // 10)
+        if points_earned > 0:
+            # Same row auto-pay credits: the user's first rewards row
+            first_reward = select(func.min(Reward.id)).where(Reward.user_id == current_user.id).scalar_subquery()
+            points_balance = await db.scalar(
+                update(Reward)
+                .where(Reward.id == first_reward)
+                .values(points_balance=Reward.points_balance + points_earned)
+                .returning(Reward.points_balance)
+            )
+            if points_balance is None:
+                db.add(Reward(user_id=current_user.id, program_name="Gold Rewards", points_balance=points_earned))
+                points_balance = points_earned
+            queue_points(db, current_user.id, points_balance)
+            logger.debug("Awarded %d points to user %s", points_earned, current_user.id)
         # -----------------------------
 
     else:
-        print("DEBUG: No account found to pay bill!") # Critical logging
+        # Marked paid without a debit
+        logger.warning("Bill %s paid with no account to debit for user %s", bill.id, current_user.id)
     
-    db.commit()
-    db.refresh(bill)
+    await db.run_sync(resolve_alerts, [current_user.id], bill_alert_keys(bill.id))
+    queue_event(db, current_user.id, "bills", {"bill_ids": [bill.id], "status": BillStatus.paid.value})
+    await db.commit()
+    invalidate_bills_summary([current_user.id])
+    await db.refresh(bill)
     return bill
 
 @router.delete("/{bill_id}", response_model=bill_schema.Bill)
-def delete_bill(
+async def delete_bill(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     bill_id: int,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Delete a bill.
     """
-    bill = db.query(Bill).filter(Bill.id == bill_id, Bill.user_id == current_user.id).first()
+    bill = await db.scalar(select(Bill).where(Bill.id == bill_id, Bill.user_id == current_user.id))
     if not bill:
         raise HTTPException(status_code=404, detail="Bill not found")
     
-    db.delete(bill)
-    db.commit()
+    await db.delete(bill)
+    await db.run_sync(resolve_alerts, [current_user.id], bill_alert_keys(bill_id))
+    await db.commit()
+    invalidate_bills_summary([current_user.id])
     return bill
 
 @router.patch("/{bill_id}", response_model=bill_schema.Bill)
-def update_bill(
+async def update_bill(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     bill_id: int,
     bill_in: bill_schema.BillUpdate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Update a bill (e.g. toggle auto_pay).
     """
-    bill = db.query(Bill).filter(Bill.id == bill_id, Bill.user_id == current_user.id).first()
+    bill = await db.scalar(select(Bill).where(Bill.id == bill_id, Bill.user_id == current_user.id))
     if not bill:
         raise HTTPException(status_code=404, detail="Bill not found")
     
     update_data = bill_in.dict(exclude_unset=True)
+    if "status" in update_data and update_data["status"] != bill.status:
+        bill.paid_at = datetime.utcnow() if update_data["status"] == BillStatus.paid else None
     for field, value in update_data.items():
         setattr(bill, field, value)
 
     db.add(bill)
-    db.commit()
-    db.refresh(bill)
+    await db.flush()
+    if bill.status == BillStatus.paid:
+        await db.run_sync(resolve_alerts, [current_user.id], bill_alert_keys(bill.id))
+    else:
+        await db.run_sync(alerts_for_bills, [bill])
+    await db.commit()
+    invalidate_bills_summary([current_user.id])
+    await db.refresh(bill)
     return bill
 
 @router.get("/summary", response_model=dict)
-def read_bills_summary(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def read_bills_summary(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get summary stats for bills.
     """
-    bills = db.query(Bill).filter(Bill.user_id == current_user.id).all()
-    
-    total_active = len([b for b in bills if b.status != BillStatus.paid])
-    
-    upcoming = [b for b in bills if b.status == BillStatus.upcoming]
-    due_amount = sum([b.amount_due for b in upcoming])
-    upcoming_count = len(upcoming)
-    
-    overdue = [b for b in bills if b.status == BillStatus.overdue]
-    overdue_amount = sum([b.amount_due for b in overdue])
-    overdue_count = len(overdue)
-    
-    # Logic for "Paid this month" could be refined with paid_date, but using updated_at proxy or just status for now
-    paid_count = len([b for b in bills if b.status == BillStatus.paid])
-    
-    return {
-        "active_count": total_active,
-        "due_amount": due_amount,
-        "upcoming_count": upcoming_count,
-        "overdue_amount": overdue_amount,
-        "overdue_count": overdue_count,
-        "paid_count": paid_count
-    }
+    return await get_bills_summary(db, current_user.id)
 
 @router.post("/check-autopay", response_model=List[bill_schema.Bill])
-def check_autopay(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def check_autopay(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
-    Check and process bills enabled for auto-pay.
+    Pay the current user's due auto-pay bills now instead of waiting for the scheduled job.
     Returns list of bills that were just paid.
     """
-    # Get all active bills with auto_pay enabled
-    bills = db.query(Bill).filter(
-        Bill.user_id == current_user.id,
-        Bill.status == BillStatus.upcoming,
-        Bill.auto_pay == True,
-        Bill.auto_pay_time.isnot(None)
-    ).all()
-    
-    just_paid = []
-    now = datetime.now().time()
-    today = date.today()
-    
-    for bill in bills:
-        # Parse stored time string "HH:MM"
-        try:
-            pay_time = datetime.strptime(bill.auto_pay_time, "%H:%M").time()
-            
-            # If bill is due today (or past due) AND current time is past the pay_time
-            if bill.due_date <= today and now >= pay_time:
-                bill.status = BillStatus.paid
-                just_paid.append(bill)
-        except ValueError:
-            continue # Skip invalid time formats
-            
-    if just_paid:
-        db.commit()
-        for bill in just_paid:
-            db.refresh(bill)
-            
-    return just_paid
+    report = await db.run_sync(lambda session: run_autopay(session, user_id=current_user.id))
+    invalidate_bills_summary(report.user_ids)
+    if not report.paid_bill_ids:
+        return []
+    return (await db.scalars(select(Bill).where(Bill.id.in_(report.paid_bill_ids)).order_by(Bill.id))).all()
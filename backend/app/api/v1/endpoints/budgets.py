@@ -1,70 +1,84 @@
-from typing import Any, List
+from typing import Any, List, Sequence
 from decimal import Decimal
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.schemas.user import Principal
 from app.models.banking import Budget, User
 from app.schemas import budget as budget_schema
+from app.core.alerts import alerts_for_budgets, budget_alert_keys, resolve_alerts
+from app.core.budgets import ledger_spend
 from datetime import datetime
 
 router = APIRouter()
 
 @router.get("/", response_model=List[budget_schema.Budget])
-def read_budgets(
-    db: Session = Depends(deps.get_db),
+async def read_budgets(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
     month: int = datetime.now().month,
     year: int = datetime.now().year,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Retrieve budgets for the current user, defaults to current month/year.
     """
-    budgets = db.query(Budget).filter(
+    budgets = await db.scalars(select(Budget).where(
         Budget.user_id == current_user.id,
         Budget.month == month,
         Budget.year == year
-    ).offset(skip).limit(limit).all()
-    return budgets
+    ).offset(skip).limit(limit))
+    return budgets.all()
 
 @router.post("/", response_model=budget_schema.Budget)
-def create_budget(
+async def create_budget(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     budget_in: budget_schema.BudgetCreate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
-    Create a new budget.
+    Create a new budget. Spend so far is taken from the ledger; after that it is
+    kept current as transactions are recorded.
     """
     budget = Budget(
-        **budget_in.dict(),
+        **budget_in.dict(exclude={"spent_amount"}),
         user_id=current_user.id
     )
+    budget.spent_amount = await db.run_sync(
+        ledger_spend, current_user.id, budget_in.year, budget_in.month, budget_in.category
+    )
     db.add(budget)
-    db.commit()
-    db.refresh(budget)
+    await db.flush()
+    await db.run_sync(alerts_for_budgets, [budget])
+    await db.commit()
+    await db.refresh(budget)
     return budget
 
 @router.get("/summary", response_model=dict)
-def read_budget_summary(
-    db: Session = Depends(deps.get_db),
+async def read_budget_summary(
+    db: AsyncSession = Depends(deps.get_async_db),
     month: int = datetime.now().month,
     year: int = datetime.now().year,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get summary stats for budgets (Total Limit vs Total Spent).
     """
-    budgets = db.query(Budget).filter(
+    budgets = (await db.scalars(select(Budget).where(
         Budget.user_id == current_user.id,
         Budget.month == month,
         Budget.year == year
-    ).all()
-    
+    ))).all()
+    return summarize_budgets(budgets)
+
+def summarize_budgets(budgets: Sequence[Budget]) -> dict:
+    """
+    Totals of one month's budgets; also used by /dashboard/snapshot.
+    """
     total_budget = sum([b.limit_amount for b in budgets])
     total_spent = sum([b.spent_amount for b in budgets])
     
@@ -79,18 +93,19 @@ def read_budget_summary(
     }
 
 @router.delete("/{budget_id}")
-def delete_budget(
+async def delete_budget(
     budget_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Delete a budget.
     """
-    budget = db.query(Budget).filter(Budget.id == budget_id, Budget.user_id == current_user.id).first()
+    budget = await db.scalar(select(Budget).where(Budget.id == budget_id, Budget.user_id == current_user.id))
     if not budget:
          raise HTTPException(status_code=404, detail="Budget not found")
     
-    db.delete(budget)
-    db.commit()
+    await db.delete(budget)
+    await db.run_sync(resolve_alerts, [current_user.id], budget_alert_keys(budget_id))
+    await db.commit()
     return {"ok": True}
@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from app.api import deps
+from app.api.v1.endpoints.accounts import summarize_accounts
+from app.api.v1.endpoints.alerts import Alert
+from app.api.v1.endpoints.budgets import summarize_budgets
+from app.api.v1.endpoints.insights import BurnRate, burn_rate
+from app.core.alerts import alert_payload
+from app.core.bills import get_bills_summary
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.banking import Account, Alert as AlertModel, Bill, BillStatus, Budget, Goal, Reward, Transaction
+from app.schemas import account as account_schema, bill as bill_schema, budget as budget_schema, goal as goal_schema
+from app.schemas.transaction import TransactionResponse
+from app.schemas.user import Principal
+
+router = APIRouter()
+
+class DashboardSnapshot(BaseModel):
+    accounts: List[account_schema.Account]
+    accounts_summary: dict # as GET /accounts/summary
+    recent_transactions: List[TransactionResponse]
+    budgets: List[budget_schema.Budget] # current month
+    budgets_summary: dict # as GET /budgets/summary
+    upcoming_bills: List[bill_schema.Bill] # unpaid, soonest due first
+    bills_summary: dict # as GET /bills/summary
+    burn_rate: BurnRate
+    goals: List[goal_schema.Goal]
+    rewards: dict # as GET /rewards/balance
+    alerts: List[Alert]
+    unread_alerts: int
+
+# Each section below reads on its own session so the sections can run concurrently.
+
+async def _budgets(db: AsyncSession, user_id: int, month: int, year: int) -> dict:
+    budgets = (await db.scalars(select(Budget).where(
+        Budget.user_id == user_id, Budget.month == month, Budget.year == year
+    ))).all()
+    return {"budgets": budgets, "budgets_summary": summarize_budgets(budgets)}
+
+async def _bills(db: AsyncSession, user_id: int, limit: int) -> dict:
+    upcoming = (await db.scalars(select(Bill).where(
+        Bill.user_id == user_id, Bill.status != BillStatus.paid
+    ).order_by(Bill.due_date, Bill.id).limit(limit))).all()
+    return {"upcoming_bills": upcoming, "bills_summary": await get_bills_summary(db, user_id)}
+
+async def _goals(db: AsyncSession, user_id: int) -> dict:
+    return {"goals": (await db.scalars(select(Goal).where(Goal.user_id == user_id).limit(100))).all()}
+
+async def _rewards(db: AsyncSession, user_id: int) -> dict:
+    # Read-only: GET /rewards/balance creates the row on first use
+    reward = await db.scalar(select(Reward).where(Reward.user_id == user_id))
+    return {"rewards": {
+        "points_balance": reward.points_balance if reward else 0,
+        "program_name": reward.program_name if reward else "Gold Rewards",
+    }}
+
+async def _alerts(db: AsyncSession, user_id: int, limit: int) -> dict:
+    alerts = (await db.scalars(select(AlertModel).where(
+        AlertModel.user_id == user_id
+    ).order_by(AlertModel.id.desc()).limit(limit))).all()
+    unread = await db.scalar(select(func.count(AlertModel.id)).where(
+        AlertModel.user_id == user_id, AlertModel.is_read == False
+    ))
+    return {"alerts": [Alert(**alert_payload(alert)) for alert in alerts], "unread_alerts": unread}
+
+async def _transactions(db: AsyncSession, account_ids: List[int], limit: int) -> dict:
+    if not account_ids:
+        return {"recent_transactions": []}
+    transactions = (await db.scalars(select(Transaction).where(
+        Transaction.account_id.in_(account_ids)
+    ).order_by(Transaction.txn_date.desc(), Transaction.id.desc()).limit(limit))).all()
+    return {"recent_transactions": transactions}
+
+async def _burn_rate(db: AsyncSession, accounts: List[Account]) -> dict:
+    return {"burn_rate": await burn_rate(db, accounts)}
+
+async def _gather(sections: List[Callable[[AsyncSession], Awaitable[dict]]]) -> dict:
+    """
+    Run sections concurrently, each on a session of its own, at most
+    DASHBOARD_MAX_CONCURRENCY at a time so one snapshot cannot drain the pool.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.DASHBOARD_MAX_CONCURRENCY))
+
+    async def run(section) -> dict:
+        async with semaphore:
+            async with AsyncSessionLocal() as db:
+                return await section(db)
+
+    result = {}
+    for part in await asyncio.gather(*(run(section) for section in sections)):
+        result.update(part)
+    return result
+
+@router.get("/snapshot", response_model=DashboardSnapshot)
+async def read_snapshot(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
+    limit: int = Query(5, ge=1, le=50, description="Rows per list section (transactions, bills, alerts)"),
+) -> Any:
+    """
+    Everything the dashboard shows, in one request instead of one per widget.
+    Authenticates and loads the accounts once, then runs the independent
+    sections concurrently.
+    """
+    user_id = current_user.id
+    accounts = (await db.scalars(select(Account).where(Account.user_id == user_id).limit(100))).all()
+    account_ids = [account.id for account in accounts]
+    now = datetime.now()
+    # Nothing to write: ending the transaction hands the connection back while the sections run
+    await db.commit()
+
+    snapshot = await _gather([
+        lambda s: _transactions(s, account_ids, limit),
+        lambda s: _burn_rate(s, accounts),
+        lambda s: _budgets(s, user_id, now.month, now.year),
+        lambda s: _bills(s, user_id, limit),
+        lambda s: _goals(s, user_id),
+        lambda s: _rewards(s, user_id),
+        lambda s: _alerts(s, user_id, limit),
+    ])
+    return {
+        "accounts": accounts,
+        "accounts_summary": summarize_accounts(account.balance for account in accounts),
+        **snapshot,
+    }
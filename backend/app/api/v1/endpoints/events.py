@@ -0,0 +1,35 @@
+from typing import AsyncIterator
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+
+from app.api import deps
+from app.core.config import settings
+from app.core.events import broker, format_sse, make_event
+from app.schemas.user import Principal
+
+router = APIRouter()
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_user: Principal = Depends(deps.get_stream_principal),
+) -> StreamingResponse:
+    """
+    Server-sent events for the current user: balance, points, alert and bill deltas.
+    Send the token as a Bearer header or ?access_token= (EventSource cannot set headers).
+    Clients should load their snapshot after the "ready" event and then apply deltas.
+    """
+    async def event_source() -> AsyncIterator[str]:
+        async with broker.subscribe(current_user.id) as subscription:
+            yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+            yield format_sse(make_event("ready", {"user_id": current_user.id}))
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+                # Comment lines keep proxies from closing an idle stream
+                yield format_sse(event) if event is not None else ": keep-alive\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
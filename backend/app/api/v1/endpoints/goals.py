@@ -1,32 +1,34 @@
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
+from app.schemas.user import Principal
 from app.models.banking import Goal, User
 from app.schemas import goal as goal_schema
 
 router = APIRouter()
 
 @router.get("/", response_model=List[goal_schema.Goal])
-def read_goals(
-    db: Session = Depends(deps.get_db),
+async def read_goals(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Retrieve savings goals for the current user.
     """
-    goals = db.query(Goal).filter(Goal.user_id == current_user.id).offset(skip).limit(limit).all()
-    return goals
+    goals = await db.scalars(select(Goal).where(Goal.user_id == current_user.id).offset(skip).limit(limit))
+    return goals.all()
 
 @router.post("/", response_model=goal_schema.Goal)
-def create_goal(
+async def create_goal(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     goal_in: goal_schema.GoalCreate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Create a new savings goal.
@@ -36,22 +38,22 @@ def create_goal(
         user_id=current_user.id
     )
     db.add(goal)
-    db.commit()
-    db.refresh(goal)
+    await db.commit()
+    await db.refresh(goal)
     return goal
 
 @router.put("/{goal_id}", response_model=goal_schema.Goal)
-def update_goal(
+async def update_goal(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     goal_id: int,
     goal_in: goal_schema.GoalUpdate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Update a goal (e.g. add funds).
     """
-    goal = db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == current_user.id).first()
+    goal = await db.scalar(select(Goal).where(Goal.id == goal_id, Goal.user_id == current_user.id))
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
     
@@ -60,6 +62,6 @@ def update_goal(
         setattr(goal, field, value)
     
     db.add(goal)
-    db.commit()
-    db.refresh(goal)
+    await db.commit()
+    await db.refresh(goal)
     return goal
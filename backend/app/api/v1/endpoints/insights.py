@@ -1,10 +1,12 @@
 from typing import Any, List, Dict
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
-from datetime import date, timedelta, datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, select
+from datetime import date, timedelta
 from app.api import deps
-from app.models.banking import User, Transaction, Account, TxnType
+from app.schemas.user import Principal
+from app.models.banking import Transaction, Account, TxnType, LedgerRollup
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -25,17 +27,92 @@ class BurnRate(BaseModel):
     status: str # 'Good', 'Warning', 'Critical'
     runway_months: float
 
+# The aggregation helpers below take a sync Session so benchmarks and scripts can
+# reuse them; endpoints run them on their AsyncSession through db.run_sync().
+
+async def _account_ids(db: AsyncSession, user_id: int) -> List[int]:
+    return (await db.scalars(select(Account.id).where(Account.user_id == user_id))).all()
+
+def _months_from(start_date: date):
+    """
+    Filter for rollup rows in or after start_date's month.
+    """
+    return or_(
+        LedgerRollup.year > start_date.year,
+        and_(LedgerRollup.year == start_date.year, LedgerRollup.month >= start_date.month)
+    )
+
+def _next_month(d: date) -> date:
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+
+def _debit_totals(db: Session, account_ids: List[int], start_date: date, rollup_col, raw_col,
+                  outflow_only: bool = True) -> Dict[Any, float]:
+    """
+    Debit totals since start_date, grouped by rollup_col / raw_col.
+    Whole months come from ledger rollups; only the partial first month
+    (start_date up to the end of its month) is read from raw transactions.
+    outflow_only counts negative debits only, so refunds and reversals booked
+    as positive debits do not reduce spending; otherwise signed debits are
+    summed before taking the absolute value.
+    """
+    totals = {}
+    full_months_start = _next_month(start_date)
+
+    rollup_amount = LedgerRollup.outflow_amount if outflow_only else LedgerRollup.total_amount
+    rollup_rows = db.query(rollup_col, func.sum(rollup_amount)).filter(
+        LedgerRollup.account_id.in_(account_ids),
+        LedgerRollup.txn_type == TxnType.debit,
+        _months_from(full_months_start)
+    ).group_by(rollup_col).all()
+
+    raw_query = db.query(raw_col, func.sum(Transaction.amount)).filter(
+        Transaction.account_id.in_(account_ids),
+        Transaction.txn_type == TxnType.debit,
+        Transaction.txn_date >= start_date,
+        Transaction.txn_date < full_months_start
+    )
+    if outflow_only:
+        raw_query = raw_query.filter(Transaction.amount < 0)
+    raw_rows = raw_query.group_by(raw_col).all()
+
+    for key, amount in list(rollup_rows) + list(raw_rows):
+        totals[key] = totals.get(key, 0.0) + float(amount or 0.0)
+    return {key: abs(amount) for key, amount in totals.items()}
+
+def cash_flow_totals_rollup(db: Session, account_ids: List[int], start_date: date) -> Dict[str, Dict[str, float]]:
+    """
+    Income/expense per "YYYY-MM" read from ledger rollups (month granularity).
+    Income is positive credits, expense negative debits, as per transaction.
+    """
+    rows = db.query(
+        LedgerRollup.year, LedgerRollup.month, LedgerRollup.txn_type,
+        func.sum(LedgerRollup.total_amount), func.sum(LedgerRollup.outflow_amount)
+    ).filter(
+        LedgerRollup.account_id.in_(account_ids),
+        _months_from(start_date)
+    ).group_by(LedgerRollup.year, LedgerRollup.month, LedgerRollup.txn_type).all()
+
+    totals = {}
+    for year, month, txn_type, amount, outflow in rows:
+        entry = totals.setdefault(f"{year:04d}-{month:02d}", {"income": 0.0, "expense": 0.0})
+        outflow = float(outflow or 0.0)
+        if txn_type == TxnType.credit:
+            entry["income"] += float(amount or 0.0) - outflow
+        elif txn_type == TxnType.debit:
+            entry["expense"] += abs(outflow)
+    return totals
+
 @router.get("/cash-flow", response_model=List[CashFlowPoint])
-def get_cash_flow(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def get_cash_flow(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
     months: int = 6
 ) -> Any:
     """
     Get monthly income vs expense for the last N months.
     """
     # 0. Get user accounts
-    account_ids = [acc.id for acc in current_user.accounts]
+    account_ids = await _account_ids(db, current_user.id)
     if not account_ids:
         return []
 
@@ -43,38 +120,20 @@ def get_cash_flow(
     today = date.today()
     start_date = today.replace(day=1) - timedelta(days=30*months) # Approx
 
-    # 2. Query Transactions
-    # We need to aggregate by month.
-    # Postgres/SQLite diffs make this tricky in pure ORM without dialect specific functions.
-    # We will fetch raw and process in python for simplicity and DB agnostic behavior for this scale.
-    
-    txns = db.query(Transaction).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.txn_date >= start_date
-    ).all()
+    # 2. Monthly totals from the ledger rollups
+    totals = await db.run_sync(cash_flow_totals_rollup, account_ids, start_date)
 
-    # 3. Process
+    # 3. Initialize last N months
     monthly_data = {} # "YYYY-MM" -> {income: 0, expense: 0}
-
-    # Initialize last N months
     for i in range(months):
         d = today.replace(day=1) - timedelta(days=30*i)
         key = d.strftime("%Y-%m")
         monthly_data[key] = {"income": 0.0, "expense": 0.0, "month": d.strftime("%b")}
 
-    for t in txns:
-        # Assuming t.txn_date is date or datetime
-        t_date = t.txn_date if isinstance(t.txn_date, date) else t.txn_date.date()
-        key = t_date.strftime("%Y-%m")
-        
+    for key, data in totals.items():
         if key in monthly_data:
-            amount = float(t.amount or 0.0) # Handle NULL amount and convert to float
-            if amount > 0: 
-                if t.txn_type == TxnType.credit:
-                    monthly_data[key]["income"] += amount
-            else:
-                 if t.txn_type == TxnType.debit:
-                    monthly_data[key]["expense"] += abs(amount)
+            monthly_data[key]["income"] += data["income"]
+            monthly_data[key]["expense"] += data["expense"]
 
     # 4. Format
     result = []
@@ -90,38 +149,26 @@ def get_cash_flow(
     return result
 
 @router.get("/top-merchants", response_model=List[TopMerchant])
-def get_top_merchants(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def get_top_merchants(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
     limit: int = 5
 ) -> Any:
     """
     Get top merchants by spending (Debits).
     """
-    account_ids = [acc.id for acc in current_user.accounts]
+    account_ids = await _account_ids(db, current_user.id)
     if not account_ids:
         return []
 
-    # Fetch all debits
-    # Exclude "Transfer" category if internal? For now checking category != "Transfer"
-    txns = db.query(Transaction).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.txn_type == TxnType.debit,
-        Transaction.amount < 0
-    ).all()
-
-    merchant_spending = {}
-    total_spent = 0.0
-
-    for t in txns:
-        # Clean merchant name
-        name = t.merchant or t.description or "Unknown"
-        amount = abs(float(t.amount or 0.0))
-        
-        if name not in merchant_spending:
-            merchant_spending[name] = 0.0
-        merchant_spending[name] += amount
-        total_spent += amount
+    # All-time outgoing debit totals per merchant, read from the ledger rollups
+    rows = (await db.execute(select(LedgerRollup.merchant, func.sum(LedgerRollup.outflow_amount)).where(
+        LedgerRollup.account_id.in_(account_ids),
+        LedgerRollup.txn_type == TxnType.debit
+    ).group_by(LedgerRollup.merchant))).all()
+
+    merchant_spending = {name: abs(float(amount or 0.0)) for name, amount in rows}
+    total_spent = sum(merchant_spending.values())
 
     if total_spent == 0:
         return []
@@ -141,43 +188,46 @@ def get_top_merchants(
     return result
 
 @router.get("/burn-rate", response_model=BurnRate)
-def get_burn_rate(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user)
+async def get_burn_rate(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal)
 ) -> Any:
     """
     Calculate burn rate (Avg monthly expense) and Runway (Total Cash / Burn Rate).
     """
-    account_ids = [acc.id for acc in current_user.accounts]
+    accounts = (await db.execute(select(Account.id, Account.balance).where(Account.user_id == current_user.id))).all()
+    return await burn_rate(db, accounts)
+
+async def burn_rate(db: AsyncSession, accounts) -> BurnRate:
+    """
+    Burn rate of the given accounts (anything with .id and .balance); also used
+    by /dashboard/snapshot, which already has the accounts loaded.
+    """
+    account_ids = [acc.id for acc in accounts]
     if not account_ids:
         return BurnRate(current_burn_rate=0, average_burn_rate=0, status="Good", runway_months=999)
 
     # 1. Calculate Total Balance
-    total_balance = sum(float(acc.balance or 0.0) for acc in current_user.accounts)
+    total_balance = sum(float(acc.balance or 0.0) for acc in accounts)
 
     # 2. Calculate Avg Monthly Expense (Last 3 months)
     today = date.today()
     three_months_ago = today - timedelta(days=90)
     
-    expenses_3mo = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.txn_type == TxnType.debit,
-        Transaction.txn_date >= three_months_ago
-    ).scalar() or 0.0
-    expenses_3mo = float(expenses_3mo)
-    
-    expenses_3mo = abs(expenses_3mo)
+    # All debits, refunds included, as the burn rate always did
+    expenses_3mo = sum((await db.run_sync(
+        _debit_totals, account_ids, three_months_ago, LedgerRollup.txn_type, Transaction.txn_type, False
+    )).values())
     avg_burn_rate = expenses_3mo / 3.0 if expenses_3mo > 0 else 0.0
 
     # Current month burn rate (just for comparison, maybe projected)
-    start_of_month = today.replace(day=1)
-    current_month_expense = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.txn_type == TxnType.debit,
-        Transaction.txn_date >= start_of_month
-    ).scalar() or 0.0
-    current_month_expense = float(current_month_expense)
-    current_month_expense = abs(current_month_expense)
+    current_month_expense = await db.scalar(select(func.sum(LedgerRollup.total_amount)).where(
+        LedgerRollup.account_id.in_(account_ids),
+        LedgerRollup.txn_type == TxnType.debit,
+        LedgerRollup.year == today.year,
+        LedgerRollup.month == today.month
+    )) or 0.0
+    current_month_expense = abs(float(current_month_expense))
 
     # Runway
     runway = 0.0
@@ -207,41 +257,24 @@ class CategoryExpense(BaseModel):
     percentage: float
 
 @router.get("/expense-by-category", response_model=List[CategoryExpense])
-def get_expense_by_category(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def get_expense_by_category(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
     months: int = 3
 ) -> Any:
     """
     Get spending breakdown by category for the last N months.
     """
-    account_ids = [acc.id for acc in current_user.accounts]
+    account_ids = await _account_ids(db, current_user.id)
     if not account_ids:
         return []
 
     today = date.today()
     start_date = today - timedelta(days=30*months)
 
-    txns = db.query(Transaction).filter(
-        Transaction.account_id.in_(account_ids),
-        Transaction.txn_type == TxnType.debit,
-        Transaction.amount < 0,
-        Transaction.txn_date >= start_date
-    ).all()
-
-    category_spending = {}
-    total_spent = 0.0
-
-    for t in txns:
-        # Check if category field exists (It does in model, but might be empty)
-        # Fallback to 'Uncategorized' if null
-        cat = t.category or "Uncategorized"
-        amount = abs(float(t.amount or 0.0))
-        
-        if cat not in category_spending:
-            category_spending[cat] = 0.0
-        category_spending[cat] += amount
-        total_spent += amount
+    raw_category = func.coalesce(func.nullif(Transaction.category, ""), "Uncategorized")
+    category_spending = await db.run_sync(_debit_totals, account_ids, start_date, LedgerRollup.category, raw_category)
+    total_spent = sum(category_spending.values())
 
     if total_spent == 0:
         return []
@@ -0,0 +1,19 @@
+from typing import Any
+from fastapi import APIRouter, Depends
+
+from app.api import deps
+
+from app.db.session import async_pool_metrics, sync_pool_metrics
+
+# Operators only: every route needs the X-Internal-Token header (INTERNAL_API_TOKEN)
+router = APIRouter(dependencies=[Depends(deps.require_internal_token)])
+
+@router.get("/db-pool", response_model=dict)
+async def read_db_pool_metrics() -> Any:
+    """
+    Connection-pool saturation for the API (async) and jobs/scripts (sync) engines.
+    """
+    return {
+        "async": async_pool_metrics.snapshot(),
+        "sync": sync_pool_metrics.snapshot(),
+    }
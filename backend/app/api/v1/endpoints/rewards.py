@@ -1,15 +1,25 @@
 from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from pydantic import BaseModel
 
 from app.api import deps
+from app.schemas.user import Principal
+from app.core.alerts import queue_alert_events
+from app.core.balances import apply_balance_changes
+from app.core.email import queue_email
+from app.core.events import queue_balance, queue_points
+from app.core.idempotency import IdempotentRoute
+from app.core.ledger import record_transactions
 
 from app.models.banking import User, Reward, Account, Transaction, TxnType, Alert, AlertType, RedeemedReward
 import random
+from decimal import Decimal
 
-router = APIRouter()
+# Mutating requests honour the Idempotency-Key header
+router = APIRouter(route_class=IdempotentRoute)
 
 class RedemptionRequest(BaseModel):
     item_id: str
@@ -29,14 +39,14 @@ class RedeemedRewardSchema(BaseModel):
 
 
 @router.get("/balance")
-def get_balance(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def get_balance(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get current user's reward point balance.
     """
-    reward_entry = db.query(Reward).filter(Reward.user_id == current_user.id).first()
+    reward_entry = await db.scalar(select(Reward).where(Reward.user_id == current_user.id))
     if not reward_entry:
         # Create if not exists
         reward_entry = Reward(
@@ -45,8 +55,8 @@ def get_balance(
             points_balance=0
         )
         db.add(reward_entry)
-        db.commit()
-        db.refresh(reward_entry)
+        await db.commit()
+        await db.refresh(reward_entry)
     
     return {
         "points_balance": reward_entry.points_balance,
@@ -54,8 +64,8 @@ def get_balance(
     }
 
 @router.get("/exchange-rate")
-def get_exchange_rate(
-    current_user: User = Depends(deps.get_current_user),
+async def get_exchange_rate(
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get current simulates points-to-currency exchange rate.
@@ -72,45 +82,53 @@ def get_exchange_rate(
     }
 
 @router.get("/my-rewards", response_model=List[RedeemedRewardSchema])
-def get_my_rewards(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def get_my_rewards(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Get all redeemed rewards for the current user.
     """
-    rewards = db.query(RedeemedReward).filter(
+    rewards = await db.scalars(select(RedeemedReward).where(
         RedeemedReward.user_id == current_user.id
-    ).order_by(RedeemedReward.redeemed_at.desc()).all()
+    ).order_by(RedeemedReward.redeemed_at.desc()))
     
-    return rewards
+    return rewards.all()
 
 @router.post("/redeem")
 async def redeem_points(
     request: RedemptionRequest,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Redeem points for an item.
     """
-    reward_entry = db.query(Reward).filter(Reward.user_id == current_user.id).first()
-    if not reward_entry:
-        raise HTTPException(status_code=404, detail="Rewards account not found")
-        
-    if reward_entry.points_balance < request.cost:
+    if request.cost <= 0:
+        raise HTTPException(status_code=400, detail="Cost must be positive")
+
+    # Deduct points with a conditional UPDATE, so two concurrent redemptions
+    # cannot both spend the same points. Like pay_bill, the user's first rewards row.
+    first_reward = select(func.min(Reward.id)).where(Reward.user_id == current_user.id).scalar_subquery()
+    points_balance = await db.scalar(
+        update(Reward)
+        .where(Reward.id == first_reward, Reward.points_balance >= request.cost)
+        .values(points_balance=Reward.points_balance - request.cost, last_updated=datetime.utcnow())
+        .returning(Reward.points_balance),
+        execution_options={"synchronize_session": False},
+    )
+    if points_balance is None:
+        if not await db.scalar(select(Reward.id).where(Reward.user_id == current_user.id).limit(1)):
+            raise HTTPException(status_code=404, detail="Rewards account not found")
         raise HTTPException(status_code=400, detail="Insufficient points balance")
-        
-    # Deduct points
-    reward_entry.points_balance -= request.cost
-    reward_entry.last_updated = datetime.utcnow()
+    queue_points(db, current_user.id, points_balance)
 
     # --- CASHBACK LOGIC ---
     if request.type == 'cashback':
         # 1. Fetch user's primary account (Checking preferred)
-        account = db.query(Account).filter(
+        account = await db.scalar(select(Account).where(
             Account.user_id == current_user.id
-        ).order_by(Account.balance.desc()).first()
+        ).order_by(Account.balance.desc()))
         
         if not account:
              # Fallback if no account, just deduct points (or raise error? Let's credit if exists)
@@ -147,7 +165,9 @@ async def redeem_points(
              credit_amount = request.cost * 0.10 # Fallback rate
 
         # 3. Credit Account
-        account.balance += credit_amount
+        credit_amount = Decimal(str(credit_amount))
+        balances = await db.run_sync(apply_balance_changes, {account.id: credit_amount})
+        queue_balance(db, current_user.id, account.id, balances[account.id])
         
         # 4. Create Transaction
         txn = Transaction(
@@ -161,6 +181,7 @@ async def redeem_points(
             txn_date=datetime.utcnow()
         )
         db.add(txn)
+        await db.run_sync(record_transactions, [txn])
     
     else:
         # --- GIFT CARD / OTHER REWARDS BASKET LOGIC ---
@@ -186,33 +207,33 @@ async def redeem_points(
     new_alert = Alert(
         user_id=current_user.id,
         type=AlertType.reward_redeemed, 
-        message=f"You successfully redeemed {request.item_name} for {request.cost} points!" 
+        severity="success",
+        category="Rewards",
+        title=f"Reward Redeemed: {request.item_name}",
+        message=f"You successfully redeemed {request.item_name} for {request.cost} points!",
+        link="/dashboard/rewards",
     )
     db.add(new_alert)
+    await db.flush()
+    queue_alert_events(db, [new_alert])
 
     # --- EMAIL NOTIFICATION ---
-    try:
-        from app.core.email import send_general_email
-        
-        email_subject = "Reward Redemption Successful"
-        email_body = f"""
-        <h3>Congratulations, {current_user.name}!</h3>
-        <p>You have successfully redeemed <strong>{request.item_name}</strong>.</p>
-        <p>Points Used: {request.cost}</p>
-        <p>Remaining Balance: {reward_entry.points_balance}</p>
-        <br>
-        <p>Thank you for banking with us!</p>
-        """
-        
-        await send_general_email(current_user.email, email_subject, email_body)
-
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+    # Queued in this transaction and delivered by the outbox worker
+    email_subject = "Reward Redemption Successful"
+    email_body = f"""
+    <h3>Congratulations, {current_user.name}!</h3>
+    <p>You have successfully redeemed <strong>{request.item_name}</strong>.</p>
+    <p>Points Used: {request.cost}</p>
+    <p>Remaining Balance: {points_balance}</p>
+    <br>
+    <p>Thank you for banking with us!</p>
+    """
+    queue_email(db, current_user.email, email_subject, email_body)
 
-    db.commit()
+    await db.commit()
     
     return {
         "success": True, 
         "message": f"Successfully redeemed {request.item_name}",
-        "new_balance": reward_entry.points_balance
+        "new_balance": points_balance
     }
@@ -1,37 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import base64
+import csv
+import io
+import json
+import logging
+from app.db.session import AsyncSessionLocal
 from app.models.banking import User, Account, Transaction, TxnType
-from app.schemas.transaction import TransactionCreate, TransactionResponse
+from app.schemas.transaction import (
+    BatchTransferRequest, BatchTransferResponse, BatchTransferResult, TransactionCreate, TransactionResponse,
+)
+from app.core.alerts import alerts_for_accounts
+from app.core.balances import InsufficientFunds, apply_balance_changes
+from app.core.categorizer import TRANSFER_CATEGORY, categorize
+from app.core.config import settings
+from app.core.events import queue_balance
+from app.core.idempotency import IdempotentRoute
+from app.core.ledger import record_transactions
 
 # --- CHANGE IS HERE ---
-# Import get_current_user and get_db from deps, NOT security
-from app.api.deps import get_current_user, get_db 
+# Import get_current_principal and get_async_db from deps, NOT security
+from app.api.deps import get_current_principal, get_async_db
+from app.schemas.user import Principal
 # ----------------------
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Mutating requests honour the Idempotency-Key header
+router = APIRouter(route_class=IdempotentRoute)
 
 @router.post("/send", response_model=TransactionResponse)
-def send_money(
+async def send_money(
     txn_in: TransactionCreate, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
+    if txn_in.amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive.")
+
     # 1. Find Sender's Account (Prefer Checking, then Savings)
-    sender_account = db.query(Account).filter(
+    sender_account = await db.scalar(select(Account).where(
         Account.user_id == current_user.id
-    ).order_by(Account.balance.desc()).first()
+    ).order_by(Account.balance.desc()))
     
     if not sender_account:
         raise HTTPException(status_code=400, detail="No active account found to send money from.")
 
-    # 2. Check Balance
+    # 2. Check Balance (fast path; the debit below re-checks atomically)
     if sender_account.balance < txn_in.amount:
         raise HTTPException(status_code=400, detail="Insufficient funds.")
 
     # 3. Find Recipient
-    recipient = db.query(User).filter(User.email == txn_in.recipient_email).first()
+    recipient = await db.scalar(select(User).where(User.email == txn_in.recipient_email))
     if not recipient:
         raise HTTPException(status_code=404, detail="Recipient not found.")
     
@@ -39,22 +64,26 @@ def send_money(
         raise HTTPException(status_code=400, detail="You cannot send money to yourself.")
 
     # 4. Find Recipient's Account
-    recipient_account = db.query(Account).filter(
+    recipient_account = await db.scalar(select(Account).where(
         Account.user_id == recipient.id
-    ).first()
+    ))
     
     if not recipient_account:
         raise HTTPException(status_code=400, detail="Recipient has no active bank account.")
 
     # 5. EXECUTE TRANSFER (Atomic Transaction)
     try:
-        # Deduct from Sender
-        sender_account.balance -= txn_in.amount
-        
+        # Both balances move in SQL, in account id order; the debit only
+        # applies while the sender still has the funds
+        balances = await db.run_sync(apply_balance_changes, {
+            sender_account.id: -txn_in.amount,
+            recipient_account.id: txn_in.amount,
+        })
+
         sender_txn = Transaction(
             account_id=sender_account.id,
             description=f"Transfer to {recipient.name}",
-            category="Transfer",
+            category=categorize(txn_in.description, TRANSFER_CATEGORY),
             amount=-txn_in.amount,
             currency=sender_account.currency,
             txn_type=TxnType.debit,
@@ -62,9 +91,6 @@ def send_money(
         )
         db.add(sender_txn)
 
-        # Add to Recipient
-        recipient_account.balance += txn_in.amount
-        
         recipient_txn = Transaction(
             account_id=recipient_account.id,
             description=f"Received from {current_user.name}",
@@ -75,23 +101,268 @@ def send_money(
             merchant=current_user.name
         )
         db.add(recipient_txn)
+
+        await db.run_sync(record_transactions, [sender_txn, recipient_txn])
+        await db.run_sync(alerts_for_accounts, [sender_account.id])
+        queue_balance(db, current_user.id, sender_account.id, balances[sender_account.id])
+        queue_balance(db, recipient.id, recipient_account.id, balances[recipient_account.id])
         
-        db.commit()
-        db.refresh(sender_txn)
+        await db.commit()
+        await db.refresh(sender_txn)
         return sender_txn
 
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+    except InsufficientFunds:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Insufficient funds.")
+    except Exception:
+        # Driver and DB errors stay in the log, not the response. Logged
+        # before the rollback, which expires sender_account
+        logger.exception("Transfer from account %s failed", sender_account.id)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Transfer failed, please retry.")
+
+@router.post("/batch", response_model=BatchTransferResponse)
+async def send_batch(
+    batch: BatchTransferRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Send many transfers from the current user's account in one DB transaction.
+    Items with an unknown recipient or a bad amount are rejected individually;
+    the rest are sent together, or not at all if their total exceeds the balance.
+    """
+    if len(batch.items) > settings.TRANSFER_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.TRANSFER_BATCH_MAX_ITEMS} transfers per batch.")
+
+    sender_account = await db.scalar(select(Account).where(
+        Account.user_id == current_user.id
+    ).order_by(Account.balance.desc()))
+    if not sender_account:
+        raise HTTPException(status_code=400, detail="No active account found to send money from.")
+
+    # All recipients and their first account in one query
+    emails = {item.recipient_email for item in batch.items}
+    first_account = (
+        select(Account.user_id, func.min(Account.id).label("account_id"))
+        .group_by(Account.user_id)
+        .subquery()
+    )
+    recipients = {
+        row.email: row for row in await db.execute(
+            select(User.id, User.email, User.name, Account.id.label("account_id"), Account.currency)
+            .outerjoin(first_account, first_account.c.user_id == User.id)
+            .outerjoin(Account, Account.id == first_account.c.account_id)
+            .where(User.email.in_(emails))
+        )
+    }
+
+    results = []
+    accepted = []
+    for index, item in enumerate(batch.items):
+        recipient = recipients.get(item.recipient_email)
+        result = BatchTransferResult(index=index, recipient_email=item.recipient_email, amount=item.amount, status="rejected")
+        if item.amount <= 0:
+            result.detail = "Amount must be positive."
+        elif recipient is None:
+            result.detail = "Recipient not found."
+        elif recipient.id == current_user.id:
+            result.detail = "You cannot send money to yourself."
+        elif recipient.account_id is None:
+            result.detail = "Recipient has no active bank account."
+        else:
+            result.status = "sent"
+            accepted.append((result, item, recipient))
+        results.append(result)
+
+    total = sum((item.amount for _, item, _ in accepted), Decimal("0"))
+    if not accepted:
+        return BatchTransferResponse(sent=0, rejected=len(results), total_amount=total, results=results)
+    if sender_account.balance < total:
+        raise HTTPException(status_code=400, detail=f"Insufficient funds for the batch total of {total}.")
+
+    changes = {sender_account.id: -total}
+    for _, item, recipient in accepted:
+        changes[recipient.account_id] = changes.get(recipient.account_id, Decimal("0")) + item.amount
+
+    try:
+        balances = await db.run_sync(apply_balance_changes, changes)
+
+        txn_date = datetime.utcnow()
+        rows = []
+        for _, item, recipient in accepted:
+            rows.append({
+                "account_id": sender_account.id,
+                "description": item.description or f"Transfer to {recipient.name}",
+                "category": categorize(item.description, TRANSFER_CATEGORY),
+                "amount": -item.amount,
+                "currency": sender_account.currency,
+                "txn_type": TxnType.debit,
+                "merchant": recipient.name,
+                "txn_date": txn_date,
+            })
+            rows.append({
+                "account_id": recipient.account_id,
+                "description": f"Received from {current_user.name}",
+                "category": "Transfer",
+                "amount": item.amount,
+                "currency": recipient.currency,
+                "txn_type": TxnType.credit,
+                "merchant": current_user.name,
+                "txn_date": txn_date,
+            })
+        # One executemany; ids come back in row order
+        conn = await db.connection()
+        txn_ids = (await conn.execute(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True), rows
+        )).scalars().all()
+        for (result, _, _), debit_id in zip(accepted, txn_ids[::2]):
+            result.transaction_id = debit_id
+
+        await db.run_sync(record_transactions, rows)
+        await db.run_sync(alerts_for_accounts, [sender_account.id])
+        queue_balance(db, current_user.id, sender_account.id, balances[sender_account.id])
+        for _, _, recipient in accepted:
+            queue_balance(db, recipient.id, recipient.account_id, balances[recipient.account_id])
+
+        await db.commit()
+    except InsufficientFunds:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Insufficient funds for the batch total of {total}.")
+    except Exception:
+        logger.exception("Batch transfer of %d items from account %s failed", len(accepted), sender_account.id)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Batch transfer failed, please retry.")
+
+    return BatchTransferResponse(
+        sent=len(accepted),
+        rejected=len(results) - len(accepted),
+        total_amount=total,
+        balance=balances[sender_account.id],
+        results=results,
+    )
+
+def _encode_cursor(txn: Transaction) -> str:
+    raw = f"{txn.txn_date.isoformat()}|{txn.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        txn_date, txn_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(txn_date), int(txn_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+def _filter_transactions(
+    stmt,
+    account_ids: List[int],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    category: Optional[str],
+    merchant: Optional[str],
+    txn_type: Optional[TxnType],
+):
+    stmt = stmt.where(Transaction.account_id.in_(account_ids))
+    if start_date:
+        stmt = stmt.where(Transaction.txn_date >= start_date)
+    if end_date:
+        # end_date is inclusive
+        stmt = stmt.where(Transaction.txn_date < end_date + timedelta(days=1))
+    if category:
+        stmt = stmt.where(Transaction.category == category)
+    if merchant:
+        stmt = stmt.where(Transaction.merchant == merchant)
+    if txn_type:
+        stmt = stmt.where(Transaction.txn_type == txn_type)
+    return stmt
 
 @router.get("/all", response_model=List[TransactionResponse])
-def get_transactions(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_transactions(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    merchant: Optional[str] = None,
+    txn_type: Optional[TxnType] = None,
+):
+    """
+    Newest-first page of the user's transactions.
+    Pass the X-Next-Cursor response header back as ?cursor= to get the next page.
+    """
+    account_ids = (await db.scalars(select(Account.id).where(Account.user_id == current_user.id))).all()
+    if not account_ids:
+        return []
+
+    stmt = _filter_transactions(select(Transaction), account_ids, start_date, end_date, category, merchant, txn_type)
+    if cursor:
+        # Keyset pagination on (txn_date, id), newest first
+        stmt = stmt.where(tuple_(Transaction.txn_date, Transaction.id) < _decode_cursor(cursor))
+    stmt = stmt.order_by(Transaction.txn_date.desc(), Transaction.id.desc()).limit(limit + 1)
+
+    transactions = (await db.scalars(stmt)).all()
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(transactions[-1])
+    return transactions
+
+EXPORT_COLUMNS = ["id", "txn_date", "account_id", "description", "category", "merchant", "txn_type", "amount", "currency"]
+EXPORT_CHUNK_SIZE = 1000
+
+async def _export_rows(account_ids: List[int], export_format: str, filters: dict) -> AsyncIterator[str]:
+    # Runs after the request's session is gone, so the stream owns its session
+    async with AsyncSessionLocal() as db:
+        stmt = _filter_transactions(
+            select(*[getattr(Transaction, c) for c in EXPORT_COLUMNS]), account_ids, **filters
+        ).order_by(Transaction.txn_date.desc(), Transaction.id.desc())
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(EXPORT_COLUMNS)
+
+        rows = await db.stream(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        async for partition in rows.partitions():
+            for row in partition:
+                record = dict(zip(EXPORT_COLUMNS, row))
+                record["txn_date"] = record["txn_date"].isoformat() if record["txn_date"] else None
+                record["txn_type"] = record["txn_type"].value if record["txn_type"] else None
+                record["amount"] = str(record["amount"]) if record["amount"] is not None else None
+                if export_format == "csv":
+                    writer.writerow([record[c] for c in EXPORT_COLUMNS])
+                else:
+                    buffer.write(json.dumps(record) + "\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        # Header-only CSV for an empty export
+        if buffer.getvalue():
+            yield buffer.getvalue()
+
+@router.get("/export")
+async def export_transactions(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    merchant: Optional[str] = None,
+    txn_type: Optional[TxnType] = None,
 ):
-    # Fetch all transactions for all of the user's accounts
-    account_ids = [acc.id for acc in current_user.accounts]
-    transactions = db.query(Transaction).filter(
-        Transaction.account_id.in_(account_ids)
-    ).order_by(Transaction.txn_date.desc()).all()
-    return transactions
\ No newline at end of file
+    """
+    Stream the user's transaction history as NDJSON or CSV.
+    Rows are read in chunks, so memory use does not grow with history size.
+    """
+    account_ids = (await db.scalars(select(Account.id).where(Account.user_id == current_user.id))).all()
+    filters = dict(start_date=start_date, end_date=end_date, category=category, merchant=merchant, txn_type=txn_type)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_rows(account_ids, format, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'},
+    )
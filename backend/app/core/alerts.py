@@ -0,0 +1,213 @@
+"""
+Persisted alerts.
+
+Alerts are written when state changes (a bill is created or edited, money
+leaves an account, budget spend changes) and by the periodic alerts job
+(app/jobs/alerts.py) for conditions that only depend on the date, such as a
+bill entering the due-soon window. Each alert carries a dedupe_key naming the
+resource and condition, and a (user, dedupe_key) pair is written at most once,
+so callers can re-evaluate freely.
+
+Like app.core.ledger, the helpers take a sync Session; endpoints call them
+through AsyncSession.run_sync before committing. Newly inserted alerts are
+also pushed to GET /events/stream once the caller commits.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.events import queue_event
+from app.models.banking import Account, Alert, AlertType, BillStatus
+
+def bill_alert_keys(bill_id: int) -> List[str]:
+    return [f"bill_upcoming:{bill_id}", f"bill_overdue:{bill_id}"]
+
+def budget_alert_keys(budget_id: int) -> List[str]:
+    return [f"budget_warning:{budget_id}", f"budget_critical:{budget_id}"]
+
+def bill_alert(bill: Any, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """
+    Alert row for an unpaid bill that is overdue or due within BILL_DUE_SOON_DAYS.
+    Accepts ORM objects or result rows.
+    """
+    today = today or date.today()
+    if bill.status == BillStatus.paid or bill.due_date is None:
+        return None
+    common = {
+        "user_id": bill.user_id,
+        "type": AlertType.bill_due,
+        "category": "Bill Due",
+        "link": f"/dashboard/bills?highlight={bill.id}",
+    }
+    if bill.due_date < today:
+        days_overdue = (today - bill.due_date).days
+        return dict(
+            common,
+            dedupe_key=f"bill_overdue:{bill.id}",
+            severity="critical",
+            title=f"Bill Overdue: {bill.biller_name}",
+            message=f"{bill.biller_name} bill of ${bill.amount_due} is overdue by {days_overdue} days.",
+        )
+    if bill.due_date <= today + timedelta(days=settings.BILL_DUE_SOON_DAYS):
+        days_left = (bill.due_date - today).days
+        day_str = "today" if days_left == 0 else f"in {days_left} days"
+        return dict(
+            common,
+            dedupe_key=f"bill_upcoming:{bill.id}",
+            severity="warning",
+            title=f"Bill Due Soon: {bill.biller_name}",
+            message=f"{bill.biller_name} bill of ${bill.amount_due} is due {day_str}.",
+        )
+    return None
+
+def budget_alert(budget: Any) -> Optional[Dict[str, Any]]:
+    """
+    Alert row for a budget at 80% (warning) or 100% (critical) of its limit.
+    """
+    if not budget.limit_amount or budget.limit_amount <= 0:
+        return None
+    spent_pct = (Decimal(str(budget.spent_amount or 0)) / Decimal(str(budget.limit_amount))) * 100
+    common = {
+        "user_id": budget.user_id,
+        "type": AlertType.budget_exceeded,
+        "category": "Budget Alert",
+        "link": f"/dashboard/budgets?highlight={budget.id}",
+    }
+    if spent_pct >= 100:
+        return dict(
+            common,
+            dedupe_key=f"budget_critical:{budget.id}",
+            severity="critical",
+            title=f"Budget Exceeded: {budget.category}",
+            message=f"You have exceeded your {budget.category} budget of ${budget.limit_amount}.",
+        )
+    if spent_pct >= 80:
+        return dict(
+            common,
+            dedupe_key=f"budget_warning:{budget.id}",
+            severity="warning",
+            title=f"Nearing Limit: {budget.category}",
+            message=f"You have used {int(spent_pct)}% of your {budget.category} budget.",
+        )
+    return None
+
+def low_balance_alert(account: Any, today: Optional[date] = None) -> Optional[Dict[str, Any]]:
+    """
+    Alert row for an account below LOW_BALANCE_THRESHOLD, at most once per account per day.
+    """
+    today = today or date.today()
+    if account.balance is None or account.balance >= Decimal(str(settings.LOW_BALANCE_THRESHOLD)):
+        return None
+    return {
+        "user_id": account.user_id,
+        "type": AlertType.low_balance,
+        "dedupe_key": f"low_balance:{account.id}:{today.isoformat()}",
+        "severity": "critical",
+        "category": "Account",
+        "title": f"Low Balance: {account.bank_name} ••{account.masked_account}",
+        "message": f"Your balance is ${account.balance}, below ${settings.LOW_BALANCE_THRESHOLD:.2f}.",
+        "link": "/dashboard/accounts",
+    }
+
+def alert_payload(alert: Any) -> Dict[str, Any]:
+    """
+    API shape of an alert (GET /alerts/list items and "alert" stream events).
+    """
+    return {
+        "id": alert.id,
+        "type": alert.severity or "info",
+        "category": alert.category or "General",
+        "title": alert.title or "Notification",
+        "message": alert.message or "",
+        "link": alert.link,
+        "is_read": alert.is_read,
+        "created_at": alert.created_at,
+    }
+
+def queue_alert_events(db: Session, alerts: Iterable[Any]) -> None:
+    for alert in alerts:
+        queue_event(db, alert.user_id, "alert", alert_payload(alert))
+
+def save_alerts(db: Session, rows: Iterable[Optional[Dict[str, Any]]]) -> None:
+    """
+    Insert alert rows, skipping any (user_id, dedupe_key) that already exists,
+    and mark read the due-soon alert of any bill raised here as overdue.
+    The caller commits.
+    """
+    rows = [dict(row, is_read=False) for row in rows if row is not None]
+    if not rows:
+        return
+    _resolve_superseded(db, rows)
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = (
+            insert_fn(Alert)
+            .on_conflict_do_nothing(index_elements=["user_id", "dedupe_key"])
+            # Only rows actually inserted come back
+            .returning(Alert.id, Alert.user_id, Alert.severity, Alert.category, Alert.title,
+                       Alert.message, Alert.link, Alert.is_read, Alert.created_at)
+        )
+        queue_alert_events(db, db.connection().execute(stmt, rows).all())
+        return
+
+    # Generic fallback: skip keys that already exist
+    keys = {(row["user_id"], row["dedupe_key"]) for row in rows}
+    existing = set(db.execute(
+        select(Alert.user_id, Alert.dedupe_key).where(Alert.dedupe_key.in_([k for _, k in keys]))
+    ).all())
+    alerts = [Alert(**row) for row in rows if (row["user_id"], row["dedupe_key"]) not in existing]
+    db.add_all(alerts)
+    db.flush()
+    queue_alert_events(db, alerts)
+
+def _resolve_superseded(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    A bill that went overdue no longer needs its due-soon alert.
+    """
+    upcoming = {
+        (row["user_id"], "bill_upcoming:" + row["dedupe_key"].split(":", 1)[1])
+        for row in rows if row["dedupe_key"].startswith("bill_overdue:")
+    }
+    if upcoming:
+        resolve_alerts(db, {user_id for user_id, _ in upcoming}, [key for _, key in upcoming])
+
+def resolve_alerts(db: Session, user_ids: Iterable[int], dedupe_keys: List[str]) -> None:
+    """
+    Mark alerts read once their condition is over (e.g. the bill was paid).
+    """
+    if dedupe_keys:
+        db.execute(
+            update(Alert)
+            .where(Alert.user_id.in_(list(user_ids)), Alert.dedupe_key.in_(dedupe_keys), Alert.is_read == False)
+            .values(is_read=True),
+            execution_options={"synchronize_session": False},
+        )
+
+def alerts_for_bills(db: Session, bills: Iterable[Any]) -> None:
+    today = date.today()
+    save_alerts(db, (bill_alert(bill, today) for bill in bills))
+
+def alerts_for_budgets(db: Session, budgets: Iterable[Any]) -> None:
+    save_alerts(db, (budget_alert(budget) for budget in budgets))
+
+def alerts_for_accounts(db: Session, account_ids: Iterable[int]) -> None:
+    """
+    Low-balance alerts for accounts whose balance just went down. Flushes first
+    so pending ORM balance changes are visible.
+    """
+    account_ids = list(account_ids)
+    if not account_ids:
+        return
+    db.flush()
+    today = date.today()
+    accounts = db.execute(
+        select(Account.id, Account.user_id, Account.bank_name, Account.masked_account, Account.balance)
+        .where(Account.id.in_(account_ids), Account.balance < settings.LOW_BALANCE_THRESHOLD)
+    ).all()
+    save_alerts(db, (low_balance_alert(account, today) for account in accounts))
@@ -0,0 +1,80 @@
+"""
+Atomic account balance changes.
+
+Balances change only through single UPDATE statements evaluated by the
+database (balance = balance + :delta), never read-modify-write in Python, so
+concurrent requests cannot overwrite each other. A debit that must not
+overdraw carries the funds check in its WHERE clause, which makes the check
+and the write one step.
+
+Each UPDATE holds its row lock until commit. apply_balance_changes() touches
+accounts in ascending id order, so two transfers in opposite directions
+queue behind each other instead of deadlocking. Later statements in the
+transaction (rollups, budgets) are serialized by those account locks too.
+
+Like app.core.ledger, the helpers take a sync Session; endpoints call them
+through AsyncSession.run_sync.
+"""
+from decimal import Decimal
+from typing import Dict, List
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.models.banking import Account
+
+class InsufficientFunds(Exception):
+    def __init__(self, account_id: int):
+        super().__init__(f"Insufficient funds in account {account_id}")
+        self.account_id = account_id
+
+def apply_balance_changes(db: Session, changes: Dict[int, Decimal], require_funds: bool = True) -> Dict[int, Decimal]:
+    """
+    Add each delta to its account and return the new balances. With require_funds,
+    a debit larger than the balance raises InsufficientFunds; the caller rolls back.
+    """
+    balances: Dict[int, Decimal] = {}
+    # Unconditional changes between two checked debits go out as one executemany
+    pending: List[Dict] = []
+
+    def apply_one(account_id: int, delta: Decimal, check_funds: bool) -> None:
+        stmt = (
+            update(Account)
+            .where(Account.id == account_id)
+            .values(balance=Account.balance + delta)
+            .returning(Account.balance)
+        )
+        if check_funds:
+            stmt = stmt.where(Account.balance >= -delta)
+        # Loaded Account objects keep their old balance; use the returned value
+        balance = db.execute(stmt, execution_options={"synchronize_session": False}).scalar_one_or_none()
+        if balance is None:
+            raise InsufficientFunds(account_id)
+        balances[account_id] = balance
+
+    def flush_pending() -> None:
+        if len(pending) == 1:
+            apply_one(pending[0]["b_account_id"], pending[0]["b_delta"], False)
+        elif pending:
+            # Core connection: Session.execute() would run a list of params as an ORM bulk UPDATE
+            db.connection().execute(
+                update(Account)
+                .where(Account.id == bindparam("b_account_id"))
+                .values(balance=Account.balance + bindparam("b_delta")),
+                pending,
+            )
+        pending.clear()
+
+    for account_id in sorted(changes):
+        delta = Decimal(str(changes[account_id]))
+        if require_funds and delta < 0:
+            flush_pending()
+            apply_one(account_id, delta, True)
+        else:
+            pending.append({"b_account_id": account_id, "b_delta": delta})
+    flush_pending()
+
+    unread = [account_id for account_id in changes if account_id not in balances]
+    if unread:
+        balances.update(db.execute(select(Account.id, Account.balance).where(Account.id.in_(unread))).all())
+    return balances
@@ -0,0 +1,55 @@
+"""
+Bills summary (GET /bills/summary): one conditional-aggregate query per user,
+cached until one of the user's bills changes.
+
+The cache is per process. Writers call invalidate_bills_summary(), which
+only clears this process's entries: a summary cached by another API worker,
+or a change made by jobs running under python -m app.jobs.scheduler, stays
+visible until the entry expires. So a user may see a summary up to
+BILLS_SUMMARY_CACHE_TTL_SECONDS (60s) old after a bill changes elsewhere;
+deployments that cannot accept that set BILLS_SUMMARY_CACHE_MAX_ENTRIES=0.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.banking import Bill, BillStatus
+
+summary_cache = TTLCache(maxsize=settings.BILLS_SUMMARY_CACHE_MAX_ENTRIES, ttl=settings.BILLS_SUMMARY_CACHE_TTL_SECONDS)
+
+def invalidate_bills_summary(user_ids: Iterable[int]) -> None:
+    for user_id in user_ids:
+        summary_cache.pop(user_id)
+
+def _amount_where(condition):
+    return func.coalesce(func.sum(case((condition, Bill.amount_due), else_=0)), 0)
+
+def bills_summary_query(user_id: int, month_start: datetime):
+    paid_this_month = (Bill.status == BillStatus.paid) & (Bill.paid_at >= month_start)
+    return select(
+        func.count().filter(Bill.status != BillStatus.paid).label("active_count"),
+        func.count().filter(Bill.status == BillStatus.upcoming).label("upcoming_count"),
+        _amount_where(Bill.status == BillStatus.upcoming).label("due_amount"),
+        func.count().filter(Bill.status == BillStatus.overdue).label("overdue_count"),
+        _amount_where(Bill.status == BillStatus.overdue).label("overdue_amount"),
+        func.count().filter(Bill.status == BillStatus.paid).label("paid_count"),
+        func.count().filter(paid_this_month).label("paid_this_month_count"),
+        _amount_where(paid_this_month).label("paid_this_month_amount"),
+    ).where(Bill.user_id == user_id)
+
+async def get_bills_summary(db: AsyncSession, user_id: int, today: Optional[date] = None) -> Dict[str, Any]:
+    summary = summary_cache.get(user_id)
+    if summary is not None:
+        return summary
+
+    # paid_at is stored in UTC
+    today = today or datetime.utcnow().date()
+    month_start = datetime(today.year, today.month, 1)
+    row = (await db.execute(bills_summary_query(user_id, month_start))).one()
+    summary = dict(row._mapping)
+    summary_cache.set(user_id, summary)
+    return summary
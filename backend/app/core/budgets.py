@@ -0,0 +1,116 @@
+"""
+Budget spend tracking.
+
+Budget.spent_amount is the outflow of the budget's (user, year, month,
+category): the absolute sum of its negative debits, the same in all three
+places below and in /insights/expense-by-category. Refunds and reversals
+booked as positive debits are not spend, so they can neither offset nor add
+to it. app.core.ledger.record_transactions() calls record_budget_spend()
+for every batch of new transactions, so the budgets move in the same DB
+transaction as the ledger. Each affected budget is bumped with an atomic
+UPDATE ... SET spent_amount = spent_amount + :amount, never read-modify-write.
+
+ledger_spend() and app/jobs/budgets.py recompute the same number from the
+ledger for new budgets and drift checks.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Integer, bindparam, cast, extract, func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.alerts import alerts_for_budgets
+from app.core.events import queue_event
+from app.models.banking import Account, Budget, LedgerRollup, Transaction, TxnType
+
+def _field(txn: Any, name: str):
+    if isinstance(txn, dict):
+        return txn.get(name)
+    return getattr(txn, name, None)
+
+def record_budget_spend(db: Session, txns: Iterable[Any]) -> None:
+    """
+    Add the debits among `txns` to their budgets and re-evaluate budget alerts.
+    Transactions must have txn_date set (record_transactions pins it).
+    """
+    spend: Dict[Tuple, Decimal] = {}
+    for txn in txns:
+        if TxnType(_field(txn, "txn_type")) != TxnType.debit:
+            continue
+        amount = Decimal(str(_field(txn, "amount") or 0))
+        if amount >= 0:
+            continue
+        txn_date = _field(txn, "txn_date")
+        key = (_field(txn, "account_id"), txn_date.year, txn_date.month, _field(txn, "category") or "Uncategorized")
+        spend[key] = spend.get(key, Decimal("0")) - amount
+    if not spend:
+        return
+
+    owner = select(Account.user_id).where(Account.id == bindparam("b_account_id")).scalar_subquery()
+    # Core executemany; Session.execute() would run a list of params as an ORM bulk UPDATE
+    db.connection().execute(
+        update(Budget)
+        .where(
+            Budget.user_id == owner,
+            Budget.year == bindparam("b_year"),
+            Budget.month == bindparam("b_month"),
+            Budget.category == bindparam("b_category"),
+        )
+        .values(spent_amount=func.coalesce(Budget.spent_amount, 0) + bindparam("b_amount")),
+        [
+            {"b_account_id": account_id, "b_year": year, "b_month": month, "b_category": category, "b_amount": amount}
+            for (account_id, year, month, category), amount in spend.items()
+        ],
+    )
+
+    changed = db.execute(
+        select(Budget.id, Budget.user_id, Budget.category, Budget.limit_amount, Budget.spent_amount)
+        .join(Account, Account.user_id == Budget.user_id)
+        .where(tuple_(Account.id, Budget.year, Budget.month, Budget.category).in_(list(spend)))
+        .distinct()
+    ).all()
+    for budget in changed:
+        queue_event(db, budget.user_id, "budget", {"budget_id": budget.id, "spent_amount": budget.spent_amount})
+    alerts_for_budgets(db, changed)
+
+def ledger_spend(db: Session, user_id: int, year: int, month: int, category: str) -> Decimal:
+    """
+    Outflow in one budget's scope, read from the monthly ledger rollups.
+    """
+    total = db.scalar(
+        select(-func.coalesce(func.sum(LedgerRollup.outflow_amount), 0))
+        .join(Account, Account.id == LedgerRollup.account_id)
+        .where(
+            Account.user_id == user_id,
+            LedgerRollup.year == year,
+            LedgerRollup.month == month,
+            LedgerRollup.category == category,
+            LedgerRollup.txn_type == TxnType.debit,
+        )
+    )
+    return Decimal(str(total))
+
+def spend_by_budget_key(since: Optional[datetime] = None):
+    """
+    Outflow per (user_id, year, month, category) from the raw transactions table,
+    optionally only for transactions on or after `since`.
+    """
+    year = cast(extract("year", Transaction.txn_date), Integer)
+    month = cast(extract("month", Transaction.txn_date), Integer)
+    category = func.coalesce(func.nullif(Transaction.category, ""), "Uncategorized")
+    stmt = (
+        select(
+            Account.user_id,
+            year.label("year"),
+            month.label("month"),
+            category.label("category"),
+            (-func.sum(Transaction.amount)).label("spent"),
+        )
+        .join(Account, Account.id == Transaction.account_id)
+        .where(Transaction.txn_type == TxnType.debit, Transaction.amount < 0)
+        .group_by(Account.user_id, year, month, category)
+    )
+    if since is not None:
+        stmt = stmt.where(Transaction.txn_date >= since)
+    return stmt.subquery()
@@ -0,0 +1,86 @@
+"""
+Spending categories for merchant / biller names and transaction notes.
+
+CATEGORY_RULES is the rules table: the first rule with a keyword found in
+the (lower-cased) text wins. Keywords match whole words, optionally with a
+plural "s", so "bus" does not match "business" nor "ola" "chocolate". Other
+forms a name may take ("shoppers", "groceries") are listed as keywords. Categorizer compiles the whole table into
+one regex, so a lookup is a single scan of the text however many rules
+there are, and memoizes results per distinct text, since the same merchants
+come back over and over.
+
+Every write path that picks a category (bills, transfers, auto-pay,
+statement imports and the app.jobs.categorize backfill) goes through
+categorize() so they agree.
+"""
+import re
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+DEFAULT_BILL_CATEGORY = "Bills & Utilities"
+TRANSFER_CATEGORY = "Transfer" # transfers whose note matches no rule
+
+# First matching rule wins
+CATEGORY_RULES = [
+    ("Entertainment", ["netflix", "prime video", "amazon prime", "spotify", "hotstar", "disney", "hbo", "movie", "cinema", "bookmyshow", "steam"]),
+    ("Food", ["food", "zomato", "swiggy", "burger", "pizza", "restaurant", "starbucks", "cafe", "coffee", "mcdonald", "grocery", "groceries", "pizzeria"]),
+    ("Health", ["health", "healthcare", "doctor", "pharmacy", "pharmacies", "clinic", "hospital", "gym", "fitness", "apollo", "pathlab"]),
+    ("Transport", ["uber", "ola", "fuel", "petrol", "petroleum", "transport", "transportation", "bus", "train", "flight", "metro", "shell"]),
+    ("Shopping", ["shop", "shopping", "shoppers", "amazon", "flipkart", "myntra", "store", "zara", "h&m", "walmart"]),
+    ("Bills & Utilities", ["electricity", "water bill", "jio", "airtel", "postpaid", "broadband", "internet"]),
+]
+
+class Categorizer:
+    def __init__(self, rules: Sequence[Tuple[str, Sequence[str]]], cache_size: int = 65536):
+        self.categories = [category for category, _ in rules]
+        self._rule_of = {}
+        for index, (_, keywords) in enumerate(rules):
+            for keyword in keywords:
+                if keyword:
+                    self._rule_of.setdefault(keyword.lower(), index)
+
+        def alternation(keywords) -> str:
+            # Whole words only; "(?!)" never matches, for a rule without keywords
+            if not keywords:
+                return "(?!)"
+            return r"\b(" + "|".join(re.escape(k) for k in keywords) + r")s?\b"
+
+        # Any keyword, leftmost match; group 1 is the keyword
+        self._any = re.compile(alternation(list(self._rule_of)))
+        # Keywords of the rules ranked above rule i; None for the first rule
+        self._before = [None] + [
+            re.compile(alternation([k for k, r in self._rule_of.items() if r < i]))
+            for i in range(1, len(rules))
+        ]
+        # Rule priority in one pattern: the first branch whose lookahead finds its keyword
+        self._ranked = re.compile("|".join(
+            f"(?=.*?(?:{alternation([k for k, r in self._rule_of.items() if r == i])}))(?P<r{i}>)"
+            for i in range(len(rules))
+        ), re.S)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, text: str) -> Optional[str]:
+        text = text.lower()
+        found = self._any.search(text)
+        if found is None:
+            return None
+        rule = self._rule_of[found.group(1)]
+        # The leftmost keyword may belong to a lower-ranked rule than another one further right
+        if rule and self._before[rule].search(text):
+            rule = int(self._ranked.match(text).lastgroup[1:])
+        return self.categories[rule]
+
+    def categorize(self, text: Optional[str], default: Optional[str] = None) -> Optional[str]:
+        if not text:
+            return default
+        return self.match(text) or default
+
+categorizer = Categorizer(CATEGORY_RULES, settings.CATEGORY_CACHE_SIZE)
+
+def categorize(text: Optional[str], default: Optional[str] = None) -> Optional[str]:
+    return categorizer.categorize(text, default)
+
+def bill_category(biller_name: str) -> str:
+    return categorizer.categorize(biller_name, DEFAULT_BILL_CATEGORY)
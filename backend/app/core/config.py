@@ -7,6 +7,15 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+
+    # Password hashing (see app/core/security.py)
+    BCRYPT_ROUNDS: int = 12 # existing hashes are upgraded on the next login
+    PASSWORD_HASH_WORKERS: int = 0 # 0 = one per CPU core
+    PASSWORD_HASH_MAX_QUEUE: int = 32 # waiting hash jobs beyond the workers before returning 503
+
+    # Authenticated-principal cache (see app/api/deps.py)
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
     
     # Database settings
     POSTGRES_USER: str
@@ -15,6 +24,21 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str
     POSTGRES_DB: str
     DATABASE_URL: str
+    # Optional override for the asyncio driver URL (default: DATABASE_URL with asyncpg/aiosqlite)
+    ASYNC_DATABASE_URL: str = ""
+
+    # Connection pool (ignored for SQLite, which has no server connections)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30 # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800 # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0 # 0 = no server-side statement timeout
+
+    # N+1 detection for development and tests (see app/db/query_guard.py)
+    DB_STRICT_LOADING: bool = False # relationships not loaded explicitly raise instead of lazy loading
+    DB_REPEATED_QUERY_LIMIT: int = 0 # runs of one statement per request before it is reported; 0 = off
+    DB_REPEATED_QUERY_ACTION: str = "log" # or "raise"
     
     # Mail settings
     MAIL_USERNAME: str
@@ -22,6 +46,79 @@ class Settings(BaseSettings):
     MAIL_FROM: str
     MAIL_PORT: int
     MAIL_SERVER: str
+    MAIL_FROM_NAME: str = ""
+    MAIL_STARTTLS: bool = True
+    MAIL_SSL_TLS: bool = False
+    MAIL_USE_CREDENTIALS: bool = True # false for a local aiosmtpd stand-in
+    MAIL_VALIDATE_CERTS: bool = True
+    MAIL_TIMEOUT_SECONDS: int = 30
+
+    # Email outbox worker (see app/jobs/email_outbox.py)
+    EMAIL_OUTBOX_POLL_SECONDS: int = 2
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50 # messages sent per SMTP connection
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_BACKOFF_SECONDS: int = 30 # doubled after each failed attempt
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS: int = 3600
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300 # claimed rows are retried after this if the worker dies
+
+    # POST /transactions/batch
+    TRANSFER_BATCH_MAX_ITEMS: int = 1000
+
+    # Merchant categorization (see app/core/categorizer.py)
+    CATEGORY_CACHE_SIZE: int = 65536 # distinct merchant / description strings memoized
+    CATEGORY_BACKFILL_BATCH_SIZE: int = 5000 # transactions per DB transaction (see app/jobs/categorize.py)
+
+    # POST /accounts/{id}/import (see app/core/imports.py)
+    IMPORT_BATCH_SIZE: int = 5000 # rows per INSERT executemany and commit
+    IMPORT_DEDUPE_WINDOW: int = 10000 # recent distinct CSV rows remembered for the occurrence count
+
+    # Bulk auto-pay job (see app/jobs/autopay.py)
+    AUTOPAY_INTERVAL_SECONDS: int = 60
+    AUTOPAY_CHUNK_SIZE: int = 1000 # bills per DB transaction
+
+    # GET /bills/summary cache (see app/core/bills.py)
+    BILLS_SUMMARY_CACHE_TTL_SECONDS: int = 60 # how stale a summary can be after another process changes a bill
+    BILLS_SUMMARY_CACHE_MAX_ENTRIES: int = 10000 # 0 disables the cache
+
+    # Alerts (see app/core/alerts.py and app/jobs/alerts.py)
+    LOW_BALANCE_THRESHOLD: float = 100.0
+    BILL_DUE_SOON_DAYS: int = 3
+    ALERTS_INTERVAL_SECONDS: int = 300
+    ALERTS_BILL_LOOKBACK_DAYS: int = 7 # overdue bills older than this are not re-checked
+
+    # GET /events/stream (see app/core/events.py)
+    EVENTS_REDIS_URL: str = "" # e.g. redis://localhost:6379/0 to fan out across workers; empty = in-process
+    EVENTS_QUEUE_SIZE: int = 100 # buffered events per stream; the oldest are dropped for slow clients
+    EVENTS_KEEPALIVE_SECONDS: int = 15
+    EVENTS_RETRY_MS: int = 3000 # reconnect delay sent to EventSource clients
+
+    # Budget reconciliation against the ledger (see app/jobs/budgets.py)
+    BUDGET_RECONCILE_INTERVAL_SECONDS: int = 3600
+    BUDGET_RECONCILE_MONTHS: int = 2 # current and previous month
+
+    # Idempotency-Key handling for money-moving endpoints (see app/core/idempotency.py)
+    IDEMPOTENCY_TTL_SECONDS: int = 86400 # how long a stored response is replayed
+    IDEMPOTENCY_LOCK_SECONDS: int = 60 # a reservation whose request has not committed can be taken over after this
+    IDEMPOTENCY_WAIT_SECONDS: float = 10 # concurrent duplicates wait this long before 409
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = 3600
+
+    # Overdue bill sweeper (see app/jobs/overdue_bills.py)
+    OVERDUE_SWEEP_INTERVAL_SECONDS: int = 300
+    OVERDUE_SWEEP_BATCH_SIZE: int = 5000
+
+    # GET /dashboard/snapshot (see app/api/v1/endpoints/dashboard.py)
+    DASHBOARD_MAX_CONCURRENCY: int = 4 # sections read at once, each holding a pooled connection
+
+    # /internal/* operational endpoints (see app/api/deps.py require_internal_token).
+    # Callers send it as X-Internal-Token; empty = the endpoints are disabled.
+    INTERNAL_API_TOKEN: str = ""
+
+    # Prometheus metrics at GET /metrics (see app/core/metrics.py), which also needs INTERNAL_API_TOKEN
+    METRICS_ENABLED: bool = False
+
+    # Run the background job scheduler inside the API process (app/jobs/scheduler.py).
+    # Turn off on all but one API worker, or run `python -m app.jobs.scheduler` instead.
+    BACKGROUND_JOBS_ENABLED: bool = True
 
     # External Integrations
     PLAID_CLIENT_ID: str
@@ -1,43 +1,79 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+"""
+Outgoing email.
+
+Endpoints never talk to SMTP. They queue an EmailOutbox row in their own DB
+transaction (so the email exists if and only if the change committed) and
+app/jobs/email_outbox.py delivers queued rows in batches. SMTP connect and
+send latency is recorded in app.core.metrics.
+"""
+import time
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+from sqlalchemy.orm import Session
+
+from app.core import metrics
 from app.core.config import settings
-from pydantic import EmailStr
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True
-)
-
-async def send_otp_email(email: EmailStr, otp: str):
+from app.models.banking import EmailOutbox
+
+def queue_email(db: Session, email: str, subject: str, body: str) -> EmailOutbox:
+    """
+    Add an HTML email to the outbox. Works with Session and AsyncSession; the caller commits.
+    """
+    message = EmailOutbox(recipient=email, subject=subject, body=body)
+    db.add(message)
+    return message
+
+def queue_otp_email(db: Session, email: str, otp: str) -> EmailOutbox:
     html = f"""
     <h3>Banking Dashboard Verification</h3>
     <p>Your OTP code is: <strong>{otp}</strong></p>
     <p>Please enter this code to verify your account.</p>
     """
-    
-    message = MessageSchema(
-        subject="Your Banking Verification Code",
-        recipients=[email],
-        body=html,
-        subtype=MessageType.html
-    )
+    return queue_email(db, email, "Your Banking Verification Code", html)
 
-    fm = FastMail(conf)
-    await fm.send_message(message)
+def build_message(row: EmailOutbox) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM)) if settings.MAIL_FROM_NAME else settings.MAIL_FROM
+    message["To"] = row.recipient
+    message["Subject"] = row.subject
+    message.set_content(row.body, subtype="html")
+    return message
 
-async def send_general_email(email: EmailStr, subject: str, body: str):
-    message = MessageSchema(
-        subject=subject,
-        recipients=[email],
-        body=body,
-        subtype=MessageType.html
+def smtp_client() -> aiosmtplib.SMTP:
+    """
+    Unconnected SMTP client for the configured server. The outbox worker keeps
+    one connection open for a whole batch.
+    """
+    return aiosmtplib.SMTP(
+        hostname=settings.MAIL_SERVER,
+        port=settings.MAIL_PORT,
+        use_tls=settings.MAIL_SSL_TLS,
+        start_tls=settings.MAIL_STARTTLS,
+        validate_certs=settings.MAIL_VALIDATE_CERTS,
+        timeout=settings.MAIL_TIMEOUT_SECONDS,
     )
 
-    fm = FastMail(conf)
-    await fm.send_message(message)
\ No newline at end of file
+@contextmanager
+def _timed(operation: str):
+    started = time.perf_counter()
+    result = "error"
+    try:
+        yield
+        result = "ok"
+    finally:
+        metrics.smtp_duration.observe(time.perf_counter() - started, operation, result)
+
+async def connect_smtp() -> aiosmtplib.SMTP:
+    with _timed("connect"):
+        smtp = smtp_client()
+        await smtp.connect()
+        if settings.MAIL_USE_CREDENTIALS:
+            await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+    return smtp
+
+async def send_email(smtp: aiosmtplib.SMTP, row: EmailOutbox) -> None:
+    with _timed("send"):
+        await smtp.send_message(build_message(row))
@@ -0,0 +1,195 @@
+"""
+Per-user change events for the dashboard stream (GET /events/stream).
+
+Writers queue events on their DB session with queue_event(); they are
+published only after that session commits, so a client never hears about a
+change that was rolled back. Publishing goes through a broker:
+
+    InProcessBroker  default; fan-out within one API process
+    RedisBroker      EVENTS_REDIS_URL set; fan-out across workers and from
+                     jobs running under python -m app.jobs.scheduler
+
+RedisBroker needs the optional `redis` package. Event payloads are small
+deltas, e.g.
+    {"type": "balance", "data": {"account_id": 3, "balance": "812.50"}}
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Pending = List[Tuple[int, Dict[str, Any]]] # (user_id, event)
+
+def make_event(event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": event_type, "data": data}
+
+class Subscription:
+    """
+    Events for one stream. get() waits up to `timeout` seconds and returns None on timeout.
+    """
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            # Slow client: drop the oldest delta rather than grow without bound
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+
+    async def publish(self, user_id: int, event: Dict[str, Any]) -> None:
+        for subscription in list(self._subscribers.get(user_id, ())):
+            subscription.put(event)
+
+    async def publish_many(self, events: Pending) -> None:
+        for user_id, event in events:
+            await self.publish(user_id, event)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[Subscription]:
+        subscription = Subscription(settings.EVENTS_QUEUE_SIZE)
+        self._subscribers[user_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscribers[user_id].discard(subscription)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscribers.values())
+
+    async def close(self) -> None:
+        pass
+
+class RedisBroker:
+    """
+    Pub/sub over any Redis-compatible server, one channel per user.
+    """
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("EVENTS_REDIS_URL is set but the 'redis' package is not installed")
+        self._redis = aioredis.from_url(url)
+        self._local = InProcessBroker()
+        self._readers: Dict[int, asyncio.Task] = {}
+
+    @staticmethod
+    def channel(user_id: int) -> str:
+        return f"events:user:{user_id}"
+
+    async def publish(self, user_id: int, event: Dict[str, Any]) -> None:
+        await self._redis.publish(self.channel(user_id), json.dumps(event, default=str))
+
+    async def publish_many(self, events: Pending) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for user_id, event in events:
+                pipe.publish(self.channel(user_id), json.dumps(event, default=str))
+            await pipe.execute()
+
+    async def _read(self, user_id: int) -> None:
+        # One Redis subscription per user per process, shared by that user's streams
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self.channel(user_id))
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    await self._local.publish(user_id, json.loads(message["data"]))
+        finally:
+            await pubsub.unsubscribe(self.channel(user_id))
+            await pubsub.close()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[Subscription]:
+        async with self._local.subscribe(user_id) as subscription:
+            if user_id not in self._readers:
+                self._readers[user_id] = asyncio.create_task(self._read(user_id))
+            try:
+                yield subscription
+            finally:
+                if user_id not in self._local._subscribers:
+                    self._readers.pop(user_id).cancel()
+
+    def subscriber_count(self) -> int:
+        return self._local.subscriber_count()
+
+    async def close(self) -> None:
+        for task in self._readers.values():
+            task.cancel()
+        await self._redis.aclose()
+
+broker = RedisBroker(settings.EVENTS_REDIS_URL) if settings.EVENTS_REDIS_URL else InProcessBroker()
+
+# Loop that owns the broker. Session events can fire on worker threads (sync
+# jobs), so publishing is always scheduled onto this loop.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def bind_loop(loop: asyncio.AbstractEventLoop) -> None:
+    global _loop
+    _loop = loop
+
+async def _publish_logged(events: Pending) -> None:
+    try:
+        await broker.publish_many(events)
+    except Exception:
+        # The write already committed; a lost delta only means clients refresh later
+        logger.exception("Failed to publish %d events", len(events))
+
+def publish_nowait(events: Pending) -> None:
+    """
+    Publish from any thread without awaiting. Dropped when there is no event loop,
+    e.g. in scripts and benchmarks.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None:
+        running.create_task(_publish_logged(events))
+    elif _loop is not None and not _loop.is_closed():
+        asyncio.run_coroutine_threadsafe(_publish_logged(events), _loop)
+
+def queue_event(db: Session, user_id: int, event_type: str, data: Dict[str, Any]) -> None:
+    """
+    Publish an event once `db` commits. Works with Session and AsyncSession.
+    """
+    db.info.setdefault("pending_events", []).append((user_id, make_event(event_type, data)))
+
+def queue_balance(db: Session, user_id: int, account_id: int, balance: Decimal) -> None:
+    queue_event(db, user_id, "balance", {"account_id": account_id, "balance": balance})
+
+def queue_points(db: Session, user_id: int, points_balance: int) -> None:
+    queue_event(db, user_id, "points", {"points_balance": points_balance})
+
+@sa_event.listens_for(Session, "after_commit")
+def _publish_pending(session: Session) -> None:
+    pending: Pending = session.info.pop("pending_events", None)
+    if pending:
+        publish_nowait(pending)
+
+@sa_event.listens_for(Session, "after_soft_rollback")
+def _drop_pending(session: Session, previous_transaction) -> None:
+    session.info.pop("pending_events", None)
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
@@ -0,0 +1,300 @@
+"""
+Idempotency-Key support for mutating endpoints.
+
+Routers that move money use IdempotentRoute as their route class. A POST,
+PUT, PATCH or DELETE request that carries an Idempotency-Key header is then
+run at most once per caller and key:
+
+    first request       reserves the key (a row in idempotency_keys), runs,
+                        and stores a 2xx response for IDEMPOTENCY_TTL_SECONDS
+    retry               gets the stored response back, marked with an
+                        Idempotent-Replayed: true header
+    concurrent retry    waits up to IDEMPOTENCY_WAIT_SECONDS for the first
+                        request to finish, then gets 409 with Retry-After
+    same key, different request body
+                        422
+
+The first commit of the request's own database transaction also marks the
+record completed, in that same transaction. From then on the key is never
+released or taken over, even if storing the response afterwards fails or the
+worker dies: a retry gets the stored response or, if there is none, a 409
+saying the request was already processed. The commit fails instead if the
+reservation was taken over in the meantime, so the side effects happen once.
+
+Non-2xx responses and exceptions before that commit release the key, so a
+rejected request can be fixed and retried under the same key. If a worker
+dies before committing, its reservation can be taken over after
+IDEMPOTENCY_LOCK_SECONDS.
+
+Keys are scoped per caller by the token's user id, so users cannot collide
+or read each other's results. Requests without the header run as before.
+"""
+import asyncio
+import hashlib
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Callable, Coroutine, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from jose import JWTError, jwt
+from sqlalchemy import delete, event, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.banking import IdempotencyRecord, IdempotencyStatus
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+class ReservationLost(Exception):
+    """
+    The request's reservation was taken over before its transaction committed.
+    """
+
+class Reservation:
+    """
+    A key owned by the request being served. reserved_at is written to
+    created_at, so each statement can check the request still owns the row.
+    """
+    def __init__(self, scope: str, key: str, reserved_at: datetime):
+        self.scope = scope
+        self.key = key
+        self.reserved_at = reserved_at
+        self.committed = False
+
+    def owned(self):
+        return (
+            (IdempotencyRecord.scope == self.scope)
+            & (IdempotencyRecord.key == self.key)
+            & (IdempotencyRecord.created_at == self.reserved_at)
+        )
+
+# Reservation of the HTTP request being served, if any
+_reservation: ContextVar[Optional[Reservation]] = ContextVar("idempotency_reservation", default=None)
+
+@event.listens_for(Session, "before_commit")
+def _mark_committed(session: Session) -> None:
+    """
+    Mark the reservation completed in the request's first committing transaction.
+    """
+    reservation = _reservation.get()
+    if reservation is None or reservation.committed:
+        return
+    marked = session.execute(
+        update(IdempotencyRecord)
+        .where(reservation.owned(), IdempotencyRecord.status == IdempotencyStatus.in_progress)
+        .values(status=IdempotencyStatus.completed),
+        execution_options={"synchronize_session": False},
+    )
+    if not marked.rowcount:
+        # Taken over after IDEMPOTENCY_LOCK_SECONDS: the other request runs it
+        raise ReservationLost(f"{HEADER} reservation was taken over")
+    reservation.committed = True
+
+def request_scope(request: Request) -> Optional[str]:
+    """
+    Caller identity from the bearer token, without a DB round trip.
+    None when there is no valid token; the endpoint then rejects the request itself.
+    """
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("uid") is not None:
+        return f"uid:{payload['uid']}"
+    if payload.get("sub") is not None:
+        return f"sub:{payload['sub']}"
+    return None
+
+async def request_fingerprint(request: Request) -> str:
+    # Request.body() is cached, so the endpoint can still read it
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.url.path}?{request.url.query}\n".encode())
+    digest.update(await request.body())
+    return digest.hexdigest()
+
+def _insert_reservation(db: Session, values: dict) -> bool:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert_fn(IdempotencyRecord).on_conflict_do_nothing(index_elements=["scope", "key"])
+        return db.execute(stmt.returning(IdempotencyRecord.id), values).first() is not None
+    try:
+        with db.begin_nested():
+            db.execute(insert(IdempotencyRecord), values)
+        return True
+    except IntegrityError:
+        return False
+
+def reserve(db: Session, scope: str, key: str, fingerprint: str, now: datetime) -> Optional[IdempotencyRecord]:
+    """
+    Reserve `key` for this request. Returns None when the caller now owns it
+    (as Reservation(scope, key, now)), otherwise the existing record. Commits.
+    """
+    values = {
+        "scope": scope,
+        "key": key,
+        "fingerprint": fingerprint,
+        "status": IdempotencyStatus.in_progress,
+        "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+        "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+        "created_at": now,
+    }
+    if _insert_reservation(db, values):
+        db.commit()
+        return None
+
+    # Take over an expired record or an abandoned reservation in one conditional UPDATE
+    taken = db.execute(
+        update(IdempotencyRecord)
+        .where(
+            IdempotencyRecord.scope == scope,
+            IdempotencyRecord.key == key,
+            or_(
+                IdempotencyRecord.expires_at <= now,
+                (IdempotencyRecord.status == IdempotencyStatus.in_progress) & (IdempotencyRecord.locked_until <= now),
+            ),
+        )
+        .values(response_status=None, response_body=None, content_type=None, **values),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    if taken.rowcount:
+        return None
+    return db.scalar(select(IdempotencyRecord).where(IdempotencyRecord.scope == scope, IdempotencyRecord.key == key))
+
+def complete(db: Session, reservation: Reservation, response: Response) -> None:
+    db.execute(
+        update(IdempotencyRecord)
+        .where(reservation.owned())
+        .values(
+            status=IdempotencyStatus.completed,
+            response_status=response.status_code,
+            response_body=bytes(response.body).decode("utf-8"),
+            content_type=response.headers.get("content-type"),
+            locked_until=None,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+
+def release(db: Session, reservation: Reservation) -> None:
+    """
+    Give the key back, unless the request's transaction already committed.
+    """
+    db.execute(
+        delete(IdempotencyRecord).where(
+            reservation.owned(),
+            IdempotencyRecord.status == IdempotencyStatus.in_progress,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+
+def purge_expired(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Delete expired records. Returns the number deleted. Commits.
+    """
+    result = db.execute(
+        delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= (now or datetime.utcnow())),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    return result.rowcount
+
+def _replay(record: IdempotencyRecord) -> Response:
+    return Response(
+        content=record.response_body,
+        status_code=record.response_status,
+        media_type=record.content_type,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+async def run_idempotent(
+    request: Request,
+    key: str,
+    handler: Callable[[Request], Coroutine[None, None, Response]],
+) -> Response:
+    if len(key) > MAX_KEY_LENGTH:
+        return JSONResponse({"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."}, status_code=400)
+    scope = request_scope(request)
+    if scope is None:
+        return await handler(request)
+    fingerprint = await request_fingerprint(request)
+
+    deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.05
+    while True:
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            record = await db.run_sync(reserve, scope, key, fingerprint, now)
+        if record is None:
+            break
+        if record.fingerprint != fingerprint:
+            return JSONResponse(
+                {"detail": f"{HEADER} was already used for a different request."}, status_code=422
+            )
+        if record.status == IdempotencyStatus.completed:
+            if record.response_status is not None:
+                return _replay(record)
+            # Committed, but the response was never stored (the worker died or
+            # failed after its commit): never run it again
+            if record.locked_until is None or record.locked_until <= now:
+                return JSONResponse(
+                    {"detail": f"A request with this {HEADER} was already processed, but its response was not stored."},
+                    status_code=409,
+                )
+        # Another request holds the key: wait for its result instead of racing it
+        if asyncio.get_running_loop().time() >= deadline:
+            return JSONResponse(
+                {"detail": "A request with this Idempotency-Key is still in progress."},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+    reservation = Reservation(scope, key, now)
+    token = _reservation.set(reservation)
+    try:
+        response = await handler(request)
+    except BaseException:
+        _reservation.reset(token)
+        # A no-op once the handler committed: the record stays completed
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(release, reservation)
+        raise
+    _reservation.reset(token)
+
+    async with AsyncSessionLocal() as db:
+        if 200 <= response.status_code < 300 and hasattr(response, "body"):
+            await db.run_sync(complete, reservation, response)
+        else:
+            await db.run_sync(release, reservation)
+    return response
+
+class IdempotentRoute(APIRoute):
+    """
+    Route class that honours the Idempotency-Key header on mutating methods.
+    """
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            key = request.headers.get(HEADER)
+            if not key or request.method not in MUTATING_METHODS:
+                return await handler(request)
+            return await run_idempotent(request, key, handler)
+
+        return route_handler
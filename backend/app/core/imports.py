@@ -0,0 +1,375 @@
+"""
+Bank statement imports (POST /accounts/{id}/import).
+
+Uploads are parsed as they stream in, so memory stays flat however large
+the statement is:
+
+    body chunks -> lines -> records (CSV rows or OFX <STMTTRN> blocks)
+                -> row dicts -> batches of IMPORT_BATCH_SIZE
+
+Each batch is inserted with one executemany INSERT ... ON CONFLICT DO
+NOTHING and committed on its own, then passed to
+app.core.ledger.record_transactions for rollups and budgets. Imports record
+history only; account balances are not changed.
+
+Every row carries an import_hash, unique per account. OFX rows hash their
+FITID. CSV rows hash date, amount and description, plus how many identical
+rows came before them in the upload, so two real coffees on the same day
+are kept while re-uploading the same file (or a resumed upload after a
+failure) inserts nothing twice. The occurrence count is kept for the last
+IMPORT_DEDUPE_WINDOW distinct rows, which covers date-ordered statements
+while keeping memory bounded.
+"""
+import codecs
+import csv
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.categorizer import categorize
+from app.core.config import settings
+from app.core.ledger import record_transactions
+from app.models.banking import Transaction, TxnType
+
+FORMATS = ("csv", "ofx")
+MAX_ERROR_SAMPLES = 10
+
+class ImportFormatError(ValueError):
+    """
+    The upload cannot be imported at all (e.g. a CSV without date or amount columns).
+    """
+
+@dataclass
+class ImportReport:
+    format: str
+    rows: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    error_samples: List[str] = field(default_factory=list)
+
+    def add_error(self, message: str) -> None:
+        self.errors += 1
+        if len(self.error_samples) < MAX_ERROR_SAMPLES:
+            self.error_samples.append(message)
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> Optional[str]:
+    hint = f"{content_type or ''} {filename or ''}".lower()
+    if "ofx" in hint or "qfx" in hint:
+        return "ofx"
+    if "csv" in hint or "text/plain" in hint:
+        return "csv"
+    return None
+
+# --- Streaming text -----------------------------------------------------------
+
+async def iter_lines(chunks: AsyncIterator[bytes], encoding: str = "utf-8") -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    first = True
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if first and text:
+            text = text.lstrip("\ufeff") # UTF-8 BOM from spreadsheet exports
+            first = False
+        pending += text
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+# --- Field parsing --------------------------------------------------------------
+
+DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%d %b %Y", "%d-%b-%Y")
+_AMOUNT_JUNK = re.compile(r"[^\d.\-+()]")
+
+def parse_date(value: str, date_format: Optional[str] = None) -> datetime:
+    value = value.strip()
+    if not date_format:
+        # Most exports use ISO dates; fromisoformat is far cheaper than strptime
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    for fmt in ((date_format,) if date_format else DATE_FORMATS):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {value!r}")
+
+def parse_amount(value: str) -> Decimal:
+    """
+    "1,234.50", "$-12.00", "(12.00)" and "12.00-" style amounts.
+    """
+    raw = _AMOUNT_JUNK.sub("", value or "")
+    negative = raw.startswith("(") and raw.endswith(")") or raw.endswith("-")
+    raw = raw.strip("()").rstrip("-")
+    try:
+        amount = Decimal(raw)
+    except InvalidOperation:
+        raise ValueError(f"unrecognised amount {value!r}")
+    return -abs(amount) if negative else amount
+
+CENTS = Decimal("0.01")
+MAX_AMOUNT = Decimal("9999999999.99") # Transaction.amount is Numeric(12, 2)
+
+def checked_amount(amount: Decimal) -> Decimal:
+    """
+    The amount, unchanged, if the amount column can store it once finish_row
+    rounds it to cents. Otherwise a row error here, rather than a failed
+    INSERT after earlier batches committed.
+    """
+    # Checked before rounding too: quantize() raises on huge exponents
+    if not amount.is_finite() or abs(amount) >= 2 * MAX_AMOUNT or abs(amount.quantize(CENTS)) > MAX_AMOUNT:
+        raise ValueError(f"amount {amount} out of range")
+    return amount
+
+# --- CSV --------------------------------------------------------------------------
+
+COLUMN_ALIASES = {
+    "date": ("date", "txn_date", "transaction date", "posted date", "posting date", "value date"),
+    "description": ("description", "memo", "narration", "details", "particulars", "name"),
+    "amount": ("amount", "transaction amount"),
+    "debit": ("debit", "withdrawal", "withdrawals", "debit amount", "money out"),
+    "credit": ("credit", "deposit", "deposits", "credit amount", "money in"),
+    "merchant": ("merchant", "payee"),
+    "category": ("category",),
+    "type": ("type", "txn_type", "transaction type"),
+}
+
+def _column_map(header: List[str]) -> Dict[str, int]:
+    names = [h.strip().lower() for h in header]
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                columns[key] = names.index(alias)
+                break
+    if "date" not in columns or not ("amount" in columns or "debit" in columns or "credit" in columns):
+        raise ImportFormatError("CSV header needs a date column and an amount (or debit/credit) column")
+    return columns
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, List[str]]]:
+    """
+    (line number, fields) per CSV record. A record continues onto the next line
+    while it has an unbalanced quote, so quoted newlines survive chunking.
+    """
+    record, start, line_no = [], 0, 0
+    async for line in lines:
+        line_no += 1
+        if not record:
+            start = line_no
+        record.append(line)
+        text = "\n".join(record)
+        if text.count('"') % 2:
+            continue
+        record = []
+        if text.strip():
+            yield start, next(csv.reader([text]))
+    if record:
+        yield start, next(csv.reader(["\n".join(record)]))
+
+def _csv_row(fields: List[str], columns: Dict[str, int], date_format: Optional[str]) -> Dict[str, Any]:
+    def get(key: str) -> str:
+        index = columns.get(key)
+        return fields[index].strip() if index is not None and index < len(fields) else ""
+
+    if get("amount"):
+        amount = parse_amount(get("amount"))
+    else:
+        debit, credit = get("debit"), get("credit")
+        amount = (parse_amount(credit) if credit else Decimal("0")) - (abs(parse_amount(debit)) if debit else Decimal("0"))
+    kind = get("type").lower()
+    if kind in ("debit", "dr", "withdrawal") and amount > 0:
+        amount = -amount
+    return {
+        "txn_date": parse_date(get("date"), date_format),
+        "description": get("description"),
+        "merchant": get("merchant"),
+        "category": get("category"),
+        "amount": checked_amount(amount),
+    }
+
+# --- OFX ---------------------------------------------------------------------------
+
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+_OFX_TXN_START = re.compile(r"<STMTTRN>", re.I)
+_OFX_TXN_END = re.compile(r"</STMTTRN>", re.I)
+
+def parse_ofx_date(value: str) -> datetime:
+    # YYYYMMDD[HHMMSS[.XXX]][[gmt offset:tz name]]
+    digits = re.match(r"\d+", value.strip())
+    if not digits or len(digits.group()) < 8:
+        raise ValueError(f"unrecognised OFX date {value!r}")
+    stamp = digits.group()
+    return datetime.strptime(stamp[:14], "%Y%m%d%H%M%S" if len(stamp) >= 14 else "%Y%m%d")
+
+async def iter_ofx_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Dict[str, str]]]:
+    """
+    (line number, tag values) per <STMTTRN> block. Handles SGML OFX 1.x
+    (unclosed tags) and XML OFX 2.x.
+    """
+    block: Optional[List[str]] = None
+    start = line_no = 0
+    async for line in lines:
+        line_no += 1
+        # Some exporters put the whole file on one line
+        for part in re.split(r"(?=<STMTTRN>)|(?<=</STMTTRN>)", line, flags=re.I):
+            if _OFX_TXN_START.search(part):
+                block, start = [], line_no
+            if block is not None:
+                block.append(part)
+                if _OFX_TXN_END.search(part):
+                    yield start, {k.upper(): v.strip() for k, v in _OFX_FIELD.findall("\n".join(block))}
+                    block = None
+
+def _ofx_row(tags: Dict[str, str]) -> Dict[str, Any]:
+    if "TRNAMT" not in tags or "DTPOSTED" not in tags:
+        raise ValueError("STMTTRN without TRNAMT or DTPOSTED")
+    return {
+        "txn_date": parse_ofx_date(tags["DTPOSTED"]),
+        "description": tags.get("MEMO") or tags.get("NAME", ""),
+        "merchant": tags.get("NAME", ""),
+        "category": "",
+        "amount": checked_amount(parse_amount(tags["TRNAMT"])),
+        "fitid": tags.get("FITID"),
+    }
+
+# --- Rows and batches ------------------------------------------------------------------
+
+class RowHasher:
+    """
+    import_hash per row, see the module docstring.
+    """
+    def __init__(self, window: int):
+        self.window = window
+        self._seen: "OrderedDict[bytes, int]" = OrderedDict()
+
+    def __call__(self, row: Dict[str, Any]) -> str:
+        if row.get("fitid"):
+            return hashlib.sha256(f"fitid|{row['fitid']}".encode()).hexdigest()
+        content = f"{row['txn_date'].isoformat()}|{row['amount']}|{row['description']}".encode()
+        key = hashlib.sha256(content).digest()[:16]
+        occurrence = self._seen.pop(key, 0)
+        self._seen[key] = occurrence + 1
+        if len(self._seen) > self.window:
+            self._seen.popitem(last=False)
+        return hashlib.sha256(content + f"|{occurrence}".encode()).hexdigest()
+
+def finish_row(row: Dict[str, Any], account_id: int, currency: str, import_hash: str) -> Dict[str, Any]:
+    amount = row["amount"].quantize(CENTS)
+    txn_type = TxnType.debit if amount < 0 else TxnType.credit
+    description = row["description"] or row["merchant"] or "Imported transaction"
+    merchant = row["merchant"] or description
+    category = row["category"] or (
+        "Income" if txn_type == TxnType.credit
+        else categorize(merchant) or categorize(description, "Uncategorized")
+    )
+    return {
+        "account_id": account_id,
+        "description": description,
+        "category": category,
+        "amount": amount,
+        "currency": currency,
+        "txn_type": txn_type,
+        "merchant": merchant,
+        "txn_date": row["txn_date"],
+        "import_hash": import_hash,
+    }
+
+async def iter_import_batches(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    account_id: int,
+    currency: str,
+    report: ImportReport,
+    date_format: Optional[str] = None,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Parse an upload into batches of transaction rows ready to insert.
+    Bad rows are counted in `report` and skipped.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    hasher = RowHasher(settings.IMPORT_DEDUPE_WINDOW)
+    lines = iter_lines(chunks)
+    batch: List[Dict[str, Any]] = []
+
+    if fmt == "csv":
+        columns = None
+        records = iter_csv_records(lines)
+        async for line_no, fields in records:
+            if columns is None:
+                columns = _column_map(fields)
+                continue
+            report.rows += 1
+            try:
+                row = _csv_row(fields, columns, date_format)
+            except (ValueError, IndexError) as e:
+                report.add_error(f"line {line_no}: {e}")
+                continue
+            batch.append(finish_row(row, account_id, currency, hasher(row)))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if columns is None:
+            raise ImportFormatError("CSV upload is empty")
+    else:
+        async for line_no, tags in iter_ofx_records(lines):
+            report.rows += 1
+            try:
+                row = _ofx_row(tags)
+            except ValueError as e:
+                report.add_error(f"line {line_no}: {e}")
+                continue
+            batch.append(finish_row(row, account_id, currency, hasher(row)))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def insert_batch(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert rows not imported before and record them in the ledger rollups and
+    budgets. Returns the number inserted. The caller commits.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = (
+            insert_fn(Transaction)
+            .on_conflict_do_nothing(index_elements=["account_id", "import_hash"])
+            .returning(Transaction.import_hash)
+        )
+        # Core executemany, batched into multi-row INSERTs by the driver layer
+        inserted_hashes = set(db.connection().execute(stmt, rows).scalars())
+        new_rows = [row for row in rows if row["import_hash"] in inserted_hashes]
+    else:
+        existing = set(db.scalars(
+            Transaction.__table__.select()
+            .with_only_columns(Transaction.import_hash)
+            .where(
+                Transaction.account_id == rows[0]["account_id"],
+                Transaction.import_hash.in_([row["import_hash"] for row in rows]),
+            )
+        ))
+        new_rows = [row for row in rows if row["import_hash"] not in existing]
+        if new_rows:
+            db.connection().execute(insert(Transaction), new_rows)
+    if new_rows:
+        record_transactions(db, new_rows)
+    return len(new_rows)
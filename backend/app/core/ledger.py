@@ -0,0 +1,127 @@
+"""
+Monthly per-account ledger rollups (LedgerRollup).
+
+Every code path that inserts a Transaction calls record_transactions() before
+committing, so the rollup rows change in the same DB transaction as the ledger.
+rebuild_rollups() recomputes them from the raw transactions table (backfill).
+record_transactions() also keeps budget spend current (app.core.budgets).
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, case, cast, extract, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.budgets import record_budget_spend
+from app.models.banking import LedgerRollup, Transaction, TxnType
+
+ROLLUP_KEY = ("account_id", "year", "month", "category", "merchant", "txn_type")
+
+def _field(txn: Any, name: str):
+    # Accept ORM objects as well as plain dicts (bulk insert paths)
+    if isinstance(txn, dict):
+        return txn.get(name)
+    return getattr(txn, name, None)
+
+def rollup_key(txn: Any) -> Tuple:
+    txn_date = _field(txn, "txn_date")
+    return (
+        _field(txn, "account_id"),
+        txn_date.year,
+        txn_date.month,
+        _field(txn, "category") or "Uncategorized",
+        _field(txn, "merchant") or _field(txn, "description") or "Unknown",
+        TxnType(_field(txn, "txn_type")),
+    )
+
+def record_transactions(db: Session, txns: Iterable[Any]) -> None:
+    """
+    Add new transactions to their monthly rollup rows and budgets.
+    Must be called before db.commit() so both writes share one DB transaction.
+    """
+    txns = list(txns)
+    totals: Dict[Tuple, List] = {}
+    for txn in txns:
+        if _field(txn, "txn_date") is None:
+            # Pin the date now so the rollup month matches the stored row
+            if isinstance(txn, dict):
+                txn["txn_date"] = datetime.utcnow()
+            else:
+                txn.txn_date = datetime.utcnow()
+        entry = totals.setdefault(rollup_key(txn), [Decimal("0"), Decimal("0"), 0])
+        amount = Decimal(str(_field(txn, "amount") or 0))
+        entry[0] += amount
+        entry[1] += min(amount, Decimal("0"))
+        entry[2] += 1
+
+    rows = [
+        dict(zip(ROLLUP_KEY, key), total_amount=amount, outflow_amount=outflow, txn_count=count)
+        for key, (amount, outflow, count) in totals.items()
+    ]
+    if rows:
+        _upsert(db, rows)
+    record_budget_spend(db, txns)
+
+def _upsert(db: Session, rows: List[Dict[str, Any]]) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # One executemany for the whole batch; keys are already unique within it
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert_fn(LedgerRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ROLLUP_KEY),
+            set_={
+                "total_amount": LedgerRollup.total_amount + stmt.excluded.total_amount,
+                "outflow_amount": LedgerRollup.outflow_amount + stmt.excluded.outflow_amount,
+                "txn_count": LedgerRollup.txn_count + stmt.excluded.txn_count,
+            }
+        )
+        db.execute(stmt, rows)
+        return
+
+    # Generic fallback: read-modify-write under a row lock
+    for values in rows:
+        key = {name: values[name] for name in ROLLUP_KEY}
+        row = db.query(LedgerRollup).filter_by(**key).with_for_update().first()
+        if row is None:
+            db.add(LedgerRollup(**values))
+        else:
+            row.total_amount += values["total_amount"]
+            row.outflow_amount += values["outflow_amount"]
+            row.txn_count += values["txn_count"]
+
+def rebuild_rollups(db: Session, account_ids: Optional[List[int]] = None) -> int:
+    """
+    Recompute rollups from the transactions table, optionally for a subset of accounts.
+    Returns the number of rollup rows written. The caller commits.
+    """
+    delete_q = db.query(LedgerRollup)
+    if account_ids is not None:
+        delete_q = delete_q.filter(LedgerRollup.account_id.in_(account_ids))
+    delete_q.delete(synchronize_session=False)
+
+    year = cast(extract("year", Transaction.txn_date), Integer)
+    month = cast(extract("month", Transaction.txn_date), Integer)
+    category = func.coalesce(func.nullif(Transaction.category, ""), "Uncategorized")
+    merchant = func.coalesce(
+        func.nullif(Transaction.merchant, ""), func.nullif(Transaction.description, ""), "Unknown"
+    )
+    source = select(
+        Transaction.account_id, year, month, category, merchant, Transaction.txn_type,
+        func.coalesce(func.sum(Transaction.amount), 0),
+        func.coalesce(func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)), 0),
+        func.count(Transaction.id)
+    ).where(
+        Transaction.account_id.isnot(None),
+        Transaction.txn_date.isnot(None),
+        Transaction.txn_type.isnot(None),
+    ).group_by(Transaction.account_id, year, month, category, merchant, Transaction.txn_type)
+    if account_ids is not None:
+        source = source.where(Transaction.account_id.in_(account_ids))
+
+    result = db.execute(
+        insert(LedgerRollup).from_select(list(ROLLUP_KEY) + ["total_amount", "outflow_amount", "txn_count"], source)
+    )
+    return result.rowcount
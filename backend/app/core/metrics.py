@@ -0,0 +1,253 @@
+"""
+Prometheus metrics, served as text at GET /metrics when METRICS_ENABLED is
+set. The endpoint is guarded like /internal/*: scrapers send the
+X-Internal-Token header (INTERNAL_API_TOKEN), anyone else gets 404.
+
+A small in-process registry (counters, gauges, histograms) rendered in the
+Prometheus text exposition format, plus the collectors that feed it:
+
+    MetricsMiddleware   request latency by route template and status,
+                        in-flight requests, SQL statements per request
+    instrument_engine   statement latency by engine and operation, via
+                        SQLAlchemy cursor events
+    app/core/email.py   SMTP connect / send latency
+
+Recording a value is a bisect and a dict update under a lock, a few
+microseconds per request (benchmarks/bench_metrics.py), so it can stay on
+at full traffic. Values are per process: with several API workers,
+Prometheus scrapes each one.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import compile_path
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """
+    Label values are passed positionally, in labelnames order.
+    """
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{self._labels(labels)} {_format(value)}"
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> per-bucket counts (not cumulative), the +Inf count, then the sum
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = 'le="' + _format(bound) + '"'
+                yield f"{self.name}_bucket{self._labels(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{self._labels(labels)} {_format(values[-1])}"
+            yield f"{self.name}_count{self._labels(labels)} {cumulative}"
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+registry = Registry()
+
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests being served.", ["method"]))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the response body is sent.",
+    ["method", "route", "status"]))
+http_request_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request.",
+    ["method", "route"], buckets=QUERY_COUNT_BUCKETS))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement latency; an executemany is one statement.",
+    ["engine", "operation"], buckets=QUERY_LATENCY_BUCKETS))
+db_query_errors = registry.register(Counter(
+    "db_query_errors_total", "SQL statements that raised.", ["engine"]))
+smtp_duration = registry.register(Histogram(
+    "smtp_duration_seconds", "SMTP connect and send latency.", ["operation", "result"]))
+
+# Statement counter of the HTTP request being served, if any
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+# --- SQL statements ---
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+_first_word = re.compile(r"\s*(\w+)")
+
+def _operation(statement: str) -> str:
+    found = _first_word.match(statement)
+    operation = found.group(1).upper() if found else ""
+    # Bounded label values; WITH, PRAGMA, BEGIN, ... are "OTHER"
+    return operation if operation in OPERATIONS else "OTHER"
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Time every statement of a sync Engine (for an AsyncEngine, pass .sync_engine).
+    """
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        db_query_duration.observe(time.perf_counter() - context._metrics_started, name, _operation(statement))
+        queries = _request_queries.get()
+        # An executemany can reach the cursor in several batches with one context
+        if queries is not None and not getattr(context, "_metrics_counted", False):
+            context._metrics_counted = True
+            queries[0] += 1
+
+    def handle_error(exception_context):
+        db_query_errors.inc(name)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+# --- HTTP requests ---
+UNMATCHED_ROUTE = "unmatched" # 404s, so scanners cannot blow up the label set
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (BaseHTTPMiddleware would buffer streaming responses).
+    """
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[int, str] = {} # id(route) -> full path template; routes live as long as the app
+        self._paths: Optional[List[Tuple[re.Pattern, str]]] = None
+
+    def _route_template(self, scope) -> str:
+        route = scope.get("route")
+        if route is None:
+            return UNMATCHED_ROUTE
+        template = self._templates.get(id(route))
+        if template is None:
+            template = self._templates[id(route)] = self._find_template(scope, route)
+        return template
+
+    def _find_template(self, scope, route) -> str:
+        # Routes of included routers only know the path below their router's
+        # prefix, so look the full template up in the OpenAPI paths once per route.
+        if self._paths is None:
+            paths = scope["app"].openapi().get("paths", {})
+            self._paths = [(compile_path(path)[0], path) for path in paths]
+        relative = getattr(route, "path", None)
+        if relative is None:
+            return UNMATCHED_ROUTE
+        for regex, path in self._paths:
+            if path.endswith(relative) and regex.match(scope["path"]):
+                return path
+        return relative
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500 # unless the app starts a response
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        queries = [0]
+        token = _request_queries.set(queries)
+        http_requests_in_progress.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_progress.dec(method)
+            _request_queries.reset(token)
+            route = self._route_template(scope)
+            http_request_duration.observe(elapsed, method, route, str(status))
+            http_request_queries.observe(queries[0], method, route)
@@ -1,10 +1,21 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max rounds equal to the configured cost: verify_and_update() rehashes any
+# stored hash with a different cost factor on the next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,6 +23,40 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# --- PASSWORD HASHING POOL ---
+# bcrypt releases the GIL, so a dedicated thread pool scales with cores. It is
+# separate from the threadpool FastAPI uses for sync code, so a login burst
+# cannot starve other endpoints, and admission is capped so excess requests
+# fail fast with 503 instead of queueing behind seconds of hashing.
+class PasswordHashingBusy(Exception):
+    pass
+
+HASH_WORKERS = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+HASH_MAX_IN_FLIGHT = HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE
+
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_in_flight = 0 # only touched from the event loop thread
+
+async def _run_hashing(fn, *args):
+    global _hash_in_flight
+    if _hash_in_flight >= HASH_MAX_IN_FLIGHT:
+        raise PasswordHashingBusy()
+    _hash_in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_in_flight -= 1
+
+async def hash_password(password: str) -> str:
+    return await _run_hashing(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    (valid, new_hash). new_hash is set when the stored hash should be replaced,
+    e.g. after BCRYPT_ROUNDS changed.
+    """
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
 # --- 1. CREATE ACCESS TOKEN ---
 # Used for immediate API authorization (Short-lived)
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
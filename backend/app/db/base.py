@@ -1,4 +1,4 @@
 
 
 from app.db.base_class import Base  # noqa
-from app.models.banking import User, Account, Transaction, Budget, Bill, Reward, Alert
+from app.models.banking import User, Account, Transaction, Budget, Bill, Reward, Alert, LedgerRollup, EmailOutbox, IdempotencyRecord
@@ -0,0 +1,114 @@
+"""
+Connection-pool health and saturation metrics.
+
+Counters come from SQLAlchemy pool events on the engine. Wait time is measured
+by the pool class itself, because no event fires before a connection has been
+obtained.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.checked_out_peak = 0
+        self.overflow_peak = 0
+        self._engine: Optional[Engine] = None
+
+    # --- event handlers ---
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            in_use = self.checkouts - self.checkins
+            self.checked_out_peak = max(self.checked_out_peak, in_use)
+            overflow = self._overflow()
+            if overflow is not None:
+                self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def attach(self, engine: Engine) -> None:
+        self._engine = engine
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _overflow(self) -> Optional[int]:
+        pool = self._engine.pool if self._engine is not None else None
+        if pool is None or not hasattr(pool, "overflow"):
+            return None
+        return max(pool.overflow(), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            data = {
+                "pool": type(pool).__name__ if pool is not None else None,
+                "checked_out": self.checkouts - self.checkins,
+                "checked_out_peak": self.checked_out_peak,
+                "overflow": self._overflow(),
+                "overflow_peak": self.overflow_peak,
+                "checkouts_total": self.checkouts,
+                "connects_total": self.connects,
+                "invalidations_total": self.invalidations,
+                "timeouts_total": self.timeouts,
+                "wait_count": self.wait_count,
+                "wait_avg_ms": round(self.wait_total / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+        if pool is not None and hasattr(pool, "size"):
+            data["size"] = pool.size()
+            data["idle"] = pool.checkedin()
+        return data
+
+def instrumented_pool(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Subclass of a QueuePool-style class that times how long callers wait for a connection.
+    pool.recreate() reuses the class, so the metrics survive engine.dispose().
+    """
+    class InstrumentedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.record_wait(time.perf_counter() - started, timed_out=True)
+                raise
+            metrics.record_wait(time.perf_counter() - started)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
@@ -0,0 +1,89 @@
+"""
+N+1 and lazy-load detection, for development and tests.
+
+Strict loading (DB_STRICT_LOADING) adds raiseload("*") to every ORM query, so
+touching a relationship that was not loaded explicitly (selectinload,
+joinedload, ...) raises instead of quietly emitting another SELECT. Options
+naming a relationship still take precedence over the wildcard.
+
+The repeated-statement check (DB_REPEATED_QUERY_LIMIT) fingerprints every
+statement run inside a statement_scope() - each request's session, see
+app/api/deps.py - and logs, or raises with DB_REPEATED_QUERY_ACTION=raise,
+when one fingerprint runs more often than the limit: the shape of a query
+issued once per row. Fingerprints ignore bound values and IN-list lengths;
+an executemany is one statement.
+
+Both are off by default; benchmarks/bench_routes.py and tests/conftest.py turn
+them on.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class RepeatedQueryError(RuntimeError):
+    pass
+
+# --- strict loading ---
+def _raiseload_everything(state: ORMExecuteState) -> None:
+    # Column loads are refresh()/expired attributes, which have no relationships to guard
+    if state.is_select and not state.is_column_load:
+        state.statement = state.statement.options(raiseload("*"))
+
+def enable_strict_loading() -> None:
+    """
+    For every Session, including the ones behind AsyncSessions.
+    """
+    if not event.contains(Session, "do_orm_execute", _raiseload_everything):
+        event.listen(Session, "do_orm_execute", _raiseload_everything)
+
+# --- repeated statements ---
+# Expanded IN lists for the qmark (sqlite), pyformat (psycopg2) and numeric (asyncpg) styles
+_in_list = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+)\s*,)+\s*(?:\?|%\(\w+\)s|\$\d+)\s*\)")
+_statements: ContextVar[Optional[Counter]] = ContextVar("statements", default=None)
+
+def fingerprint(statement: str) -> str:
+    return _in_list.sub("(...)", statement)
+
+@contextmanager
+def statement_scope() -> Iterator[Counter]:
+    """
+    Count repeated statements run in this context (and the greenlets and
+    threads it spawns) until the block exits.
+    """
+    counts: Counter = Counter()
+    token = _statements.set(counts)
+    try:
+        yield counts
+    finally:
+        _statements.reset(token)
+
+def _check_repeats(conn, cursor, statement, parameters, context, executemany):
+    counts = _statements.get()
+    # An executemany can reach the cursor in several batches with one context
+    if counts is None or getattr(context, "_guard_counted", False):
+        return
+    context._guard_counted = True
+    key = fingerprint(statement)
+    counts[key] += 1
+    if counts[key] == settings.DB_REPEATED_QUERY_LIMIT + 1:
+        message = f"Statement ran more than {settings.DB_REPEATED_QUERY_LIMIT} times in one scope (N+1?): {key}"
+        if settings.DB_REPEATED_QUERY_ACTION == "raise":
+            raise RepeatedQueryError(message)
+        logger.warning(message)
+
+def detect_repeated_queries(engine: Engine) -> None:
+    """
+    Check statements of a sync Engine (for an AsyncEngine, pass .sync_engine).
+    """
+    event.listen(engine, "before_cursor_execute", _check_repeats)
@@ -1,6 +1,75 @@
+from typing import Any, Dict
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core import metrics
 from app.core.config import settings
+from app.db import query_guard
+from app.db.pool_metrics import PoolMetrics, instrumented_pool
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """
+    Same database as DATABASE_URL, with the asyncio driver for its dialect.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for '{backend}' databases")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def engine_options(url: str, metrics: PoolMetrics, use_async: bool = False) -> Dict[str, Any]:
+    """
+    create_engine()/create_async_engine() keyword arguments built from the DB_POOL_* settings.
+    """
+    parsed = make_url(url)
+    options: Dict[str, Any] = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if parsed.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        poolclass=instrumented_pool(AsyncAdaptedQueuePool if use_async else QueuePool, metrics),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS and parsed.get_backend_name() == "postgresql":
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+# Sync engine: create_all, Alembic, one-off scripts and background jobs
+sync_pool_metrics = PoolMetrics("sync")
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, sync_pool_metrics))
+sync_pool_metrics.attach(engine)
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(engine, "sync")
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: every API request. expire_on_commit=False because attributes
+# cannot be lazily refreshed after commit in async code.
+ASYNC_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_pool_metrics = PoolMetrics("async")
+async_engine = create_async_engine(ASYNC_URL, **engine_options(ASYNC_URL, async_pool_metrics, use_async=True))
+async_pool_metrics.attach(async_engine.sync_engine)
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+if settings.DB_STRICT_LOADING:
+    query_guard.enable_strict_loading()
+if settings.DB_REPEATED_QUERY_LIMIT:
+    query_guard.detect_repeated_queries(engine)
+    query_guard.detect_repeated_queries(async_engine.sync_engine)
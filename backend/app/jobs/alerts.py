@@ -0,0 +1,78 @@
+"""
+Periodic alert generator.
+
+Writes the alerts that depend on the date rather than on a write: bills
+entering the due-soon window or going overdue, and catches anything the
+event hooks missed (budgets over 80%, low balances). Each query only reads
+rows that currently qualify, and existing alerts are skipped by their
+dedupe_key, so re-runs are cheap.
+
+Usage (from backend/):
+    python -m app.jobs.alerts
+"""
+import logging
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.alerts import bill_alert, budget_alert, low_balance_alert, save_alerts
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.banking import Account, Bill, BillStatus, Budget
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+def _save_in_batches(db: Session, stmt, build) -> int:
+    count = 0
+    for rows in db.execute(stmt.execution_options(yield_per=BATCH_SIZE)).partitions():
+        save_alerts(db, (build(row) for row in rows))
+        count += len(rows)
+    return count
+
+def generate_alerts(db: Session, today: Optional[date] = None) -> Dict[str, float]:
+    """
+    Evaluate every qualifying bill, budget and account. Returns rows checked per kind. The caller commits.
+    """
+    today = today or date.today()
+    started = time.perf_counter()
+
+    bills = select(Bill.id, Bill.user_id, Bill.biller_name, Bill.amount_due, Bill.due_date, Bill.status).where(
+        Bill.status != BillStatus.paid,
+        Bill.due_date >= today - timedelta(days=settings.ALERTS_BILL_LOOKBACK_DAYS),
+        Bill.due_date <= today + timedelta(days=settings.BILL_DUE_SOON_DAYS),
+    )
+    budgets = select(Budget.id, Budget.user_id, Budget.category, Budget.limit_amount, Budget.spent_amount).where(
+        Budget.year == today.year,
+        Budget.month == today.month,
+        Budget.limit_amount > 0,
+        func.coalesce(Budget.spent_amount, 0) >= Budget.limit_amount * Decimal("0.8"),
+    )
+    accounts = select(Account.id, Account.user_id, Account.bank_name, Account.masked_account, Account.balance).where(
+        Account.balance < settings.LOW_BALANCE_THRESHOLD
+    )
+
+    return {
+        "bills": _save_in_batches(db, bills, lambda row: bill_alert(row, today)),
+        "budgets": _save_in_batches(db, budgets, budget_alert),
+        "accounts": _save_in_batches(db, accounts, lambda row: low_balance_alert(row, today)),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+def alerts_job() -> Dict[str, float]:
+    """
+    Scheduler entry point.
+    """
+    with SessionLocal() as db:
+        report = generate_alerts(db)
+        db.commit()
+    logger.info("Alerts checked: %s", report)
+    return report
+
+if __name__ == "__main__":
+    print(alerts_job())
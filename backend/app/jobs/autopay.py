@@ -0,0 +1,261 @@
+"""
+Bulk auto-pay.
+
+Pays every due auto-pay bill across all users, in chunks of
+AUTOPAY_CHUNK_SIZE bills per DB transaction. A bill is due when it is unpaid,
+has auto_pay on, its due date is today or earlier and its auto_pay_time
+("HH:MM") has passed. Each chunk applies the same side effects as
+PUT /bills/{id}/pay with a handful of set-based statements:
+
+    bills        status -> paid
+    accounts     balance -= amount, one UPDATE for the chunk
+    transactions one debit per bill, one batched INSERT
+    rollups      app.core.ledger.record_transactions, which also adds budget spend
+    rewards      1 point per 10 currency units
+    alerts       bill alerts resolved, low-balance alerts raised
+    events       new balances and points for GET /events/stream
+
+Bills are paid from the user's first account, like pay_bill without
+account_id. Bills of users with no account are left unpaid.
+
+Rows are locked with FOR UPDATE SKIP LOCKED, so several workers (or the
+scheduler plus POST /bills/check-autopay) never pay the same bill twice.
+The status UPDATE is also conditional on the bill being unpaid and only the
+bills it changed are debited, which covers databases without row locks
+(SQLite) and a concurrent PUT /bills/{id}/pay.
+
+Usage (from backend/):
+    python -m app.jobs.autopay --dry-run
+    python -m app.jobs.autopay --chunk-size 5000
+"""
+import argparse
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.alerts import alerts_for_accounts, bill_alert_keys, resolve_alerts
+from app.core.bills import invalidate_bills_summary
+from app.core.categorizer import bill_category
+from app.core.config import settings
+from app.core.events import queue_balance, queue_event, queue_points
+from app.core.ledger import record_transactions
+from app.db.session import SessionLocal
+from app.models.banking import Account, Bill, BillStatus, Reward, Transaction, TxnType
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AutopayReport:
+    dry_run: bool = False
+    chunks: int = 0
+    bills_paid: int = 0
+    amount_paid: Decimal = Decimal("0")
+    points_awarded: int = 0
+    seconds: float = 0.0
+    paid_bill_ids: List[int] = field(default_factory=list) # only filled for a single user
+    user_ids: Set[int] = field(default_factory=set)
+
+    @property
+    def bills_per_second(self) -> float:
+        return self.bills_paid / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        prefix = "[dry run] would pay" if self.dry_run else "paid"
+        return (f"{prefix} {self.bills_paid} bills ({self.amount_paid}) in {self.chunks} chunks, "
+                f"{self.points_awarded} points, {self.seconds:.2f}s ({self.bills_per_second:.0f} bills/s)")
+
+def _due_bills(now: datetime, after_id: int, limit: int, user_id: Optional[int]):
+    # Paying account per user: the first one, as in pay_bill without account_id
+    payer = (
+        select(Account.user_id, func.min(Account.id).label("account_id"))
+        .group_by(Account.user_id)
+        .subquery()
+    )
+    stmt = (
+        select(Bill.id, Bill.user_id, Bill.biller_name, Bill.amount_due, Account.id.label("account_id"), Account.currency)
+        .join(payer, payer.c.user_id == Bill.user_id)
+        .join(Account, Account.id == payer.c.account_id)
+        .where(
+            Bill.id > after_id,
+            or_(Bill.status == BillStatus.upcoming, Bill.status == BillStatus.overdue),
+            Bill.auto_pay == True,
+            Bill.due_date <= now.date(),
+            # Zero-padded "HH:MM" strings compare correctly as text; the bill
+            # schemas and migration 0009 normalise stored times to that form
+            func.length(Bill.auto_pay_time) == 5,
+            Bill.auto_pay_time <= now.strftime("%H:%M"),
+        )
+        .order_by(Bill.id)
+        .limit(limit)
+        .with_for_update(of=Bill, skip_locked=True)
+    )
+    if user_id is not None:
+        stmt = stmt.where(Bill.user_id == user_id)
+    return stmt
+
+def _pay_chunk(db: Session, bills: List) -> Tuple[List, int]:
+    """
+    Apply pay_bill side effects for one chunk. Returns the bills actually
+    paid (those still unpaid when updated) and the reward points awarded.
+    Stored timestamps are UTC, like pay_bill; `now` in run_autopay is local
+    wall-clock time because auto_pay_time is.
+    """
+    stamp = datetime.utcnow()
+    bill_ids = [b.id for b in bills]
+    changed = set(db.scalars(
+        update(Bill)
+        .where(Bill.id.in_(bill_ids), Bill.status != BillStatus.paid)
+        .values(status=BillStatus.paid, paid_at=stamp)
+        .returning(Bill.id),
+        execution_options={"synchronize_session": False},
+    ))
+    bills = [b for b in bills if b.id in changed]
+    if not bills:
+        return bills, 0
+
+    debits: Dict[int, Decimal] = {}
+    points: Dict[int, int] = {}
+    txns = []
+    for b in bills:
+        debits[b.account_id] = debits.get(b.account_id, Decimal("0")) + b.amount_due
+        points[b.user_id] = points.get(b.user_id, 0) + int(b.amount_due // 10)
+        txns.append({
+            "account_id": b.account_id,
+            "description": f"Bill Payment: {b.biller_name}",
+            "category": bill_category(b.biller_name),
+            "amount": -b.amount_due,
+            "currency": b.currency,
+            "txn_type": TxnType.debit,
+            "merchant": b.biller_name,
+            "txn_date": stamp,
+        })
+
+    # executemany through the Core connection: Session.execute() would treat a
+    # list of parameters as an ORM bulk operation, which is slower and, for
+    # UPDATE, keyed on primary keys only
+    conn = db.connection()
+    conn.execute(
+        update(Account)
+        .where(Account.id == bindparam("b_account_id"))
+        .values(balance=Account.balance - bindparam("b_amount")),
+        [{"b_account_id": account_id, "b_amount": amount} for account_id, amount in debits.items()],
+    )
+    conn.execute(insert(Transaction), txns)
+    record_transactions(db, txns)
+    resolve_alerts(db, {b.user_id for b in bills}, [key for b in bills for key in bill_alert_keys(b.id)])
+    alerts_for_accounts(db, debits)
+
+    points = {user_id: p for user_id, p in points.items() if p > 0}
+    if points:
+        has_reward = set(db.scalars(select(Reward.user_id).where(Reward.user_id.in_(list(points)))))
+        missing = [uid for uid in points if uid not in has_reward]
+        if missing:
+            conn.execute(insert(Reward), [
+                {"user_id": uid, "program_name": "Gold Rewards", "points_balance": 0, "last_updated": stamp}
+                for uid in missing
+            ])
+        # pay_bill credits the user's first rewards row
+        first_reward = (
+            select(func.min(Reward.id))
+            .where(Reward.user_id == bindparam("b_user_id"))
+            .scalar_subquery()
+        )
+        conn.execute(
+            update(Reward)
+            .where(Reward.id == first_reward)
+            .values(points_balance=Reward.points_balance + bindparam("b_points")),
+            [{"b_user_id": uid, "b_points": p} for uid, p in points.items()],
+        )
+    _queue_events(db, bills, debits, points)
+    return bills, sum(points.values())
+
+def _queue_events(db: Session, bills: List, debits: Dict[int, Decimal], points: Dict[int, int]) -> None:
+    # Balances are re-read: the UPDATE applied several bills per account
+    for account in db.execute(
+        select(Account.id, Account.user_id, Account.balance).where(Account.id.in_(list(debits)))
+    ):
+        queue_balance(db, account.user_id, account.id, account.balance)
+    if points:
+        first_rewards = select(func.min(Reward.id)).where(Reward.user_id.in_(list(points))).group_by(Reward.user_id)
+        for reward in db.execute(select(Reward.user_id, Reward.points_balance).where(Reward.id.in_(first_rewards))):
+            queue_points(db, reward.user_id, reward.points_balance)
+    paid: Dict[int, List[int]] = {}
+    for b in bills:
+        paid.setdefault(b.user_id, []).append(b.id)
+    for user_id, bill_ids in paid.items():
+        queue_event(db, user_id, "bills", {"bill_ids": bill_ids, "status": BillStatus.paid.value})
+
+def run_autopay(
+    db: Session,
+    *,
+    user_id: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+) -> AutopayReport:
+    """
+    Pay all due auto-pay bills, committing after every chunk.
+    With dry_run the chunks are rolled back instead and the report shows what would be paid.
+    """
+    chunk_size = chunk_size or settings.AUTOPAY_CHUNK_SIZE
+    now = now or datetime.now()
+    report = AutopayReport(dry_run=dry_run)
+    started = time.perf_counter()
+
+    after_id = 0
+    while True:
+        due = db.execute(_due_bills(now, after_id, chunk_size, user_id)).all()
+        if not due:
+            break
+        after_id = due[-1].id
+
+        bills, points = _pay_chunk(db, due)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+
+        report.chunks += 1
+        report.bills_paid += len(bills)
+        report.amount_paid += sum((b.amount_due for b in bills), Decimal("0"))
+        report.points_awarded += points
+        if not dry_run:
+            report.user_ids.update(b.user_id for b in bills)
+        if user_id is not None:
+            report.paid_bill_ids.extend(b.id for b in bills)
+        if len(due) < chunk_size:
+            break
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+def autopay_job() -> Optional[AutopayReport]:
+    """
+    Scheduler entry point.
+    """
+    with SessionLocal() as db:
+        report = run_autopay(db)
+    invalidate_bills_summary(report.user_ids)
+    if report.bills_paid:
+        logger.info("Auto-pay: %s", report)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be paid without committing")
+    parser.add_argument("--chunk-size", type=int, default=settings.AUTOPAY_CHUNK_SIZE)
+    parser.add_argument("--user-id", type=int, help="Only this user's bills")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        report = run_autopay(db, user_id=args.user_id, chunk_size=args.chunk_size, dry_run=args.dry_run)
+    print(report)
+
+if __name__ == "__main__":
+    main()
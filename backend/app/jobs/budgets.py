@@ -0,0 +1,143 @@
+"""
+Budget reconciliation.
+
+Recomputes Budget.spent_amount from the transactions table in one grouped
+query and reports budgets whose tracked spend drifted from the ledger (e.g.
+rows written by scripts that bypass app.core.ledger.record_transactions).
+Drifted budgets are corrected unless run as a dry run.
+
+Usage (from backend/):
+    python -m app.jobs.budgets --dry-run
+    python -m app.jobs.budgets --months 0      # every budget, not just recent months
+"""
+import argparse
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.alerts import alerts_for_budgets
+from app.core.budgets import spend_by_budget_key
+from app.core.config import settings
+from app.core.events import queue_event
+from app.db.session import SessionLocal
+from app.models.banking import Budget
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal("0.01")
+
+@dataclass
+class ReconcileReport:
+    dry_run: bool = False
+    budgets: int = 0
+    drifted: int = 0
+    total_drift: Decimal = Decimal("0") # sum of |tracked - ledger|
+    seconds: float = 0.0
+    samples: List[Tuple[int, Decimal, Decimal]] = field(default_factory=list) # (budget_id, tracked, ledger)
+
+    def __str__(self) -> str:
+        action = "found" if self.dry_run else "fixed"
+        return (f"checked {self.budgets} budgets, {action} {self.drifted} drifted "
+                f"(total {self.total_drift}) in {self.seconds * 1000:.1f} ms")
+
+def _first_month(today: date, months: int) -> date:
+    index = today.year * 12 + today.month - 1 - (months - 1)
+    return date(index // 12, index % 12 + 1, 1)
+
+def reconcile_budgets(
+    db: Session,
+    *,
+    months: Optional[int] = None,
+    dry_run: bool = False,
+    today: Optional[date] = None,
+) -> ReconcileReport:
+    """
+    Compare budgets of the last `months` months (0 = all) with the ledger and fix drift.
+    Commits, or rolls back with dry_run.
+    """
+    months = settings.BUDGET_RECONCILE_MONTHS if months is None else months
+    today = today or date.today()
+    report = ReconcileReport(dry_run=dry_run)
+    started = time.perf_counter()
+
+    since = _first_month(today, months) if months > 0 else None
+    spend = spend_by_budget_key(datetime.combine(since, datetime.min.time()) if since else None)
+    stmt = (
+        select(Budget.id, Budget.spent_amount, func.coalesce(spend.c.spent, 0).label("ledger"))
+        .outerjoin(spend, and_(
+            spend.c.user_id == Budget.user_id,
+            spend.c.year == Budget.year,
+            spend.c.month == Budget.month,
+            spend.c.category == Budget.category,
+        ))
+        # Locked so no increment lands between the comparison and the fix
+        .with_for_update(of=Budget)
+    )
+    if since:
+        stmt = stmt.where(Budget.year * 100 + Budget.month >= since.year * 100 + since.month)
+
+    fixes = []
+    for row in db.execute(stmt):
+        report.budgets += 1
+        tracked = Decimal(str(row.spent_amount or 0)).quantize(CENT)
+        ledger = Decimal(str(row.ledger)).quantize(CENT)
+        if tracked != ledger:
+            report.drifted += 1
+            report.total_drift += abs(tracked - ledger)
+            if len(report.samples) < 10:
+                report.samples.append((row.id, tracked, ledger))
+            fixes.append({"b_id": row.id, "b_spent": ledger})
+
+    if fixes and not dry_run:
+        db.connection().execute(
+            update(Budget).where(Budget.id == bindparam("b_id")).values(spent_amount=bindparam("b_spent")),
+            fixes,
+        )
+        fixed = db.execute(
+            select(Budget.id, Budget.user_id, Budget.category, Budget.limit_amount, Budget.spent_amount)
+            .where(Budget.id.in_([f["b_id"] for f in fixes]))
+        ).all()
+        for budget in fixed:
+            queue_event(db, budget.user_id, "budget", {"budget_id": budget.id, "spent_amount": budget.spent_amount})
+        alerts_for_budgets(db, fixed)
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    report.seconds = time.perf_counter() - started
+    return report
+
+def budget_reconcile_job() -> ReconcileReport:
+    """
+    Scheduler entry point.
+    """
+    with SessionLocal() as db:
+        report = reconcile_budgets(db)
+    if report.drifted:
+        logger.warning("Budget reconcile: %s, e.g. %s", report, report.samples)
+    else:
+        logger.info("Budget reconcile: %s", report)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+    parser.add_argument("--months", type=int, default=settings.BUDGET_RECONCILE_MONTHS,
+                        help="Only budgets of the last N months; 0 checks every budget")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        report = reconcile_budgets(db, months=args.months, dry_run=args.dry_run)
+    print(report)
+    for budget_id, tracked, ledger in report.samples:
+        print(f"  budget {budget_id}: tracked {tracked}, ledger {ledger}")
+
+if __name__ == "__main__":
+    main()
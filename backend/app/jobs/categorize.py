@@ -0,0 +1,120 @@
+"""
+Categorization backfill.
+
+Runs app.core.categorizer over stored transactions, e.g. rows written by
+scripts without a category, or everything after CATEGORY_RULES changed.
+Only rows a rule matches are updated. Each batch is updated with one
+executemany and committed together with rebuilt ledger rollups for the
+accounts it touched; budgets are reconciled once at the end.
+
+Usage (from backend/):
+    python -m app.jobs.categorize --dry-run
+    python -m app.jobs.categorize --all     # debits already categorized too (not transfers)
+"""
+import argparse
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.categorizer import TRANSFER_CATEGORY, categorize
+from app.core.config import settings
+from app.core.ledger import rebuild_rollups
+from app.db.session import SessionLocal
+from app.jobs.budgets import reconcile_budgets
+from app.models.banking import Transaction, TxnType
+
+logger = logging.getLogger(__name__)
+
+UNCATEGORIZED = ("", "Uncategorized")
+
+@dataclass
+class BackfillReport:
+    dry_run: bool = False
+    scanned: int = 0
+    changed: int = 0
+    budgets_fixed: int = 0
+    seconds: float = 0.0
+    categories: Dict[str, int] = field(default_factory=Counter) # new category -> rows
+
+    def __str__(self) -> str:
+        action = "would change" if self.dry_run else "changed"
+        return (f"scanned {self.scanned} transactions, {action} {self.changed} "
+                f"({dict(self.categories)}), fixed {self.budgets_fixed} budgets in {self.seconds:.1f}s")
+
+def backfill_categories(
+    db: Session,
+    *,
+    recategorize_all: bool = False,
+    dry_run: bool = False,
+    batch_size: Optional[int] = None,
+) -> BackfillReport:
+    """
+    Categorize transactions in id order, batch_size rows per DB transaction. Commits
+    each batch, or rolls back with dry_run.
+    """
+    batch_size = batch_size or settings.CATEGORY_BACKFILL_BATCH_SIZE
+    report = BackfillReport(dry_run=dry_run)
+    started = time.perf_counter()
+
+    stmt = select(Transaction.id, Transaction.account_id, Transaction.merchant, Transaction.description, Transaction.category)
+    if recategorize_all:
+        stmt = stmt.where(Transaction.txn_type == TxnType.debit, Transaction.category != TRANSFER_CATEGORY)
+    else:
+        stmt = stmt.where(or_(Transaction.category.is_(None), Transaction.category.in_(UNCATEGORIZED)))
+
+    last_id = 0
+    while True:
+        rows = db.execute(stmt.where(Transaction.id > last_id).order_by(Transaction.id).limit(batch_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        report.scanned += len(rows)
+
+        changes = []
+        accounts = set()
+        for row in rows:
+            category = categorize(row.merchant) or categorize(row.description)
+            if category and category != row.category:
+                changes.append({"b_id": row.id, "b_category": category})
+                accounts.add(row.account_id)
+                report.categories[category] += 1
+        report.changed += len(changes)
+
+        if changes and not dry_run:
+            db.connection().execute(
+                update(Transaction).where(Transaction.id == bindparam("b_id")).values(category=bindparam("b_category")),
+                changes,
+            )
+            # Rollups are keyed by category
+            rebuild_rollups(db, sorted(accounts))
+            db.commit()
+        else:
+            db.rollback()
+
+    if report.changed and not dry_run:
+        # Budget spend is keyed by category too
+        report.budgets_fixed = reconcile_budgets(db, months=0).drifted
+    report.seconds = time.perf_counter() - started
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", dest="recategorize_all",
+                        help="Recategorize every debit except transfers, not just uncategorized rows")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    parser.add_argument("--batch-size", type=int, default=settings.CATEGORY_BACKFILL_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        report = backfill_categories(
+            db, recategorize_all=args.recategorize_all, dry_run=args.dry_run, batch_size=args.batch_size
+        )
+    print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Email outbox worker.
+
+Claims due EmailOutbox rows, sends them over a single SMTP connection per
+batch and records the outcome. Failed sends are retried with exponential
+backoff until EMAIL_OUTBOX_MAX_ATTEMPTS. 5xx rejections are not retried.
+
+The scheduler (app/jobs/scheduler.py) calls drain() every
+EMAIL_OUTBOX_POLL_SECONDS. To try it against a local SMTP stand-in:
+
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_STARTTLS=false MAIL_USE_CREDENTIALS=false \
+        python -m app.jobs.email_outbox
+
+tests/test_email_outbox.py runs delivery against an in-process aiosmtpd sink.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import aiosmtplib
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.email import connect_smtp, send_email
+from app.db.session import AsyncSessionLocal
+from app.models.banking import EmailOutbox, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+SmtpConnector = Callable[[], Awaitable[aiosmtplib.SMTP]]
+
+async def claim_batch(db: AsyncSession, limit: int) -> List[EmailOutbox]:
+    """
+    Lock due rows (skipping rows another worker holds) and lease them by pushing
+    next_attempt_at forward. If this process dies mid-send the lease expires and
+    the rows are picked up again.
+    """
+    now = datetime.utcnow()
+    rows = (await db.scalars(
+        select(EmailOutbox)
+        .where(EmailOutbox.status == OutboxStatus.pending, EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )).all()
+    for row in rows:
+        row.attempts += 1
+        row.next_attempt_at = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS)
+    await db.commit()
+    return rows
+
+def is_permanent(error: Exception) -> bool:
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, aiosmtplib.SMTPResponseException) and error.code >= 500
+
+def backoff(attempts: int) -> timedelta:
+    seconds = settings.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS))
+
+async def send_all(rows: List[EmailOutbox], connect: SmtpConnector) -> Dict[int, Optional[Exception]]:
+    """
+    Send rows over one connection, reconnecting if the server drops it.
+    Returns row id -> None on success or the exception. Any exception is
+    recorded against its row, so one bad row cannot abort the batch and get
+    mail that was already sent re-sent once the lease expires.
+    """
+    outcomes: Dict[int, Optional[Exception]] = {}
+    smtp: Optional[aiosmtplib.SMTP] = None
+    try:
+        for row in rows:
+            if smtp is None or not smtp.is_connected:
+                try:
+                    smtp = await connect()
+                except Exception as e:
+                    # Server unreachable: the rest of the batch would fail the same way
+                    for pending in rows:
+                        outcomes.setdefault(pending.id, e)
+                    return outcomes
+            try:
+                await send_email(smtp, row)
+                outcomes[row.id] = None
+            except (aiosmtplib.SMTPException, OSError) as e:
+                outcomes[row.id] = e
+            except Exception as e:
+                # Not a delivery problem (a malformed row, a client bug): retried until the attempts cap
+                logger.exception("Unexpected error sending email %s", row.id)
+                outcomes[row.id] = e
+    finally:
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except Exception:
+                smtp.close()
+    return outcomes
+
+async def deliver_batch(limit: Optional[int] = None, connect: SmtpConnector = connect_smtp) -> Dict[str, int]:
+    """
+    Claim, send and record one batch. Returns counts by outcome.
+    """
+    stats = {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0}
+    async with AsyncSessionLocal() as db:
+        rows = await claim_batch(db, limit or settings.EMAIL_OUTBOX_BATCH_SIZE)
+        if not rows:
+            return stats
+        stats["claimed"] = len(rows)
+
+        outcomes = await send_all(rows, connect)
+        now = datetime.utcnow()
+        for row in rows:
+            error = outcomes.get(row.id)
+            if error is None:
+                row.status = OutboxStatus.sent
+                row.sent_at = now
+                row.last_error = None
+                stats["sent"] += 1
+                continue
+            row.last_error = f"{type(error).__name__}: {error}"[:2000]
+            if is_permanent(error) or row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                row.status = OutboxStatus.failed
+                stats["failed"] += 1
+                logger.warning("Giving up on email %s to %s: %s", row.id, row.recipient, row.last_error)
+            else:
+                row.next_attempt_at = now + backoff(row.attempts)
+                stats["retrying"] += 1
+        await db.commit()
+    return stats
+
+async def drain(connect: SmtpConnector = connect_smtp) -> Dict[str, int]:
+    """
+    Deliver batches until no due rows are left.
+    """
+    totals = {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0}
+    while True:
+        stats = await deliver_batch(connect=connect)
+        for key, value in stats.items():
+            totals[key] += value
+        if stats["claimed"] < settings.EMAIL_OUTBOX_BATCH_SIZE:
+            return totals
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(drain()))
@@ -0,0 +1,25 @@
+"""
+Purges expired Idempotency-Key records (see app.core.idempotency).
+
+Usage (from backend/):
+    python -m app.jobs.idempotency
+"""
+import logging
+
+from app.core.idempotency import purge_expired
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+def purge_idempotency_keys_job() -> int:
+    """
+    Scheduler entry point.
+    """
+    with SessionLocal() as db:
+        deleted = purge_expired(db)
+    if deleted:
+        logger.info("Purged %d expired idempotency keys", deleted)
+    return deleted
+
+if __name__ == "__main__":
+    print(f"Purged {purge_idempotency_keys_job()} expired idempotency keys")
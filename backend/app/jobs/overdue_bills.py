@@ -0,0 +1,87 @@
+"""
+Overdue bill sweeper.
+
+Flips unpaid bills whose due date has passed from upcoming to overdue with
+batched UPDATE ... RETURNING statements, so read endpoints never write.
+
+Usage (from backend/):
+    python -m app.jobs.overdue_bills
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional, Set
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.bills import invalidate_bills_summary
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.banking import Bill, BillStatus
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SweepReport:
+    rows: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    user_ids: Set[int] = field(default_factory=set)
+
+    def __str__(self) -> str:
+        return (f"marked {self.rows} bills overdue for {len(self.user_ids)} users "
+                f"in {self.batches} batches, {self.seconds * 1000:.1f} ms")
+
+def sweep_overdue_bills(db: Session, today: Optional[date] = None, batch_size: Optional[int] = None) -> SweepReport:
+    """
+    Mark past-due upcoming bills overdue, committing after every batch.
+    """
+    today = today or date.today()
+    batch_size = batch_size or settings.OVERDUE_SWEEP_BATCH_SIZE
+    report = SweepReport()
+    started = time.perf_counter()
+
+    while True:
+        batch = (
+            select(Bill.id)
+            .where(Bill.status == BillStatus.upcoming, Bill.due_date < today)
+            .order_by(Bill.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        user_ids = db.scalars(
+            update(Bill)
+            .where(Bill.id.in_(batch))
+            .values(status=BillStatus.overdue)
+            .returning(Bill.user_id),
+            execution_options={"synchronize_session": False},
+        ).all()
+        db.commit()
+
+        if not user_ids:
+            break
+        report.batches += 1
+        report.rows += len(user_ids)
+        report.user_ids.update(user_ids)
+        if len(user_ids) < batch_size:
+            break
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+def overdue_bills_job() -> SweepReport:
+    """
+    Scheduler entry point.
+    """
+    with SessionLocal() as db:
+        report = sweep_overdue_bills(db)
+    invalidate_bills_summary(report.user_ids)
+    logger.info("Overdue sweep: %s", report)
+    return report
+
+if __name__ == "__main__":
+    with SessionLocal() as db:
+        print(sweep_overdue_bills(db))
@@ -0,0 +1,83 @@
+"""
+In-process scheduler for periodic background jobs.
+
+app/main.py starts it with the API when BACKGROUND_JOBS_ENABLED is set. With
+several API worker processes, enable it on one of them only, or disable it
+everywhere and run the jobs as their own process:
+
+    python -m app.jobs.scheduler
+"""
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, List
+
+from app.core import events
+from app.core.config import settings
+from app.jobs import alerts, autopay, budgets, email_outbox, idempotency, overdue_bills
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval: float # seconds between the end of one run and the start of the next
+    func: Callable[[], Any] # coroutine function, or a plain function run in a thread
+
+class Scheduler:
+    def __init__(self):
+        self.jobs: List[PeriodicJob] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add(self, name: str, interval: float, func: Callable[[], Any]) -> None:
+        self.jobs.append(PeriodicJob(name, interval, func))
+
+    async def run_once(self, job: PeriodicJob) -> Any:
+        if inspect.iscoroutinefunction(job.func):
+            return await job.func()
+        # Sync jobs use the blocking engine; keep them off the event loop
+        return await asyncio.to_thread(job.func)
+
+    async def _loop(self, job: PeriodicJob) -> None:
+        while True:
+            try:
+                result = await self.run_once(job)
+                logger.debug("Job %s: %s", job.name, result)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job %s failed", job.name)
+            await asyncio.sleep(job.interval)
+
+    def start(self) -> None:
+        for job in self.jobs:
+            self._tasks.append(asyncio.create_task(self._loop(job), name=f"job:{job.name}"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+scheduler = Scheduler()
+scheduler.add("email_outbox", settings.EMAIL_OUTBOX_POLL_SECONDS, email_outbox.drain)
+scheduler.add("autopay", settings.AUTOPAY_INTERVAL_SECONDS, autopay.autopay_job)
+scheduler.add("overdue_bills", settings.OVERDUE_SWEEP_INTERVAL_SECONDS, overdue_bills.overdue_bills_job)
+scheduler.add("alerts", settings.ALERTS_INTERVAL_SECONDS, alerts.alerts_job)
+scheduler.add("budget_reconcile", settings.BUDGET_RECONCILE_INTERVAL_SECONDS, budgets.budget_reconcile_job)
+scheduler.add("idempotency_purge", settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS, idempotency.purge_idempotency_keys_job)
+
+async def run_forever() -> None:
+    # Job events only reach API workers through a shared broker (EVENTS_REDIS_URL)
+    events.bind_loop(asyncio.get_running_loop())
+    scheduler.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await scheduler.stop()
+        await events.broker.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_forever())
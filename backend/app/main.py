@@ -1,13 +1,32 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.api import deps
 from app.api.v1.api import api_router
 from app.db.base import Base
+from app.core import events, metrics
+from app.core.config import settings
+from app.core.security import PasswordHashingBusy
 from app.db.session import engine
+from app.jobs.scheduler import scheduler
 
 # Create Database Tables
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Modern Banking Dashboard")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Commits on job threads publish their events onto this loop
+    events.bind_loop(asyncio.get_running_loop())
+    # Background jobs (email outbox, ...) run alongside the API unless disabled
+    if settings.BACKGROUND_JOBS_ENABLED:
+        scheduler.start()
+    yield
+    await scheduler.stop()
+    await events.broker.close()
+
+app = FastAPI(title="Modern Banking Dashboard", lifespan=lifespan)
 
 # --- CORS: ALLOW EVERYTHING (For Debugging) ---
 app.add_middleware(
@@ -16,11 +35,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # keyset pagination cursor for /transactions/all and /alerts/list; replayed idempotent responses
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
 # ----------------------------------------------
 
+# Outermost, so latency includes every other middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-in requests, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/")
 def root():
-    return {"message": "Banking API is running"}
\ No newline at end of file
+    return {"message": "Banking API is running"}
+
+if settings.METRICS_ENABLED:
+    # Operators only, like /internal/*: scrapers send the X-Internal-Token header
+    @app.get("/metrics", include_in_schema=False, dependencies=[Depends(deps.require_internal_token)])
+    async def read_metrics():
+        return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
\ No newline at end of file
@@ -1 +1 @@
-from .banking import User, Account, Transaction, Budget, Bill, Reward, Alert
\ No newline at end of file
+from .banking import User, Account, Transaction, Budget, Bill, Reward, Alert, LedgerRollup, EmailOutbox, IdempotencyRecord
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Enum, DateTime, Boolean, TEXT, DATE
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Enum, DateTime, Boolean, TEXT, DATE, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
@@ -32,6 +32,15 @@ class AlertType(str, enum.Enum):
     reward_redeemed = "reward_redeemed"
     general = "general" # Adding general as well for safety
 
+class IdempotencyStatus(str, enum.Enum):
+    in_progress = "in_progress"
+    completed = "completed"
+
+class OutboxStatus(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
 # --- MODELS ---
 
 class User(Base):
@@ -55,7 +64,7 @@ class User(Base):
 class Account(Base):
     __tablename__ = "accounts"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     bank_name = Column(String)
     account_type = Column(Enum(AccountType))
     masked_account = Column(String)
@@ -65,10 +74,17 @@ class Account(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     owner = relationship("User", back_populates="accounts")
-    transactions = relationship("Transaction", back_populates="account", cascade="all, delete-orphan")
+    # passive_deletes: never load a whole ledger to delete it, see accounts.delete_account
+    transactions = relationship("Transaction", back_populates="account", cascade="all, delete-orphan", passive_deletes=True)
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_account_date", "account_id", "txn_date"),
+        Index("ix_transactions_account_type_date", "account_id", "txn_type", "txn_date"),
+        # Statement imports skip rows already imported into the account; NULLs never collide
+        Index("uq_transactions_account_import_hash", "account_id", "import_hash", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     account_id = Column(Integer, ForeignKey("accounts.id"))
     description = Column(String)
@@ -78,11 +94,37 @@ class Transaction(Base):
     txn_type = Column(Enum(TxnType))
     merchant = Column(String)
     txn_date = Column(DateTime, default=datetime.utcnow)
+    import_hash = Column(String(64), nullable=True) # set by app.core.imports
     
     account = relationship("Account", back_populates="transactions")
 
+class LedgerRollup(Base):
+    """
+    Monthly per-account totals of the transactions ledger.
+    Maintained by app.core.ledger in the same DB transaction as the Transaction insert.
+    """
+    __tablename__ = "ledger_monthly_rollups"
+    __table_args__ = (
+        UniqueConstraint("account_id", "year", "month", "category", "merchant", "txn_type", name="uq_ledger_rollup_key"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    category = Column(String, nullable=False) # "Uncategorized" when the transaction has none
+    merchant = Column(String, nullable=False) # merchant, else description, else "Unknown"
+    txn_type = Column(Enum(TxnType), nullable=False)
+    total_amount = Column(Numeric(precision=14, scale=2), nullable=False, default=0)
+    # Sum of the negative amounts only: spending totals must not be reduced by
+    # refunds or reversals booked as positive debits. Inflow is total - outflow.
+    outflow_amount = Column(Numeric(precision=14, scale=2), nullable=False, default=0, server_default="0")
+    txn_count = Column(Integer, nullable=False, default=0)
+
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        Index("ix_budgets_user_year_month", "user_id", "year", "month"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     month = Column(Integer)
@@ -96,6 +138,10 @@ class Budget(Base):
 
 class Bill(Base):
     __tablename__ = "bills"
+    __table_args__ = (
+        Index("ix_bills_user_status_due", "user_id", "status", "due_date"),
+        Index("ix_bills_status_due", "status", "due_date"), # overdue sweeper, auto-pay
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     biller_name = Column(String)
@@ -104,6 +150,7 @@ class Bill(Base):
     status = Column(Enum(BillStatus), default=BillStatus.upcoming)
     auto_pay = Column(Boolean, default=False)
     auto_pay_time = Column(String, nullable=True)
+    paid_at = Column(DateTime, nullable=True) # set when status becomes paid
     created_at = Column(DateTime, default=datetime.utcnow)
     
     owner = relationship("User", back_populates="bills")
@@ -111,7 +158,7 @@ class Bill(Base):
 class Reward(Base):
     __tablename__ = "rewards"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     program_name = Column(String)
     points_balance = Column(Integer, default=0)
     last_updated = Column(DateTime, default=datetime.utcnow)
@@ -120,10 +167,22 @@ class Reward(Base):
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        # At most one alert per (user, dedupe_key); NULL keys never collide
+        Index("uq_alerts_user_dedupe_key", "user_id", "dedupe_key", unique=True),
+        Index("ix_alerts_user_id_id", "user_id", "id"), # cursor pagination
+        Index("ix_alerts_user_read", "user_id", "is_read"), # unread count
+    )
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     type = Column(Enum(AlertType))
+    severity = Column(String, default="info") # critical, warning, info, success
+    category = Column(String, nullable=True) # UI grouping, e.g. "Bill Due"
+    title = Column(String, nullable=True)
     message = Column(TEXT)
+    link = Column(String, nullable=True) # deep link to the resource
+    dedupe_key = Column(String, nullable=True) # e.g. "bill_overdue:42", see app.core.alerts
+    is_read = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     owner = relationship("User", back_populates="alerts")
@@ -131,7 +190,7 @@ class Alert(Base):
 class Goal(Base):
     __tablename__ = "savings_goals"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     name = Column(String)
     target_amount = Column(Numeric(precision=12, scale=2))
     current_amount = Column(Numeric(precision=12, scale=2), default=0.0)
@@ -144,7 +203,7 @@ class Goal(Base):
 class RedeemedReward(Base):
     __tablename__ = "redeemed_rewards"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     item_name = Column(String)
     code = Column(String)
     redeemed_at = Column(DateTime, default=datetime.utcnow)
@@ -152,6 +211,48 @@ class RedeemedReward(Base):
     
     owner = relationship("User", back_populates="redeemed_rewards")
 
+class EmailOutbox(Base):
+    """
+    Queued outgoing email. Endpoints insert rows in their own DB transaction;
+    app.jobs.email_outbox delivers them and retries with backoff.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(TEXT, nullable=False) # HTML
+    status = Column(Enum(OutboxStatus), nullable=False, default=OutboxStatus.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(TEXT, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+class IdempotencyRecord(Base):
+    """
+    Stored result of a mutating request sent with an Idempotency-Key header,
+    see app.core.idempotency.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("uq_idempotency_keys_scope_key", "scope", "key", unique=True),
+        Index("ix_idempotency_keys_expires_at", "expires_at"), # purge job
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False) # caller identity, e.g. "uid:42"
+    key = Column(String, nullable=False)
+    fingerprint = Column(String(64), nullable=False) # sha256 of method, path and body
+    status = Column(Enum(IdempotencyStatus), nullable=False, default=IdempotencyStatus.in_progress)
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(TEXT, nullable=True)
+    content_type = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True) # another request may take over an in-progress key after this
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 # Update User relationship
 User.goals = relationship("Goal", back_populates="owner", cascade="all, delete-orphan")
 User.redeemed_rewards = relationship("RedeemedReward", back_populates="owner", cascade="all, delete-orphan")
\ No newline at end of file
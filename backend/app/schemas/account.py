@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from app.models.banking import AccountType
 
@@ -26,3 +26,13 @@ class AccountInDBBase(AccountBase):
 
 class Account(AccountInDBBase):
     pass
+
+class StatementImport(BaseModel):
+    format: str
+    rows: int
+    inserted: int
+    duplicates: int
+    errors: int
+    batches: int
+    seconds: float
+    error_samples: List[str] = []
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional
 from datetime import date, datetime
 from enum import Enum
@@ -16,8 +16,22 @@ class BillBase(BaseModel):
     auto_pay: bool = False
     auto_pay_time: Optional[str] = None
 
+def normalize_auto_pay_time(value: Optional[str]) -> Optional[str]:
+    """
+    Store auto_pay_time as zero-padded "HH:MM", which the auto-pay job compares as text.
+    Accepts "9:05" and "09:05:00" as well.
+    """
+    if value is None or not value.strip():
+        return None
+    for fmt in ("%H:%M", "%H:%M:%S"):
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime("%H:%M")
+        except ValueError:
+            pass
+    raise ValueError("auto_pay_time must be a time of day as HH:MM")
+
 class BillCreate(BillBase):
-    pass
+    _auto_pay_time = field_validator("auto_pay_time")(normalize_auto_pay_time)
 
 class BillUpdate(BaseModel):
     biller_name: Optional[str] = None
@@ -27,9 +41,12 @@ class BillUpdate(BaseModel):
     auto_pay: Optional[bool] = None
     auto_pay_time: Optional[str] = None
 
+    _auto_pay_time = field_validator("auto_pay_time")(normalize_auto_pay_time)
+
 class BillInDBBase(BillBase):
     id: int
     user_id: int
+    paid_at: Optional[datetime] = None
     created_at: datetime
 
     class Config:
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -18,4 +18,27 @@ class TransactionResponse(BaseModel):
     txn_date: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BatchTransferItem(BaseModel):
+    recipient_email: str
+    amount: Decimal
+    description: Optional[str] = None
+
+class BatchTransferRequest(BaseModel):
+    items: List[BatchTransferItem] = Field(..., min_length=1)
+
+class BatchTransferResult(BaseModel):
+    index: int # position in the request
+    recipient_email: str
+    amount: Decimal
+    status: str # 'sent' or 'rejected'
+    detail: Optional[str] = None # why the item was rejected
+    transaction_id: Optional[int] = None # sender's debit
+
+class BatchTransferResponse(BaseModel):
+    sent: int
+    rejected: int
+    total_amount: Decimal
+    balance: Optional[Decimal] = None # sender's balance afterwards
+    results: List[BatchTransferResult]
@@ -27,6 +27,21 @@ class UserResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class Principal(BaseModel):
+    """
+    Authenticated user as cached by deps.get_current_principal.
+    Plain data, not bound to any DB session.
+    """
+    id: int
+    name: str
+    email: EmailStr
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
 class UserForgotPassword(BaseModel):
     email: EmailStr
 
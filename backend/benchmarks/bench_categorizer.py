@@ -0,0 +1,69 @@
+"""
+Categorizer throughput: descriptions categorized per minute three ways and a
+check that they all agree:
+
+    substring - the old per-rule any(...) chain, one keyword at a time, with
+                the same whole-word rule
+    compiled  - Categorizer with the memo cache disabled (every text is new)
+    cached    - Categorizer with its memo cache, on texts drawn from a pool
+                of distinct merchants (how real statements repeat)
+
+Usage (from backend/):
+    python benchmarks/bench_categorizer.py
+    python benchmarks/bench_categorizer.py --texts 2000000 --merchants 5000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = ["Netflix", "Payment to", "POS", "Zomato", "Shell Station", "Apollo Pharmacy", "Jio Fiber", "ACME Corp",
+         "Walmart", "Transfer", "Coffee", "Metro Recharge", "Online", "Store", "Ltd", "Services", "Uber Trip"]
+
+def substring(rules, text):
+    text_lower = (text or "").lower()
+    for category, keywords in rules:
+        if any(re.search(rf"\b{re.escape(x)}s?\b", text_lower) for x in keywords):
+            return category
+    return None
+
+def measure(name, func, texts):
+    started = time.perf_counter()
+    results = [func(text) for text in texts]
+    elapsed = time.perf_counter() - started
+    print(f"{name:<10} {len(texts) / elapsed * 60 / 1e6:>10.1f} M/min")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=1_000_000)
+    parser.add_argument("--merchants", type=int, default=2000, help="distinct texts in the cached run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from app.core.categorizer import CATEGORY_RULES, Categorizer
+
+    rng = random.Random(args.seed)
+    def text(i):
+        return f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(WORDS)} #{i}"
+    unique = [text(i) for i in range(args.texts)]
+    pool = [text(i) for i in range(args.merchants)]
+    repeated = [rng.choice(pool) for _ in range(args.texts)]
+
+    uncached = Categorizer(CATEGORY_RULES, cache_size=0)
+    cached = Categorizer(CATEGORY_RULES)
+    print(f"{len(CATEGORY_RULES)} rules, {args.texts} texts, {args.merchants} distinct in the cached run")
+    print(f"{'mode':<10} {'throughput':>14}")
+    expected = measure("substring", lambda t: substring(CATEGORY_RULES, t), unique)
+    assert measure("compiled", uncached.match, unique) == expected, "compiled categorizer disagrees"
+    expected = [substring(CATEGORY_RULES, t) for t in repeated]
+    assert measure("cached", cached.match, repeated) == expected, "cached categorizer disagrees"
+    print("All modes agree.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Dashboard refresh load: timer polling vs GET /events/stream.
+
+Starts the API in-process on a throwaway database, seeds N users and runs
+the same background write load (transfers between the users) twice:
+
+    poll - every client fetches /accounts/summary, /alerts/list and
+           /rewards/balance every --poll-interval seconds
+    sse  - every client holds one event stream and only receives deltas
+
+and reports HTTP requests, SQL statements spent on reads (statements per
+transfer are calibrated first and subtracted), how many polls returned
+anything new, and how quickly stream clients saw their new balance.
+
+Usage (from backend/):
+    python benchmarks/bench_events.py
+    python benchmarks/bench_events.py --clients 200 --seconds 60 --poll-interval 10 --writes-per-second 5
+
+The target database is dropped and recreated, never point it at real data.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+POLL_PATHS = ["/api/v1/accounts/summary", "/api/v1/alerts/list", "/api/v1/rewards/balance"]
+
+class Counter:
+    def __init__(self):
+        self.statements = 0
+
+    def __call__(self, *args):
+        self.statements += 1
+
+def seed(engine, clients: int):
+    from sqlalchemy import insert
+    from app.core.security import create_access_token
+    from app.db.base import Base
+    from app.models.banking import Account, AccountType, Reward, User
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    users = [{"id": i, "name": f"User {i}", "email": f"user{i}@example.com", "password": "x", "is_verified": True}
+             for i in range(1, clients + 1)]
+    with engine.begin() as conn:
+        conn.execute(insert(User), users)
+        conn.execute(insert(Account), [
+            {"id": u["id"], "user_id": u["id"], "bank_name": "Finex Bank", "account_type": AccountType.checking,
+             "masked_account": "0000", "balance": 1_000_000, "currency": "USD"}
+            for u in users
+        ])
+        conn.execute(insert(Reward), [
+            {"user_id": u["id"], "program_name": "Gold Rewards", "points_balance": 0} for u in users
+        ])
+    return [
+        (u, {"Authorization": "Bearer " + create_access_token(data={"sub": u["email"], "uid": u["id"]})})
+        for u in users
+    ]
+
+async def writer(client, users, rate: float, stop: asyncio.Event, sent_at: dict):
+    # Transfers between random users; sent_at[user_id] = when their last one was issued
+    rng = random.Random(7)
+    writes = 0
+    while not stop.is_set():
+        (sender, headers), (recipient, _) = rng.sample(users, 2)
+        sent_at[sender["id"]] = sent_at[recipient["id"]] = time.perf_counter()
+        response = await client.post("/api/v1/transactions/send", headers=headers,
+                                     json={"recipient_email": recipient["email"], "amount": "1.00"})
+        response.raise_for_status()
+        writes += 1
+        await asyncio.sleep(1 / rate)
+    return writes
+
+async def poller(client, headers, interval: float, stop: asyncio.Event, stats: dict):
+    last = {}
+    await asyncio.sleep(random.uniform(0, interval)) # spread clients over the interval
+    while not stop.is_set():
+        for path in POLL_PATHS:
+            response = await client.get(path, headers=headers)
+            stats["requests"] += 1
+            if last.get(path) not in (None, response.content):
+                stats["changed"] += 1
+            last[path] = response.content
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+async def listener(client, user, headers, stats: dict, sent_at: dict, ready: asyncio.Event, expected: int):
+    stats["requests"] += 1
+    async with client.stream("GET", "/api/v1/events/stream", headers=headers) as response:
+        async for line in response.aiter_lines():
+            if line == "event: ready":
+                stats["ready"] += 1
+                if stats["ready"] == expected:
+                    ready.set()
+            elif line.startswith("event: "):
+                stats["changed"] += 1
+                if line == "event: balance" and user["id"] in sent_at:
+                    stats["latencies"].append(time.perf_counter() - sent_at[user["id"]])
+
+async def run_phase(mode: str, base_url: str, users, args, counter: Counter, per_write: float) -> dict:
+    import httpx
+
+    stats = {"requests": 0, "changed": 0, "ready": 0, "latencies": []}
+    sent_at = {}
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=len(users) + 10, max_keepalive_connections=len(users) + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        if mode == "sse":
+            ready = asyncio.Event()
+            readers = [asyncio.create_task(listener(client, u, h, stats, sent_at, ready, len(users))) for u, h in users]
+            await asyncio.wait_for(ready.wait(), 30)
+        else:
+            readers = [asyncio.create_task(poller(client, h, args.poll_interval, stop, stats)) for _, h in users]
+
+        statements_before = counter.statements
+        write_task = asyncio.create_task(writer(client, users, args.writes_per_second, stop, sent_at))
+        await asyncio.sleep(args.seconds)
+        stop.set()
+        writes = await write_task
+        await asyncio.sleep(0.5) # let the last deltas arrive
+        statements = counter.statements - statements_before
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+
+    stats.update(writes=writes, read_statements=max(0, statements - round(writes * per_write)))
+    return stats
+
+async def calibrate(base_url: str, users, counter: Counter, writes: int = 20) -> float:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        before = counter.statements
+        for i in range(writes):
+            (sender, headers), (recipient, _) = users[i % 2], users[1 - i % 2]
+            response = await client.post("/api/v1/transactions/send", headers=headers,
+                                         json={"recipient_email": recipient["email"], "amount": "1.00"})
+            response.raise_for_status()
+        return (counter.statements - before) / writes
+
+def report(mode: str, stats: dict, seconds: float):
+    line = (f"{mode:>4}: {stats['requests']:>6} requests ({stats['requests'] / seconds:7.1f}/s), "
+            f"{stats['read_statements']:>7} read SQL statements, {stats['changed']:>5} updates delivered, "
+            f"{stats['writes']} transfers")
+    if stats["latencies"]:
+        line += f", balance delta p50 {statistics.median(stats['latencies']) * 1000:.1f} ms"
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--poll-interval", type=float, default=5)
+    parser.add_argument("--writes-per-second", type=float, default=2)
+    parser.add_argument("--url", default="sqlite:///bench_events.db")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # Settings are read at import time
+    os.environ["DATABASE_URL"] = args.url
+    os.environ["BACKGROUND_JOBS_ENABLED"] = "false"
+    os.environ.setdefault("EVENTS_KEEPALIVE_SECONDS", "5")
+    import uvicorn
+    from sqlalchemy import event
+    from app.db.session import async_engine, engine
+    from app.main import app
+
+    print(f"Seeding {args.clients} users ...")
+    users = seed(engine, args.clients)
+    counter = Counter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+
+    server = uvicorn.Server(uvicorn.Config(app, port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        per_write = asyncio.run(calibrate(base_url, users, counter))
+        print(f"{per_write:.1f} SQL statements per transfer (excluded below)")
+        poll = asyncio.run(run_phase("poll", base_url, users, args, counter, per_write))
+        report("poll", poll, args.seconds)
+        sse = asyncio.run(run_phase("sse", base_url, users, args, counter, per_write))
+        report("sse", sse, args.seconds)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    if poll["requests"]:
+        saved = 1 - sse["requests"] / poll["requests"]
+        useful = poll["changed"] / poll["requests"]
+        print(f"Streams remove {saved:.1%} of refresh requests; {useful:.1%} of polls returned anything new.")
+
+if __name__ == "__main__":
+    main()
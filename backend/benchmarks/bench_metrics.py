@@ -0,0 +1,75 @@
+"""
+Cost of app.core.metrics on the hot paths, each measured bare and instrumented:
+
+    request    an ASGI request through MetricsMiddleware (a no-op app, so only
+               the middleware is timed)
+    statement  SELECT 1 on an in-memory SQLite engine with instrument_engine
+    render     one GET /metrics body with every series recorded above
+
+Usage (from backend/):
+    python benchmarks/bench_metrics.py
+    python benchmarks/bench_metrics.py --requests 500000 --statements 200000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+async def send(message):
+    pass
+
+async def requests(app, count: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+    started = time.perf_counter()
+    for _ in range(count):
+        await app(scope, receive, send)
+    return time.perf_counter() - started
+
+def statements(engine, count: int) -> float:
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        for _ in range(count):
+            conn.exec_driver_sql("SELECT 1").scalar()
+        return time.perf_counter() - started
+
+def report(name: str, bare: float, instrumented: float, count: int) -> None:
+    print(f"{name:<10} {bare / count * 1e6:>9.2f} us {instrumented / count * 1e6:>12.2f} us "
+          f"{(instrumented - bare) / count * 1e6:>+10.2f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--statements", type=int, default=100_000)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from app.core import metrics
+
+    print(f"{'path':<10} {'bare':>12} {'instrumented':>15} {'overhead':>13}")
+    bare = asyncio.run(requests(noop_app, args.requests))
+    instrumented = asyncio.run(requests(metrics.MetricsMiddleware(noop_app), args.requests))
+    report("request", bare, instrumented, args.requests)
+
+    bare = statements(create_engine("sqlite://"), args.statements)
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine, "bench")
+    instrumented = statements(engine, args.statements)
+    report("statement", bare, instrumented, args.statements)
+
+    started = time.perf_counter()
+    body = metrics.registry.render()
+    print(f"render     {(time.perf_counter() - started) * 1000:.2f} ms for {len(body.splitlines())} lines")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Password-hashing throughput and event-loop responsiveness during a login burst.
+
+Runs N concurrent bcrypt verifications three ways and reports verifications
+per second plus the worst event-loop lag seen by a 10 ms ticker (how long
+every other request would have stalled):
+
+    inline    - verify_password() called on the event loop
+    pool      - verify_and_update_password() on the bounded hashing pool
+    admission - same, with more concurrent logins than the pool admits
+
+Usage (from backend/):
+    python benchmarks/bench_password_hashing.py
+    python benchmarks/bench_password_hashing.py --logins 200 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+async def measure(name, logins, verify_one):
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - t0 - 0.01)
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(verify_one() for _ in range(logins)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick
+
+    rejected = sum(1 for r in results if isinstance(r, Exception))
+    ok = logins - rejected
+    print(f"{name:<10} {ok / elapsed:>10.1f} {lag * 1000:>12.1f} {rejected:>9}")
+
+async def main_async(args):
+    from app.core import security
+
+    stored = security.get_password_hash("correct horse")
+
+    async def inline():
+        return security.verify_password("correct horse", stored)
+
+    async def pooled():
+        return await security.verify_and_update_password("correct horse", stored)
+
+    print(f"bcrypt rounds={args.rounds} workers={security.HASH_WORKERS} "
+          f"max in flight={security.HASH_MAX_IN_FLIGHT} logins={args.logins}")
+    print(f"{'mode':<10} {'verify/s':>10} {'max lag ms':>12} {'rejected':>9}")
+    await measure("inline", args.logins, inline)
+    await measure("pool", min(args.logins, security.HASH_MAX_IN_FLIGHT), pooled)
+    await measure("admission", max(args.logins, security.HASH_MAX_IN_FLIGHT * 2), pooled)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor (BCRYPT_ROUNDS)")
+    args = parser.parse_args()
+    # Settings are read at import time
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Concurrency load test against a running API server.
+
+Logs in once, then fires the given endpoints at increasing concurrency levels
+and reports throughput and latency percentiles for each level. When handlers
+block the event loop, throughput stops growing with concurrency. Run it
+against two builds to compare them.
+
+Usage (from backend/, with the server running):
+    uvicorn app.main:app --port 8000
+    python benchmarks/load_test.py --email me@example.com --password secret
+    python benchmarks/load_test.py --concurrency 1,16,64 --requests 2000 \
+        --path /api/v1/accounts/summary --path /api/v1/insights/burn-rate
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/api/v1/accounts/summary",
+    "/api/v1/bills/summary",
+    "/api/v1/budgets/summary",
+    "/api/v1/insights/burn-rate",
+    "/api/v1/rewards/balance",
+    "/api/v1/alerts/list",
+]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+async def run_level(client: httpx.AsyncClient, paths, concurrency: int, total: int):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(paths[i % len(paths)])
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            t0 = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": total / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "mean": statistics.mean(latencies) * 1000,
+        "errors": errors,
+    }
+
+async def main_async(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        login = await client.post("/api/v1/auth/login", json={"email": args.email, "password": args.password})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        paths = args.path or DEFAULT_PATHS
+        print(f"{'concurrency':>11} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for level in args.concurrency:
+            # Warm up connections and caches before measuring
+            await run_level(client, paths, level, min(args.requests, level * 2))
+            r = await run_level(client, paths, level, args.requests)
+            print(f"{level:>11} {r['rps']:>9.1f} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f} {r['errors']:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--path", action="append", help="Endpoint to hit (repeatable)")
+    parser.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
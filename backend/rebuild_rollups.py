@@ -0,0 +1,31 @@
+import sys
+import os
+import argparse
+
+# Add parent directory to path to allow importing app modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.session import SessionLocal
+from app.core.ledger import rebuild_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the monthly ledger rollups from the transactions table.")
+    parser.add_argument("--account-id", type=int, action="append", dest="account_ids",
+                        help="Only rebuild this account (repeatable). Default: all accounts.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rows = rebuild_rollups(db, args.account_ids)
+        db.commit()
+        scope = f"accounts {args.account_ids}" if args.account_ids else "all accounts"
+        print(f"Rebuilt {rows} rollup rows for {scope}.")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Test settings. Settings are read at import time, so these have to be in
+place before any test module imports app.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["BACKGROUND_JOBS_ENABLED"] = "false"
+# N+1 guard (app/db/query_guard.py), as in benchmarks/bench_routes.py: lazy
+# relationship loads and statements repeated within a request raise
+os.environ["DB_STRICT_LOADING"] = "true"
+os.environ["DB_REPEATED_QUERY_LIMIT"] = "1"
+os.environ["DB_REPEATED_QUERY_ACTION"] = "raise"
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict
+
+import pytest
+
+@dataclass
+class TestUser:
+    id: int
+    email: str
+    name: str
+    account_id: int
+    headers: Dict[str, str] # bearer token for the API
+
+@pytest.fixture
+def database():
+    """
+    Empty schema, and no cached principals or summaries from earlier tests.
+    """
+    from app.api.deps import principal_cache
+    from app.core.bills import summary_cache
+    from app.db.base import Base
+    from app.db.session import engine
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    principal_cache.clear()
+    summary_cache.clear()
+    yield engine
+
+@pytest.fixture
+def client(database):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+@pytest.fixture
+def make_user(database):
+    """
+    make_user(balance) -> TestUser with one checking account.
+    """
+    from sqlalchemy import insert
+    from app.core.security import create_access_token
+    from app.models.banking import Account, AccountType, User
+
+    created = []
+
+    def make(balance="100.00", currency="INR") -> TestUser:
+        n = len(created) + 1
+        email, name = f"user{n}@example.com", f"User {n}"
+        with database.begin() as conn:
+            user_id = conn.execute(
+                insert(User).returning(User.id), {"name": name, "email": email, "password": "x", "is_active": True}
+            ).scalar_one()
+            account_id = conn.execute(insert(Account).returning(Account.id), {
+                "user_id": user_id, "bank_name": "Finex Bank", "account_type": AccountType.checking,
+                "masked_account": "0000", "balance": Decimal(balance), "currency": currency,
+            }).scalar_one()
+        token = create_access_token(data={"sub": email, "uid": user_id})
+        user = TestUser(user_id, email, name, account_id, {"Authorization": f"Bearer {token}"})
+        created.append(user)
+        return user
+
+    return make
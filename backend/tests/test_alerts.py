@@ -0,0 +1,64 @@
+"""
+Alert generation (app.core.alerts, app.jobs.alerts) and the read state endpoints.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert, select
+
+from app.db.session import SessionLocal
+from app.jobs.alerts import generate_alerts
+from app.models.banking import Alert, Bill, BillStatus
+
+DUE = date(2026, 10, 20)
+
+def alerts(engine, user):
+    with engine.connect() as conn:
+        return dict(conn.execute(select(Alert.dedupe_key, Alert.is_read).where(Alert.user_id == user.id)).all())
+
+def run_job(today):
+    with SessionLocal() as db:
+        generate_alerts(db, today)
+        db.commit()
+
+def test_overdue_alert_resolves_due_soon_alert(make_user, database):
+    user = make_user("1000.00")
+    with database.begin() as conn:
+        bill_id = conn.execute(insert(Bill).returning(Bill.id), {
+            "user_id": user.id, "biller_name": "Jio Fiber", "amount_due": Decimal("99.00"),
+            "due_date": DUE, "status": BillStatus.upcoming,
+        }).scalar_one()
+
+    run_job(DUE - timedelta(days=1))
+    assert alerts(database, user) == {f"bill_upcoming:{bill_id}": False}
+
+    run_job(DUE + timedelta(days=1))
+    assert alerts(database, user) == {f"bill_upcoming:{bill_id}": True, f"bill_overdue:{bill_id}": False}
+
+    # Re-runs change nothing
+    run_job(DUE + timedelta(days=2))
+    assert alerts(database, user) == {f"bill_upcoming:{bill_id}": True, f"bill_overdue:{bill_id}": False}
+
+def test_read_state_endpoints(client, make_user, database):
+    user, other = make_user(), make_user()
+    with database.begin() as conn:
+        first, second, third = conn.execute(insert(Alert).returning(Alert.id), [
+            {"user_id": user.id, "dedupe_key": f"test:{i}", "severity": "info", "title": "Test",
+             "message": "Test", "is_read": False}
+            for i in range(3)
+        ]).scalars()
+        conn.execute(insert(Alert), {"user_id": other.id, "dedupe_key": "test:0", "is_read": False})
+
+    def unread():
+        return client.get("/api/v1/alerts/unread-count", headers=user.headers).json()["unread"]
+
+    assert unread() == 3
+    assert client.post(f"/api/v1/alerts/{first}/read", headers=user.headers).json()["is_read"] is True
+    assert unread() == 2
+    assert client.post(f"/api/v1/alerts/{first}/read", headers=other.headers).status_code == 404
+    assert client.post("/api/v1/alerts/read-all", headers=user.headers).json() == {"updated": 2}
+    assert unread() == 0
+    assert client.get("/api/v1/alerts/unread-count", headers=other.headers).json()["unread"] == 1
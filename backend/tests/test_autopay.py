@@ -0,0 +1,108 @@
+"""
+Bulk auto-pay job (app.jobs.autopay).
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql
+
+from app.db.session import SessionLocal
+from app.jobs.autopay import _due_bills, _pay_chunk, run_autopay
+from app.models.banking import Account, Bill, BillStatus, Reward, Transaction
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+def add_bill(engine, user, **values) -> int:
+    values = {"user_id": user.id, "biller_name": "Jio Fiber", "amount_due": Decimal("100.00"),
+              "due_date": NOW.date(), "status": BillStatus.upcoming, "auto_pay": True, "auto_pay_time": "09:00",
+              **values}
+    with engine.begin() as conn:
+        return conn.execute(insert(Bill).returning(Bill.id), values).scalar_one()
+
+def state(engine, user):
+    with engine.connect() as conn:
+        return {
+            "balance": conn.scalar(select(Account.balance).where(Account.id == user.account_id)),
+            "paid": set(conn.scalars(select(Bill.id).where(Bill.status == BillStatus.paid))),
+            "debits": conn.scalar(select(func.count(Transaction.id))),
+            "points": conn.scalar(select(func.sum(Reward.points_balance))) or 0,
+        }
+
+def test_pays_due_bills_in_chunks(make_user, database):
+    user = make_user("1000.00")
+    due = [add_bill(database, user) for _ in range(5)]
+    add_bill(database, user, auto_pay=False)
+    add_bill(database, user, auto_pay_time="13:00") # later today
+    add_bill(database, user, due_date=NOW.date() + timedelta(days=1))
+    add_bill(database, user, status=BillStatus.paid)
+    overdue = add_bill(database, user, status=BillStatus.overdue, due_date=NOW.date() - timedelta(days=3))
+
+    with SessionLocal() as db:
+        report = run_autopay(db, chunk_size=2, now=NOW)
+
+    assert (report.bills_paid, report.chunks) == (6, 3)
+    assert report.amount_paid == Decimal("600.00")
+    assert report.points_awarded == 60
+    after = state(database, user)
+    assert after["paid"] >= set(due) | {overdue}
+    assert after["balance"] == Decimal("400.00")
+    assert after["debits"] == 6
+    assert after["points"] == 60
+
+    # Nothing left to pay on a second run
+    with SessionLocal() as db:
+        assert run_autopay(db, now=NOW).bills_paid == 0
+
+def test_each_bill_is_paid_once(make_user, database):
+    user = make_user("1000.00")
+    add_bill(database, user)
+    add_bill(database, user)
+
+    with SessionLocal() as db:
+        rows = db.execute(_due_bills(NOW, 0, 10, None)).all()
+        paid, points = _pay_chunk(db, rows)
+        db.commit()
+        # A second worker (or PUT /bills/{id}/pay) holding the same rows pays nothing
+        again, again_points = _pay_chunk(db, rows)
+        db.commit()
+
+    assert (len(paid), points) == (2, 20)
+    assert (again, again_points) == ([], 0)
+    assert state(database, user)["balance"] == Decimal("800.00")
+    assert state(database, user)["debits"] == 2
+
+def test_chunks_skip_rows_locked_by_another_worker():
+    sql = str(_due_bills(NOW, 0, 100, None).compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE OF bills SKIP LOCKED" in sql
+    assert "LIMIT" in sql and "bills.id >" in sql
+
+def test_dry_run_rolls_back(make_user, database):
+    user = make_user("1000.00")
+    add_bill(database, user)
+    add_bill(database, user)
+    before = state(database, user)
+
+    with SessionLocal() as db:
+        report = run_autopay(db, dry_run=True, now=NOW)
+
+    assert report.dry_run and report.bills_paid == 2
+    assert report.user_ids == set()
+    assert state(database, user) == before
+
+def test_unpadded_auto_pay_time_is_normalised_on_save(client, make_user, database):
+    user = make_user("1000.00")
+    bill_id = add_bill(database, user, auto_pay=False, auto_pay_time=None)
+
+    response = client.patch(f"/api/v1/bills/{bill_id}", headers=user.headers,
+                            json={"auto_pay": True, "auto_pay_time": "9:05"})
+    assert response.status_code == 200
+    assert response.json()["auto_pay_time"] == "09:05"
+    assert client.patch(f"/api/v1/bills/{bill_id}", headers=user.headers,
+                        json={"auto_pay_time": "25:00"}).status_code == 422
+
+    with SessionLocal() as db:
+        assert run_autopay(db, now=datetime.combine(NOW.date(), datetime.min.time()) + timedelta(hours=10)).bills_paid == 1
@@ -0,0 +1,109 @@
+"""
+POST /transactions/batch.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.models.banking import Account, Transaction, TxnType
+
+URL = "/api/v1/transactions/batch"
+
+def balance(engine, account_id) -> Decimal:
+    with engine.connect() as conn:
+        return conn.scalar(select(Account.balance).where(Account.id == account_id))
+
+def transaction_count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count(Transaction.id)))
+
+def test_sends_accepted_items_and_reports_each(client, make_user, database):
+    sender, alice, bob = make_user("100.00"), make_user("0.00"), make_user("0.00")
+
+    response = client.post(URL, headers=sender.headers, json={"items": [
+        {"recipient_email": alice.email, "amount": "30.00", "description": "Rent share"},
+        {"recipient_email": "nobody@example.com", "amount": "5.00"},
+        {"recipient_email": bob.email, "amount": "20.00"},
+        {"recipient_email": bob.email, "amount": "-1.00"},
+        {"recipient_email": sender.email, "amount": "1.00"},
+    ]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["sent"], body["rejected"]) == (2, 3)
+    assert Decimal(body["total_amount"]) == Decimal("50.00")
+    assert Decimal(body["balance"]) == Decimal("50.00")
+    assert [(r["index"], r["status"], r["detail"]) for r in body["results"]] == [
+        (0, "sent", None),
+        (1, "rejected", "Recipient not found."),
+        (2, "sent", None),
+        (3, "rejected", "Amount must be positive."),
+        (4, "rejected", "You cannot send money to yourself."),
+    ]
+    assert all(r["transaction_id"] for r in body["results"] if r["status"] == "sent")
+
+    assert balance(database, sender.account_id) == Decimal("50.00")
+    assert balance(database, alice.account_id) == Decimal("30.00")
+    assert balance(database, bob.account_id) == Decimal("20.00")
+    with database.connect() as conn:
+        debits = conn.execute(
+            select(Transaction.id, Transaction.amount).where(Transaction.txn_type == TxnType.debit).order_by(Transaction.id)
+        ).all()
+    assert [d.id for d in debits] == [body["results"][0]["transaction_id"], body["results"][2]["transaction_id"]]
+    assert [d.amount for d in debits] == [Decimal("-30.00"), Decimal("-20.00")]
+
+def test_total_over_balance_sends_nothing(client, make_user, database):
+    sender, alice, bob = make_user("40.00"), make_user("0.00"), make_user("0.00")
+
+    # Each item alone is affordable, the total is not
+    response = client.post(URL, headers=sender.headers, json={"items": [
+        {"recipient_email": alice.email, "amount": "30.00"},
+        {"recipient_email": bob.email, "amount": "30.00"},
+    ]})
+
+    assert response.status_code == 400
+    assert "Insufficient funds" in response.json()["detail"]
+    assert balance(database, sender.account_id) == Decimal("40.00")
+    assert balance(database, alice.account_id) == Decimal("0.00")
+    assert transaction_count(database) == 0
+
+def test_only_unknown_recipients_sends_nothing(client, make_user, database):
+    sender = make_user("40.00")
+
+    response = client.post(URL, headers=sender.headers, json={"items": [
+        {"recipient_email": "nobody@example.com", "amount": "10.00"},
+    ]})
+
+    assert response.status_code == 200
+    assert (response.json()["sent"], response.json()["rejected"]) == (0, 1)
+    assert balance(database, sender.account_id) == Decimal("40.00")
+    assert transaction_count(database) == 0
+
+def test_item_limit(client, make_user, monkeypatch):
+    sender, alice = make_user("100.00"), make_user("0.00")
+    monkeypatch.setattr(settings, "TRANSFER_BATCH_MAX_ITEMS", 2)
+
+    item = {"recipient_email": alice.email, "amount": "1.00"}
+    assert client.post(URL, headers=sender.headers, json={"items": [item] * 2}).status_code == 200
+    response = client.post(URL, headers=sender.headers, json={"items": [item] * 3})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "At most 2 transfers per batch."
+
+def test_unexpected_error_is_not_sent_to_the_client(client, make_user, monkeypatch):
+    from app.api.v1.endpoints import transactions
+
+    def broken(db, changes):
+        raise RuntimeError("connection to server at 10.0.0.5 lost")
+
+    monkeypatch.setattr(transactions, "apply_balance_changes", broken)
+    sender, alice = make_user("100.00"), make_user("0.00")
+
+    response = client.post(URL, headers=sender.headers, json={"items": [{"recipient_email": alice.email, "amount": "1.00"}]})
+
+    assert response.status_code == 500
+    assert "10.0.0.5" not in response.text
@@ -0,0 +1,98 @@
+"""
+Budget spend tracking (app.core.budgets) and reconciliation (app.jobs.budgets).
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import insert, select, update
+
+from app.core.budgets import ledger_spend
+from app.core.ledger import record_transactions
+from app.db.session import SessionLocal
+from app.jobs.budgets import reconcile_budgets
+from app.models.banking import Bill, BillStatus, Budget, Transaction, TxnType
+
+def add_budget(engine, user, category, spent="0") -> int:
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        return conn.execute(insert(Budget).returning(Budget.id), {
+            "user_id": user.id, "year": now.year, "month": now.month, "category": category,
+            "limit_amount": Decimal("1000"), "spent_amount": Decimal(spent),
+        }).scalar_one()
+
+def spent(engine, budget_id) -> Decimal:
+    with engine.connect() as conn:
+        return conn.scalar(select(Budget.spent_amount).where(Budget.id == budget_id))
+
+def record(user, *amounts, txn_type=TxnType.debit, category="Food"):
+    with SessionLocal() as db:
+        txns = [
+            Transaction(account_id=user.account_id, description="Test", category=category, amount=Decimal(a),
+                        currency="INR", txn_type=txn_type, merchant="Test", txn_date=datetime.utcnow())
+            for a in amounts
+        ]
+        db.add_all(txns)
+        record_transactions(db, txns)
+        db.commit()
+
+def test_only_outflow_counts_as_spend(make_user, database):
+    user = make_user()
+    food = add_budget(database, user, "Food")
+
+    record(user, "-30.00", "-20.00")
+    record(user, "10.00") # refund booked as a positive debit
+    record(user, "500.00", txn_type=TxnType.credit) # income
+
+    assert spent(database, food) == Decimal("50.00")
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        assert ledger_spend(db, user.id, now.year, now.month, "Food") == Decimal("50.00")
+
+def test_transfer_and_bill_payment_count_once(client, make_user, database):
+    sender, recipient = make_user("500.00"), make_user("0.00")
+    food = add_budget(database, sender, "Food")
+    bills = add_budget(database, sender, "Bills & Utilities")
+    received = add_budget(database, recipient, "Transfer")
+    with database.begin() as conn:
+        bill_id = conn.execute(insert(Bill).returning(Bill.id), {
+            "user_id": sender.id, "biller_name": "Jio Fiber", "amount_due": Decimal("99.00"),
+            "due_date": datetime.utcnow().date(), "status": BillStatus.upcoming,
+        }).scalar_one()
+
+    assert client.post("/api/v1/transactions/send", headers=sender.headers, json={
+        "recipient_email": recipient.email, "amount": "40.00", "description": "pizza night"}).status_code == 200
+    assert client.put(f"/api/v1/bills/{bill_id}/pay", headers=sender.headers).status_code == 200
+
+    assert spent(database, food) == Decimal("40.00")
+    assert spent(database, bills) == Decimal("99.00")
+    # The recipient's credit is not spend
+    assert spent(database, received) == Decimal("0.00")
+
+def test_reconcile_reports_and_fixes_drift(make_user, database):
+    user = make_user()
+    food = add_budget(database, user, "Food")
+    shopping = add_budget(database, user, "Shopping")
+    record(user, "-30.00")
+    record(user, "-15.00", category="Shopping")
+    # Drift, e.g. a script that bypassed record_transactions
+    with database.begin() as conn:
+        conn.execute(update(Budget).where(Budget.id == food).values(spent_amount=Decimal("12.00")))
+
+    with SessionLocal() as db:
+        report = reconcile_budgets(db, months=0, dry_run=True)
+    assert (report.budgets, report.drifted) == (2, 1)
+    assert report.total_drift == Decimal("18.00")
+    assert report.samples == [(food, Decimal("12.00"), Decimal("30.00"))]
+    assert spent(database, food) == Decimal("12.00") # dry run changes nothing
+
+    with SessionLocal() as db:
+        report = reconcile_budgets(db, months=0)
+    assert report.drifted == 1
+    assert spent(database, food) == Decimal("30.00")
+    assert spent(database, shopping) == Decimal("15.00")
+
+    with SessionLocal() as db:
+        assert reconcile_budgets(db, months=0).drifted == 0
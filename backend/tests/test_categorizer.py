@@ -0,0 +1,51 @@
+"""
+Keyword matching in app.core.categorizer.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import pytest
+
+from app.core.categorizer import CATEGORY_RULES, TRANSFER_CATEGORY, Categorizer, bill_category, categorize
+
+@pytest.mark.parametrize("text", [
+    "business lunch", # "bus"
+    "chocolate for mom", # "ola"
+    "prime rib dinner", # "prime"
+    "training session", # "train"
+    "cafeteria", # "cafe"
+])
+def test_keywords_match_whole_words_only(text):
+    assert categorize(text) is None
+    assert categorize(text, TRANSFER_CATEGORY) == TRANSFER_CATEGORY
+
+@pytest.mark.parametrize("text, category", [
+    ("Uber Trip", "Transport"),
+    ("Ola", "Transport"),
+    ("bus ticket", "Transport"),
+    ("McDonalds", "Food"),
+    ("Dr. Lal PathLabs", "Health"),
+    ("Amazon Prime", "Entertainment"),
+    ("amazon order", "Shopping"),
+    ("H&M Store", "Shopping"),
+    ("Shoppers Stop", "Shopping"),
+    ("Reliance Fresh Groceries", "Food"),
+    ("Netflix.com", "Entertainment"),
+])
+def test_categorizes_merchants(text, category):
+    assert categorize(text) == category
+
+def test_first_rule_wins_wherever_its_keyword_is():
+    # Transport's "shell" comes first in the text, Food ranks higher
+    assert categorize("Shell Station Coffee") == "Food"
+    assert categorize("bus to the pizza place") == "Food"
+
+def test_bill_category_defaults():
+    assert bill_category("Jio Fiber") == "Bills & Utilities"
+    assert bill_category("Gym Membership") == "Health"
+    assert bill_category("Landlord") == "Bills & Utilities"
+
+def test_cache_disabled_agrees():
+    uncached = Categorizer(CATEGORY_RULES, cache_size=0)
+    for text in ["business lunch", "Uber Trip", "Shell Station Coffee", "chocolate for mom"]:
+        assert uncached.match(text) == categorize(text)
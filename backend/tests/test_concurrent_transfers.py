@@ -0,0 +1,66 @@
+"""
+Concurrent transfers through app.core.balances.apply_balance_changes:
+money is conserved and no balance goes negative. A lighter, in-process
+version of benchmarks/stress_transfers.py.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import random
+import threading
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from app.core.balances import InsufficientFunds, apply_balance_changes
+from app.db.session import SessionLocal
+from app.models.banking import Account
+
+USERS = 6
+THREADS = 8
+TRANSFERS_PER_THREAD = 40
+OPENING_BALANCE = "50.00"
+
+def test_concurrent_transfers_conserve_money(make_user, database):
+    accounts = [make_user(OPENING_BALANCE).account_id for _ in range(USERS)]
+    start = threading.Barrier(THREADS)
+    outcomes = {"sent": 0, "rejected": 0}
+    errors = []
+    lock = threading.Lock()
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        start.wait()
+        for _ in range(TRANSFERS_PER_THREAD):
+            sender, recipient = rng.sample(accounts, 2)
+            amount = Decimal(rng.randint(100, 3000)) / 100
+            with SessionLocal() as db:
+                try:
+                    apply_balance_changes(db, {sender: -amount, recipient: amount})
+                    db.commit()
+                    outcome = "sent"
+                except InsufficientFunds:
+                    db.rollback()
+                    outcome = "rejected"
+                except Exception as e: # deadlocks, lock timeouts
+                    db.rollback()
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+            with lock:
+                outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Both kinds happened, so the funds check was exercised under contention
+    assert outcomes["sent"] and outcomes["rejected"]
+    with database.connect() as conn:
+        total = conn.scalar(select(func.sum(Account.balance)))
+        lowest = conn.scalar(select(func.min(Account.balance)))
+    assert total == Decimal(OPENING_BALANCE) * USERS
+    assert lowest >= 0
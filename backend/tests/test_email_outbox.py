@@ -0,0 +1,110 @@
+"""
+Outbox delivery against a local SMTP sink (aiosmtpd).
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import asyncio
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy import delete, select
+
+from app.core.config import settings
+from app.core.email import queue_email
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.jobs.email_outbox import deliver_batch
+from app.models.banking import EmailOutbox, OutboxStatus
+
+class Sink:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def sink(monkeypatch):
+    handler = Sink()
+    port = free_port()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(settings, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "MAIL_PORT", port)
+    monkeypatch.setattr(settings, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(settings, "MAIL_SSL_TLS", False)
+    monkeypatch.setattr(settings, "MAIL_USE_CREDENTIALS", False)
+    monkeypatch.setattr(settings, "MAIL_FROM", "bank@example.com")
+    yield handler
+    controller.stop()
+
+@pytest.fixture(autouse=True)
+def outbox():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.execute(delete(EmailOutbox))
+        db.commit()
+
+def queue(*recipients):
+    with SessionLocal() as db:
+        for recipient in recipients:
+            queue_email(db, recipient, f"Hello {recipient}", "<p>Hi</p>")
+        db.commit()
+
+def rows():
+    with SessionLocal() as db:
+        return {row.recipient: row for row in db.scalars(select(EmailOutbox))}
+
+def test_delivers_batch_over_smtp(sink):
+    queue("a@example.com", "b@example.com")
+
+    stats = asyncio.run(deliver_batch())
+
+    assert stats == {"claimed": 2, "sent": 2, "retrying": 0, "failed": 0}
+    assert sorted(m.rcpt_tos[0] for m in sink.messages) == ["a@example.com", "b@example.com"]
+    assert all(row.status == OutboxStatus.sent and row.sent_at for row in rows().values())
+
+def test_bad_row_does_not_abort_batch(sink, monkeypatch):
+    # A line break in a header makes building the message raise ValueError
+    queue("a@example.com", "bad\nrow@example.com", "b@example.com")
+
+    stats = asyncio.run(deliver_batch())
+
+    assert stats == {"claimed": 3, "sent": 2, "retrying": 1, "failed": 0}
+    assert len(sink.messages) == 2
+    outcome = rows()
+    assert outcome["a@example.com"].status == OutboxStatus.sent
+    assert outcome["b@example.com"].status == OutboxStatus.sent
+    bad = outcome["bad\nrow@example.com"]
+    assert bad.status == OutboxStatus.pending and bad.last_error.startswith("ValueError")
+
+    # Retried until the attempts cap, then given up on
+    monkeypatch.setattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 2)
+    with SessionLocal() as db:
+        db.get(EmailOutbox, bad.id).next_attempt_at = bad.created_at
+        db.commit()
+    stats = asyncio.run(deliver_batch())
+
+    assert stats == {"claimed": 1, "sent": 0, "retrying": 0, "failed": 1}
+    assert rows()["bad\nrow@example.com"].status == OutboxStatus.failed
+    assert len(sink.messages) == 2
+
+def test_unreachable_server_keeps_rows_pending(monkeypatch):
+    monkeypatch.setattr(settings, "MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "MAIL_PORT", 9) # discard port, nothing listening
+    monkeypatch.setattr(settings, "MAIL_STARTTLS", False)
+    monkeypatch.setattr(settings, "MAIL_USE_CREDENTIALS", False)
+    queue("a@example.com")
+
+    stats = asyncio.run(deliver_batch())
+
+    assert stats == {"claimed": 1, "sent": 0, "retrying": 1, "failed": 0}
+    assert rows()["a@example.com"].status == OutboxStatus.pending
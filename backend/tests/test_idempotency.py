@@ -0,0 +1,107 @@
+"""
+Idempotency-Key handling in app.core.idempotency, against SQLite.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import Response
+from jose import jwt
+from sqlalchemy import delete, select, update
+from starlette.requests import Request
+
+from app.core import idempotency
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, SessionLocal, engine
+from app.models.banking import IdempotencyRecord, IdempotencyStatus, Reward
+
+@pytest.fixture(autouse=True)
+def tables():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.execute(delete(IdempotencyRecord))
+        db.execute(delete(Reward))
+        db.commit()
+
+def request(body: bytes = b'{"amount": 10}') -> Request:
+    token = jwt.encode({"sub": "a@example.com", "uid": 1}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/api/v1/rewards/redeem",
+        "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    }, receive)
+
+class Handler:
+    """
+    Endpoint stand-in: commits one Reward row per run, then optionally fails.
+    """
+    def __init__(self, fail_after_commit: BaseException = None):
+        self.runs = 0
+        self.fail_after_commit = fail_after_commit
+
+    async def __call__(self, req: Request) -> Response:
+        self.runs += 1
+        async with AsyncSessionLocal() as db:
+            db.add(Reward(user_id=1, program_name="Gold Rewards", points_balance=self.runs))
+            await db.commit()
+        if self.fail_after_commit is not None:
+            raise self.fail_after_commit
+        return Response(content=b'{"ok": true}', media_type="application/json")
+
+def rewards() -> int:
+    with SessionLocal() as db:
+        return len(db.scalars(select(Reward)).all())
+
+def record() -> IdempotencyRecord:
+    with SessionLocal() as db:
+        return db.scalar(select(IdempotencyRecord))
+
+def test_retry_replays_stored_response():
+    handler = Handler()
+    first = asyncio.run(idempotency.run_idempotent(request(), "k1", handler))
+    retry = asyncio.run(idempotency.run_idempotent(request(), "k1", handler))
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers[idempotency.REPLAYED_HEADER] == "true"
+    assert retry.body == b'{"ok": true}'
+    assert handler.runs == 1 and rewards() == 1
+
+@pytest.mark.parametrize("error", [RuntimeError("after commit"), asyncio.CancelledError()])
+def test_failure_after_commit_never_reruns(error, monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LOCK_SECONDS", 0)
+    handler = Handler(fail_after_commit=error)
+    with pytest.raises(type(error)):
+        asyncio.run(idempotency.run_idempotent(request(), "k1", handler))
+
+    assert record().status == IdempotencyStatus.completed
+    retry = asyncio.run(idempotency.run_idempotent(request(), "k1", Handler()))
+
+    assert retry.status_code == 409
+    assert handler.runs == 1 and rewards() == 1
+
+def test_commit_fails_once_reservation_is_taken_over(monkeypatch):
+    async def taken_over(req: Request) -> Response:
+        # Another request takes the key over while this one is still running
+        with SessionLocal() as db:
+            db.execute(update(IdempotencyRecord).values(created_at=IdempotencyRecord.created_at + timedelta(seconds=1)))
+            db.commit()
+        return await Handler()(req)
+
+    with pytest.raises(idempotency.ReservationLost):
+        asyncio.run(idempotency.run_idempotent(request(), "k1", taken_over))
+    assert rewards() == 0
@@ -0,0 +1,153 @@
+"""
+Statement imports: parsers and dedupe in app.core.imports, and
+POST /accounts/{id}/import committing and reporting per batch.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core import events, imports
+from app.core.config import settings
+from app.models.banking import Transaction, TxnType
+
+CSV = (
+    "\ufeffPosted Date,Narration,Withdrawal,Deposit,Payee\r\n"
+    "2026-09-01,Salary,,\"5,000.00\",Acme Corp\r\n"
+    "02/09/2026,\"Dinner, with\nfriends\",250.00,,Swiggy\r\n"
+    "02/09/2026,\"Dinner, with\nfriends\",250.00,,Swiggy\r\n"
+    "not a date,Broken,1.00,,\r\n"
+    "03/09/2026,Too big,99999999999.00,,\r\n"
+)
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260905120000.000[+5.5:IST]<TRNAMT>-120.50<FITID>A1<NAME>Uber<MEMO>Ride home
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260906<TRNAMT>75.00<FITID>A2<NAME>Refund</STMTTRN><STMTTRN><TRNTYPE>DEBIT<TRNAMT>-1.00<FITID>A3</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+async def _chunks(text: str, size: int):
+    data = text.encode()
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def parse(text: str, fmt: str, batch_size: int = 100, chunk_size: int = 7):
+    """
+    Batches and report for an upload streamed in small chunks, so records
+    and multi-byte characters are split across reads.
+    """
+    async def collect():
+        return [batch async for batch in imports.iter_import_batches(
+            _chunks(text, chunk_size), fmt, 1, "INR", report, batch_size=batch_size
+        )]
+    report = imports.ImportReport(format=fmt)
+    return asyncio.run(collect()), report
+
+def test_csv_parser():
+    (rows,), report = parse(CSV, "csv")
+
+    assert (report.rows, report.errors) == (5, 2)
+    assert report.error_samples[0].startswith("line 7: unrecognised date")
+    assert report.error_samples[1] == "line 8: amount -99999999999.00 out of range"
+    salary, dinner, again = rows
+    assert (salary["amount"], salary["txn_type"], salary["category"]) == (Decimal("5000.00"), TxnType.credit, "Income")
+    assert (dinner["amount"], dinner["txn_type"]) == (Decimal("-250.00"), TxnType.debit)
+    assert dinner["txn_date"] == datetime(2026, 9, 2)
+    assert (dinner["description"], dinner["merchant"]) == ("Dinner, with\nfriends", "Swiggy")
+    # Two identical rows are two real transactions
+    assert dinner["import_hash"] != again["import_hash"]
+
+def test_csv_needs_date_and_amount_columns():
+    with pytest.raises(imports.ImportFormatError):
+        parse("Date,Description\n2026-09-01,Salary\n", "csv")
+    with pytest.raises(imports.ImportFormatError):
+        parse("", "csv")
+
+def test_ofx_parser():
+    (rows,), report = parse(OFX, "ofx")
+
+    assert (report.rows, report.errors) == (3, 1)
+    assert "without TRNAMT or DTPOSTED" in report.error_samples[0]
+    uber, refund = rows
+    assert (uber["amount"], uber["txn_date"]) == (Decimal("-120.50"), datetime(2026, 9, 5, 12, 0))
+    assert (uber["description"], uber["merchant"]) == ("Ride home", "Uber")
+    assert (refund["amount"], refund["description"]) == (Decimal("75.00"), "Refund")
+    # FITIDs alone identify OFX rows
+    assert parse(OFX.replace("Ride home", "Edited"), "ofx")[0][0][0]["import_hash"] == uber["import_hash"]
+
+def test_row_hasher_is_stable_across_uploads():
+    first, _ = parse(CSV, "csv")
+    second, _ = parse(CSV, "csv", chunk_size=1000)
+    assert [row["import_hash"] for row in first[0]] == [row["import_hash"] for row in second[0]]
+
+@pytest.mark.parametrize("amount", [
+    Decimal("10000000000.00"), Decimal("-9999999999.995"), Decimal("1E+30"), Decimal("NaN"), Decimal("Infinity"),
+])
+def test_checked_amount_rejects(amount):
+    with pytest.raises(ValueError):
+        imports.checked_amount(amount)
+
+@pytest.mark.parametrize("amount", [Decimal("9999999999.99"), Decimal("-9999999999.994"), Decimal("0.001")])
+def test_checked_amount_accepts(amount):
+    assert imports.checked_amount(amount) == amount
+
+def transaction_count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.scalar(select(func.count(Transaction.id)))
+
+def test_import_commits_and_reports_each_batch(client, make_user, database, monkeypatch):
+    user = make_user()
+    published = []
+    monkeypatch.setattr(events, "publish_nowait", published.extend)
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    url = f"/api/v1/accounts/{user.account_id}/import"
+    statement = "Date,Description,Amount\n" + "".join(f"2026-09-{day:02d},Coffee,-{day}.00\n" for day in range(1, 6))
+
+    response = client.post(url, headers={**user.headers, "Content-Type": "text/csv"}, content=statement)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["format"], body["rows"], body["inserted"], body["duplicates"], body["batches"]) == ("csv", 5, 5, 0, 3)
+    assert transaction_count(database) == 5
+    progress = [event["data"] for user_id, event in published if event["type"] == "import"]
+    assert [(p["rows"], p["inserted"]) for p in progress] == [(2, 2), (4, 4), (5, 5)]
+
+    # Importing the same file again adds nothing
+    body = client.post(url, headers=user.headers, params={"format": "csv"}, content=statement).json()
+    assert (body["inserted"], body["duplicates"]) == (0, 5)
+    assert transaction_count(database) == 5
+
+def test_failed_import_keeps_committed_batches(client, make_user, database, monkeypatch):
+    user = make_user()
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    url = f"/api/v1/accounts/{user.account_id}/import?format=csv"
+    statement = "Date,Description,Amount\n" + "".join(f"2026-09-{day:02d},Coffee,-{day}.00\n" for day in range(1, 6))
+    insert_batch, calls = imports.insert_batch, []
+
+    def fail_second_batch(db, rows):
+        calls.append(rows)
+        if len(calls) == 2:
+            raise imports.ImportFormatError("connection lost")
+        return insert_batch(db, rows)
+    monkeypatch.setattr(imports, "insert_batch", fail_second_batch)
+
+    assert client.post(url, headers=user.headers, content=statement).status_code == 400
+    assert transaction_count(database) == 2
+
+    # Sending the file again picks up where the failed upload stopped
+    monkeypatch.setattr(imports, "insert_batch", insert_batch)
+    body = client.post(url, headers=user.headers, content=statement).json()
+    assert (body["inserted"], body["duplicates"]) == (3, 2)
+    assert transaction_count(database) == 5
+
+def test_import_rejects_unknown_format(client, make_user):
+    user = make_user()
+    response = client.post(f"/api/v1/accounts/{user.account_id}/import", headers=user.headers, content=b"{}")
+    assert response.status_code == 415
@@ -0,0 +1,42 @@
+"""
+N+1 guard in app.db.query_guard, which tests/conftest.py turns on.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import pytest
+from sqlalchemy import delete, select, text
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+
+from app.db.base import Base
+from app.db.query_guard import RepeatedQueryError, statement_scope
+from app.db.session import SessionLocal, engine
+from app.models.banking import User
+
+@pytest.fixture(autouse=True)
+def user():
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.email == "guard@example.com"))
+        db.add(User(name="Guard", email="guard@example.com", password="x"))
+        db.commit()
+
+def test_lazy_relationship_load_raises():
+    with SessionLocal() as db:
+        user = db.scalar(select(User).where(User.email == "guard@example.com"))
+        with pytest.raises(InvalidRequestError):
+            user.accounts
+
+def test_explicit_load_is_allowed():
+    with SessionLocal() as db:
+        user = db.scalar(
+            select(User).options(selectinload(User.accounts)).where(User.email == "guard@example.com")
+        )
+        assert user.accounts == []
+
+def test_repeated_statement_raises_within_a_scope():
+    with SessionLocal() as db, statement_scope():
+        db.execute(text("SELECT 1"))
+        with pytest.raises(RepeatedQueryError):
+            db.execute(text("SELECT 1"))
@@ -0,0 +1,36 @@
+"""
+Query plans of the main endpoint queries, via benchmarks/check_query_plans.py:
+fails when one of them reads a hot table with a sequential scan.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import check_query_plans
+
+@pytest.fixture(scope="module")
+def plan_engine(tmp_path_factory):
+    # Own database: seed() drops and recreates every table
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    check_query_plans.seed(engine, 42)
+    yield engine
+    engine.dispose()
+
+@pytest.mark.parametrize("name, stmt", check_query_plans.endpoint_queries(), ids=lambda value: value if isinstance(value, str) else "")
+def test_query_uses_indexes(plan_engine, name, stmt):
+    sql = str(stmt.compile(dialect=plan_engine.dialect, compile_kwargs={"literal_binds": True}))
+    with plan_engine.connect() as conn:
+        assert check_query_plans.seq_scans(conn, plan_engine.dialect.name, sql) == []
+
+def test_detects_a_sequential_scan(plan_engine):
+    # No index on transactions.description
+    with plan_engine.connect() as conn:
+        scans = check_query_plans.seq_scans(conn, "sqlite", "SELECT id FROM transactions WHERE description = 'Seed'")
+    assert scans == ["transactions"]
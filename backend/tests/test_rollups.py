@@ -0,0 +1,126 @@
+"""
+Ledger rollups (app.core.ledger) stay equal to the transactions they summarise,
+whichever path wrote them, and insights merge them with raw rows correctly.
+
+Run from backend/:
+    python -m pytest -q tests
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select
+
+from app.api.v1.endpoints.insights import _debit_totals
+from app.core.ledger import record_transactions
+from app.db.session import SessionLocal
+from app.jobs.autopay import run_autopay
+from app.models.banking import Bill, BillStatus, LedgerRollup, Reward, Transaction, TxnType
+
+def assert_rollups_match(engine):
+    """
+    Every rollup row equals SUM/COUNT over its transactions, and no transaction is missing.
+    """
+    expected = defaultdict(lambda: [Decimal("0"), Decimal("0"), 0])
+    with engine.connect() as conn:
+        for t in conn.execute(select(Transaction)):
+            key = (t.account_id, t.txn_date.year, t.txn_date.month, t.category or "Uncategorized",
+                   t.merchant or t.description or "Unknown", t.txn_type)
+            expected[key][0] += t.amount
+            expected[key][1] += min(t.amount, 0)
+            expected[key][2] += 1
+        actual = {
+            (r.account_id, r.year, r.month, r.category, r.merchant, r.txn_type): [r.total_amount, r.outflow_amount, r.txn_count]
+            for r in conn.execute(select(LedgerRollup))
+        }
+    assert expected
+    assert actual == dict(expected)
+
+def test_transfer(client, make_user, database):
+    sender, recipient = make_user("100.00"), make_user("0.00")
+    for amount in ("25.00", "10.50"):
+        response = client.post("/api/v1/transactions/send", headers=sender.headers, json={
+            "recipient_email": recipient.email, "amount": amount, "description": "Dinner"})
+        assert response.status_code == 200
+    assert_rollups_match(database)
+
+def test_batch(client, make_user, database):
+    sender, alice, bob = make_user("100.00"), make_user("0.00"), make_user("0.00")
+    response = client.post("/api/v1/transactions/batch", headers=sender.headers, json={"items": [
+        {"recipient_email": alice.email, "amount": "30.00", "description": "Rent share"},
+        {"recipient_email": bob.email, "amount": "20.00", "description": "Rent share"},
+        {"recipient_email": "nobody@example.com", "amount": "5.00"},
+    ]})
+    assert response.status_code == 200
+    assert response.json()["sent"] == 2
+    assert_rollups_match(database)
+
+def test_bill_payment_and_autopay(client, make_user, database):
+    user = make_user("1000.00")
+    today = datetime.utcnow().date()
+    with database.begin() as conn:
+        conn.execute(insert(Reward), {"user_id": user.id, "program_name": "Finex Points", "points_balance": 0})
+        manual, *_ = conn.execute(insert(Bill).returning(Bill.id), [
+            {"user_id": user.id, "biller_name": biller, "amount_due": Decimal("99.00"), "due_date": today,
+             "status": BillStatus.upcoming, "auto_pay": auto_pay, "auto_pay_time": "00:00"}
+            for biller, auto_pay in (("Jio Fiber", False), ("Tata Power", True), ("Netflix", True))
+        ]).scalars()
+
+    assert client.put(f"/api/v1/bills/{manual}/pay", headers=user.headers).status_code == 200
+    with SessionLocal() as db:
+        assert run_autopay(db, now=datetime.combine(today, datetime.max.time())).bills_paid == 2
+    assert_rollups_match(database)
+
+def test_redeem_cashback(client, make_user, database):
+    user = make_user("0.00")
+    with database.begin() as conn:
+        conn.execute(insert(Reward), {"user_id": user.id, "program_name": "Finex Points", "points_balance": 500})
+    response = client.post("/api/v1/rewards/redeem", headers=user.headers, json={
+        "item_id": "cash-100", "item_name": "Account Credit Rs. 100", "cost": 400, "type": "cashback"})
+    assert response.status_code == 200
+    assert_rollups_match(database)
+
+def test_import(client, make_user, database):
+    user = make_user()
+    statement = (
+        "Date,Description,Amount,Category\n"
+        "2026-09-01,Salary,5000.00,\n"
+        "2026-09-02,Swiggy,-250.00,\n"
+        "2026-09-02,Swiggy,-250.00,\n"
+        "2026-10-01,Refund,40.00,Shopping\n"
+    )
+    url = f"/api/v1/accounts/{user.account_id}/import?format=csv"
+    assert client.post(url, headers=user.headers, content=statement).json()["inserted"] == 4
+    # A re-upload inserts nothing, so it must not touch the rollups either
+    assert client.post(url, headers=user.headers, content=statement).json()["inserted"] == 0
+    assert_rollups_match(database)
+
+def test_debit_totals_merges_partial_first_month(make_user, database):
+    user = make_user()
+    start = date(2026, 8, 15)
+    rows = [
+        (date(2026, 8, 10), "-70.00", "Food"), # before start_date, same month
+        (date(2026, 8, 20), "-30.00", "Food"), # partial first month, from raw rows
+        (date(2026, 8, 21), "12.00", "Food"), # refund booked as a positive debit
+        (date(2026, 9, 5), "-45.00", "Food"), # whole month, from rollups
+        (date(2026, 9, 6), "5.00", "Food"),
+        (date(2026, 10, 1), "-20.00", "Travel"),
+    ]
+    with SessionLocal() as db:
+        txns = [
+            Transaction(account_id=user.account_id, description="Test", category=category, amount=Decimal(amount),
+                        currency="INR", txn_type=TxnType.debit, merchant="Test", txn_date=datetime.combine(day, datetime.min.time()))
+            for day, amount, category in rows
+        ]
+        db.add_all(txns)
+        record_transactions(db, txns)
+        db.commit()
+
+    raw_category = func.coalesce(func.nullif(Transaction.category, ""), "Uncategorized")
+    with SessionLocal() as db:
+        outflow = _debit_totals(db, [user.account_id], start, LedgerRollup.category, raw_category)
+        signed = _debit_totals(db, [user.account_id], start, LedgerRollup.category, raw_category, outflow_only=False)
+        assert _debit_totals(db, [user.account_id], start + timedelta(days=365), LedgerRollup.category, raw_category) == {}
+
+    assert outflow == {"Food": 75.0, "Travel": 20.0}
+    assert signed == {"Food": 58.0, "Travel": 20.0}
@@ -115,14 +115,18 @@ export default function DashboardLayout() {
   React.useEffect(() => {
     const fetchAlerts = async () => {
       try {
-        const res = await api.get('/alerts/list');
-        setAlertCount(res.data.length);
+        const res = await api.get('/alerts/unread-count');
+        setAlertCount(res.data.unread);
       } catch (e) { console.error("Failed to fetch alerts"); }
     };
 
     fetchAlerts();
     const interval = setInterval(fetchAlerts, 60000); // Poll every minute
-    return () => clearInterval(interval);
+    window.addEventListener('alerts:changed', fetchAlerts); // Alerts page marked some read
+    return () => {
+      clearInterval(interval);
+      window.removeEventListener('alerts:changed', fetchAlerts);
+    };
   }, []);
 
   return (
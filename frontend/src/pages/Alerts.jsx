@@ -10,34 +10,21 @@ export default function Alerts() {
   const [readAlerts, setReadAlerts] = useState([]);
   const [viewMode, setViewMode] = useState('cards');
 
-  // Load read IDs from local storage
-  const [readAlertIds, setReadAlertIds] = useState(() => {
-    try {
-      const saved = localStorage.getItem('banking_read_alerts');
-      return saved ? JSON.parse(saved) : [];
-    } catch (e) { return []; }
-  });
-
-  // Persist read IDs whenever they change
-  useEffect(() => {
-    localStorage.setItem('banking_read_alerts', JSON.stringify(readAlertIds));
-  }, [readAlertIds]);
-
   useEffect(() => {
     fetchAlerts();
-  }, [readAlertIds]); // Re-run filter if IDs change (though mostly they change via actions) - actually fetch depends on mount, filter depends on data.
+  }, []);
+
+  // Tell the sidebar badge to refresh its unread count
+  const notifyAlertsChanged = () => window.dispatchEvent(new Event('alerts:changed'));
 
   const fetchAlerts = async () => {
     try {
       const res = await api.get('/alerts/list');
       const allAlerts = res.data;
 
-      // Segregate based on persisted IDs
-      const newAlertsData = allAlerts.filter(a => !readAlertIds.includes(a.id));
-      const readAlertsData = allAlerts.filter(a => readAlertIds.includes(a.id));
-
-      setAlerts(newAlertsData);
-      setReadAlerts(readAlertsData);
+      // Read state is stored with each alert on the server
+      setAlerts(allAlerts.filter(a => !a.is_read));
+      setReadAlerts(allAlerts.filter(a => a.is_read));
     } catch (error) {
       console.error("Failed to fetch alerts", error);
     } finally {
@@ -45,38 +32,36 @@ export default function Alerts() {
     }
   };
 
-  const markAsRead = (id) => {
+  const markAsRead = async (id) => {
     const alertToRead = alerts.find(a => a.id === id);
-    if (alertToRead) {
-      setReadAlertIds(prev => [...prev, id]); // This will trigger effect to save to LS
-      setReadAlerts(prev => [alertToRead, ...prev]);
+    if (!alertToRead) return;
+    try {
+      const res = await api.post(`/alerts/${id}/read`);
+      setReadAlerts(prev => [res.data, ...prev]);
       setAlerts(prev => prev.filter(a => a.id !== id));
+      notifyAlertsChanged();
       toast.success("Marked as read");
+    } catch (error) {
+      console.error("Failed to mark alert as read", error);
+      toast.error("Could not mark the alert as read");
     }
   };
 
-  const markAllRead = () => {
-    const allIds = [...readAlertIds, ...alerts.map(a => a.id)];
-    setReadAlertIds(allIds);
-    setReadAlerts(prev => [...alerts, ...prev]);
-    setAlerts([]);
-    toast.success("All alerts marked as read");
+  const markAllRead = async () => {
+    try {
+      await api.post('/alerts/read-all');
+      setReadAlerts(prev => [...alerts.map(a => ({ ...a, is_read: true })), ...prev]);
+      setAlerts([]);
+      notifyAlertsChanged();
+      toast.success("All alerts marked as read");
+    } catch (error) {
+      console.error("Failed to mark alerts as read", error);
+      toast.error("Could not mark alerts as read");
+    }
   };
 
   const clearHistory = () => {
-    // Only clear the UI list or also un-read them? usually clear history means remove from view.
-    // But since they are dynamic from backend, "clearing" might mean "forgetting they were read" (restoring them to new) 
-    // OR "hiding them until they regenerate with new IDs"?
-    // Expected behavior for "Clear History" in this context (Previous Alerts) usually means "Delete them".
-    // But we can't delete them from backend.
-    // So let's just empty the readAlerts view, but keep them in readAlertIds so they don't reappear as Value?
-    // Actually if we clear history, we probably just want to hide them.
-    // But next fetch will bring them back as "New" if we don't ignore them?
-    // Let's assume clear history means "Remove from Previous Alerts list ONLY".
-    // But if we fetch again, they will be in 'readAlertsData'.
-    // To truly "delete" them, we might need a "deletedAlertIds" list.
-    // For now, let's just clear the state, but if user refreshes, they might come back as Read.
-    // Let's Keep it simple: Just clear the UI array.
+    // Alerts cannot be deleted on the server; this only hides the read ones until the next visit
     setReadAlerts([]);
     toast.success("History cleared");
   }
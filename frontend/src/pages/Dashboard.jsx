@@ -25,15 +25,8 @@ export default function Dashboard() {
         const fetchData = async () => {
             try {
                 setLoading(true);
-                // API Calls
-                const [acc, txn, billsRes, budgetsRes, rewardsRes, summaryRes] = await Promise.all([
-                    api.get('/accounts/'),
-                    api.get('/transactions/all'),
-                    api.get('/bills/all'),
-                    api.get('/budgets/'),
-                    api.get('/rewards/balance'),
-                    api.get('/budgets/summary') // Optional: simple summary
-                ]);
+                // One request for every dashboard widget
+                const { data: snapshot } = await api.get('/dashboard/snapshot');
 
                 // Mock History (Replace with real if endpoint exists later)
                 const mockHistory = [
@@ -44,11 +37,11 @@ export default function Dashboard() {
                 ];
 
                 setData({
-                    accounts: acc.data || [],
-                    transactions: txn.data || [],
-                    bills: billsRes.data || [],
-                    budgets: budgetsRes.data || [],
-                    rewards: rewardsRes.data || { points: 0 },
+                    accounts: snapshot.accounts || [],
+                    transactions: snapshot.recent_transactions || [],
+                    bills: snapshot.upcoming_bills || [],
+                    budgets: snapshot.budgets || [],
+                    rewards: snapshot.rewards || { points: 0 },
                     balanceHistory: mockHistory
                 });
             } catch (e) {
@@ -9,6 +9,9 @@ export default function Transactions() {
     const [txns, setTxns] = useState([]);
     const [accounts, setAccounts] = useState([]);
     const [loading, setLoading] = useState(true);
+    // /transactions/all returns one page; X-Next-Cursor points at the next one
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const fileInputRef = useRef(null);
 
     // Filters
@@ -27,6 +30,7 @@ export default function Transactions() {
                 api.get('/accounts/')
             ]);
             setTxns(txnRes.data);
+            setNextCursor(txnRes.headers['x-next-cursor'] || null);
             setAccounts(accRes.data);
         } catch (err) {
             console.error("Failed to fetch data", err);
@@ -36,6 +40,21 @@ export default function Transactions() {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        try {
+            setLoadingMore(true);
+            const res = await api.get('/transactions/all', { params: { cursor: nextCursor } });
+            setTxns(prev => [...prev, ...res.data]);
+            setNextCursor(res.headers['x-next-cursor'] || null);
+        } catch (err) {
+            console.error("Failed to fetch more transactions", err);
+            toast.error("Failed to load more transactions.");
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const getAccountName = (accountId) => {
         const acc = accounts.find(a => a.id === accountId);
         return acc ? `${acc.bank_name} (...${acc.masked_account})` : 'Unknown Account';
@@ -310,6 +329,17 @@ export default function Transactions() {
                             </AnimatePresence>
                         </tbody>
                     </table>
+                    {!loading && nextCursor && (
+                        <div className="p-6 flex justify-center border-t border-slate-100 dark:border-white/5">
+                            <button
+                                onClick={loadMore}
+                                disabled={loadingMore}
+                                className="px-6 py-2.5 rounded-xl bg-white dark:bg-[#1e293b] hover:bg-slate-50 dark:hover:bg-[#253045] text-slate-600 dark:text-slate-300 border border-slate-200 dark:border-white/5 font-medium shadow-sm transition-all disabled:opacity-50"
+                            >
+                                {loadingMore ? "Loading..." : "Load more"}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
         </div>